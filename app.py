@@ -1,20 +1,20 @@
-import base64
-import io
-import pandas as pd
 from dash.exceptions import PreventUpdate
 from dash import no_update
-from dash import Dash, dcc, html, Input, Output, State
-from flask import Flask, session, redirect, request
+from dash import Dash, dcc, html, Input, Output, State, Patch
+from flask import Flask, session, redirect, request, jsonify, abort
 import dash
-from auth.auth_middleware import role_check_middleware
+from auth.auth_middleware import compression_middleware
 from components import employee_dashboard, manager_dashboard, hr_dashboard
 from data import db_operations # Import db_operations
-from utils import date_utils
+from data.table_query import FilterQueryError
+from utils import date_utils, excel_handler
 from utils.security import validate_ipn, sanitize_input, validate_date_format, hash_sensitive_data, validate_file_upload
 from utils.logger import log_user_action, log_error
+from utils.rate_limiter import RateLimiter, SQLiteRateLimitStore
+from utils.response_metrics import ResponseMetrics
 import dash_bootstrap_components as dbc
 import os # For secret key generation
-from datetime import datetime
+from datetime import datetime, timedelta
 from config import config
 import logging
 
@@ -43,8 +43,31 @@ def initialize_database():
 # Ініціалізація бази даних при запуску
 initialize_database()
 
+# Обмеження спроб входу; зі сховищем 'sqlite' ліміти спільні для всіх воркерів
+def _login_rate_limiter(max_attempts):
+    store = SQLiteRateLimitStore(db_operations.db_connection) if server.config['RATE_LIMIT_STORE'] == 'sqlite' else None
+    return RateLimiter(max_attempts, server.config['LOGIN_RATE_LIMIT_WINDOW_SECONDS'], store=store)
+
+login_ipn_rate_limiter = _login_rate_limiter(server.config['LOGIN_RATE_LIMIT_ATTEMPTS'])
+login_address_rate_limiter = _login_rate_limiter(server.config['LOGIN_RATE_LIMIT_ADDRESS_ATTEMPTS'])
+
 app = Dash(__name__, server=server, external_stylesheets=[dbc.themes.BOOTSTRAP], suppress_callback_exceptions=True)
-server.wsgi_app = role_check_middleware(server.wsgi_app)
+# Розміри відповідей callback-ів до та після стиснення (див. /metrics/responses)
+response_metrics = ResponseMetrics()
+server.wsgi_app = compression_middleware(
+    server.wsgi_app,
+    min_size=server.config['COMPRESS_MIN_SIZE'],
+    gzip_level=server.config['COMPRESS_GZIP_LEVEL'],
+    brotli_quality=server.config['COMPRESS_BROTLI_QUALITY'],
+    metrics=response_metrics,
+)
+
+@server.route('/metrics/responses')
+def response_metrics_view():
+    """Розміри відповідей за callback-ами в цьому процесі (лише для HR)."""
+    if session.get('user_role') != 'HR Manager':
+        abort(403)
+    return jsonify(response_metrics.stats())
 
 # Обробка помилок
 @server.errorhandler(404)
@@ -111,6 +134,66 @@ def update_user_header(pathname):
     return None # No header if not logged in
 
 
+# Запис ідентичності в сесії: staff_id, роль, область керівника та data_version.
+# Колбеки дашбордів читають дані за staff_id; якщо HR змінив ПІБ, ІПН чи роль
+# користувача (data_version зросла) або видалив його, запис оновлюється чи
+# сесія завершується при наступному запиті.
+def _store_identity(identity):
+    session['identity'] = identity
+    session['user_ipn'] = identity['ipn']
+    session['user_role'] = identity['role']
+    session['user_fio'] = identity['fio']
+
+def _current_identity():
+    identity = session.get('identity')
+    if not identity:
+        if 'user_ipn' not in session:
+            return None
+        # Сесія, створена до появи запису ідентичності
+        employee = db_operations.get_employee_by_ipn(session['user_ipn'])
+        if not employee:
+            session.clear()
+            return None
+        identity = {'staff_id': employee['id'], 'data_version': None}
+
+    current = db_operations.get_session_identity(identity['staff_id'])
+    if current is None:
+        logger.info("Session identity no longer exists, ending session")
+        session.clear()
+        return None
+    if current['data_version'] != identity['data_version']:
+        _store_identity(current)
+    return current
+
+def _client_address():
+    # За nginx (nginx.conf) адресу клієнта передає заголовок X-Real-IP
+    return request.headers.get('X-Real-IP') or request.remote_addr
+
+def _login_rate_limited(limiter, key):
+    """
+    Атомарно списує спробу входу з ліміту ключа: секунди очікування, якщо ліміт
+    вичерпано, інакше None. Спроба, що не має рахуватися, повертається _refund_login_attempt.
+    """
+    allowed, retry_after = limiter.hit(key)
+    if allowed:
+        return None
+    logger.warning(f"Login rate limit exceeded for {key.split(':', 1)[0]}")
+    return retry_after
+
+def _refund_login_attempt(*keys):
+    """Повертає списані спроби лімітам адреси та ІПН: рахуються лише невдалі входи."""
+    limiters = (login_address_rate_limiter, login_ipn_rate_limiter)
+    try:
+        for limiter, key in zip(limiters, keys):
+            if key is not None:
+                limiter.refund(key)
+    except Exception as e:
+        logger.error(f"Rate limiter error during login: {e}")
+
+def _rate_limited_alert(retry_after):
+    minutes = max(int(retry_after // 60) + 1, 1)
+    return dbc.Alert(f"Забагато спроб входу. Спробуйте через {minutes} хв.", color="danger")
+
 # Callback to handle login
 @app.callback(
     [Output('url', 'pathname', allow_duplicate=True),
@@ -124,31 +207,51 @@ def process_login(n_clicks_login_btn, n_submit_ipn_field, ipn):
     if not ipn:
         return dash.no_update, dbc.Alert("Будь ласка, введіть ІПН.", color="warning")
     
+    address_key = f"login-ip:{_client_address()}"
+    try:
+        retry_after = _login_rate_limited(login_address_rate_limiter, address_key)
+    except Exception as e:
+        logger.error(f"Rate limiter error during login: {e}")
+        return dash.no_update, dbc.Alert("Помилка системи. Спробуйте пізніше.", color="danger")
+    if retry_after is not None:
+        return dash.no_update, _rate_limited_alert(retry_after)
+
     ipn = sanitize_input(ipn)
     if not validate_ipn(ipn):
         logger.warning(f"Invalid login attempt with IPN format")
         return dash.no_update, dbc.Alert("Некоректний формат ІПН.", color="danger")
     
+    ipn_key = f"login-ipn:{hash_sensitive_data(ipn)}"
+    try:
+        retry_after = _login_rate_limited(login_ipn_rate_limiter, ipn_key)
+    except Exception as e:
+        logger.error(f"Rate limiter error during login: {e}")
+        _refund_login_attempt(address_key, None)
+        return dash.no_update, dbc.Alert("Помилка системи. Спробуйте пізніше.", color="danger")
+    if retry_after is not None:
+        _refund_login_attempt(address_key, None)
+        return dash.no_update, _rate_limited_alert(retry_after)
     try:
         employee = db_operations.get_employee_by_ipn(ipn)
     except Exception as e:
         logger.error(f"Database error during login: {e}")
+        _refund_login_attempt(address_key, ipn_key)
         return dash.no_update, dbc.Alert("Помилка системи. Спробуйте пізніше.", color="danger")
 
-    if employee:
-        session['user_ipn'] = employee['ipn']
-        session['user_role'] = employee['role']
-        session['user_fio'] = employee.get('fio', employee['ipn'])
+    identity = db_operations.get_session_identity(employee['id']) if employee else None
+    if identity:
+        _refund_login_attempt(address_key, ipn_key)
+        _store_identity(identity)
         session.permanent = True
         
-        logger.info(f"Successful login for role: {employee['role']}")
+        logger.info(f"Successful login for role: {identity['role']}")
 
-        redirect_path = ROLE_PATHS.get(employee['role'])
+        redirect_path = ROLE_PATHS.get(identity['role'])
         if redirect_path:
             return redirect_path, dbc.Alert(f"Успішний вхід. Перенаправлення...", color="success", duration=2000)
         else:
             session.clear()
-            logger.error(f"Unknown role during login: {employee['role']}")
+            logger.error(f"Unknown role during login: {identity['role']}")
             return dash.no_update, dbc.Alert("Помилка: Роль користувача не налаштована для перенаправлення.", color="danger")
     else:
         logger.warning("Failed login attempt - employee not found")
@@ -163,8 +266,9 @@ def process_login(n_clicks_login_btn, n_submit_ipn_field, ipn):
     prevent_initial_call=True # Avoid initial call issues with redirects
 )
 def display_page_content(pathname):
-    authenticated_ipn = session.get('user_ipn')
-    authenticated_role = session.get('user_role')
+    identity = _current_identity()
+    authenticated_ipn = identity['ipn'] if identity else None
+    authenticated_role = identity['role'] if identity else None
 
     if pathname == '/logout':
         if authenticated_ipn:
@@ -194,42 +298,163 @@ def display_page_content(pathname):
         return login_page_layout(), '/login'
 
 # --- HR Dashboard Callbacks ---
+# Сторінка завантажує один компактний знімок staff у hr-staff-snapshot-store;
+# списки співробітників/керівників будуються з нього в браузері, а таблиця
+# співробітників читається з сервера посторінково.
 @app.callback(
-    Output('all-employees-table', 'columns'), # ИСПРАВЛЕНО
-    Output('all-employees-table', 'data'),   # ИСПРАВЛЕНО
+    Output('hr-staff-snapshot-store', 'data'),
     Input('url', 'pathname'),
-    Input('hr-data-refresh-trigger', 'data') 
+    Input('hr-data-refresh-trigger', 'data')
 )
-def update_hr_employees_table(pathname, refresh_trigger):
+def load_hr_staff_snapshot(pathname, refresh_trigger):
     if pathname != '/hr':
         raise PreventUpdate
+    return db_operations.get_staff_snapshot()
+
+# Операції HR публікують у hr-data-change-store id змінених рядків
+# (db_operations.data_changes); знімок і видимі рядки таблиць оновлюються
+# частково через dash.Patch замість повторного завантаження.
+def _publish_changes(changes):
+    # Позначка часу гарантує спрацювання колбеків і для однакових змін
+    return dict(changes, timestamp=datetime.now().timestamp())
+
+def _changed_ids(change, table, *kinds):
+    if not change:
+        return set()
+    return {row_id for kind in kinds for row_id in change.get(table, {}).get(kind, [])}
+
+def _replace_visible_rows(rows, row_ids, load_rows):
+    """Patch, що замінює рядки поточної сторінки з вказаними id (no_update, якщо таких не видно)."""
+    positions = {row['id']: index for index, row in enumerate(rows or [])}
+    visible = [row_id for row_id in row_ids if row_id in positions]
+    if not visible:
+        return no_update
+    patch = Patch()
+    for row in load_rows(visible):
+        patch[positions[row['id']]] = row
+    return patch
+
+def _staff_snapshot_patch(change):
+    changed = _changed_ids(change, 'staff', 'inserted', 'updated')
+    deleted = _changed_ids(change, 'staff', 'deleted')
+    if not changed and not deleted:
+        return no_update
+    patch = Patch()
+    employees = db_operations.get_employees_by_ids(changed)
+    for key, row in db_operations.get_staff_snapshot_rows(employees).items():
+        patch['rows'][key] = row
+    for employee_id in deleted:
+        del patch['rows'][str(employee_id)]
+    return patch
 
-    # Используем более простой и надежный источник данных, который соответствует колонкам
-    columns = [
-        {"name": "ФИО", "id": "fio"},
-        {"name": "ИНН", "id": "ipn"},
-        {"name": "Роль", "id": "role"},
-        {"name": "Руководитель", "id": "manager_fio"},
-        {"name": "Всего дней отпуска", "id": "vacation_days_per_year"},
-        {"name": "Остаток дней", "id": "remaining_vacation_days"},
-    ]
-    # Используем простую функцию get_all_employees() для прямого отображения всех сотрудников
-    employees_data = db_operations.get_all_employees()
-    return columns, employees_data
+@app.callback(
+    Output('hr-staff-snapshot-store', 'data', allow_duplicate=True),
+    Input('hr-data-change-store', 'data'),
+    prevent_initial_call=True
+)
+def patch_hr_staff_snapshot(change):
+    return _staff_snapshot_patch(change)
 
 @app.callback(
-    Output('hr-add-employee-manager-dropdown', 'options'),
-    Input('url', 'pathname')
+    Output('all-employees-table', 'data'),
+    Output('all-employees-table', 'page_count'),
+    Output('all-employees-table', 'page_current'),
+    Output('hr-employees-cursors-store', 'data'),
+    Input('url', 'pathname'),
+    Input('hr-data-refresh-trigger', 'data'),
+    Input('all-employees-table', 'page_current'),
+    Input('all-employees-table', 'page_size'),
+    Input('all-employees-table', 'sort_by'),
+    Input('all-employees-table', 'filter_query'),
+    Input('hr-data-change-store', 'data'),
+    State('hr-employees-cursors-store', 'data'),
+    State('all-employees-table', 'data')
 )
-def update_manager_dropdown(pathname):
+def update_hr_employees_table(pathname, refresh_trigger, page_current, page_size, sort_by, filter_query, change,
+                              cursors, rows):
     if pathname != '/hr':
         raise PreventUpdate
-    managers = db_operations.get_managers() # [{'label': 'Manager FIO', 'value': 'Manager FIO'}]
-    return managers
+    # Після зміни даних збережені курсори сторінок можуть вказувати не туди (рядок
+    # змінив значення стовпця сортування, додався чи видалився), тож вони скидаються,
+    # а сторінки до наступного переходу читаються через offset
+    data_changed = dash.ctx.triggered_id == 'hr-data-change-store'
+    if data_changed and cursors:
+        cursors = dict(cursors, pages={})
+    # Додані й видалені рядки зсувають межі сторінок - тоді сторінка перечитується;
+    # змінені рядки замінюються на місці
+    if data_changed and not _changed_ids(change, 'staff', 'inserted', 'deleted'):
+        patch = _replace_visible_rows(rows, _changed_ids(change, 'staff', 'updated'), db_operations.get_employees_by_ids)
+        return patch, no_update, no_update, cursors if cursors else no_update
+
+    page_current = page_current or 0
+    page_size = page_size or 10
+    sort_by = sort_by or []
+    filter_query = filter_query or ''
+
+    # Курсори keyset-пагінації: {номер сторінки: курсор її початку}; при зміні
+    # фільтра, сортування чи розміру сторінки скидаються разом з номером сторінки
+    if (not cursors or cursors.get('filter') != filter_query or cursors.get('sort') != sort_by
+            or cursors.get('page_size') != page_size):
+        cursors = {'filter': filter_query, 'sort': sort_by, 'page_size': page_size, 'pages': {}}
+        page_current = 0
+    after = cursors['pages'].get(str(page_current))
+
+    try:
+        employees, next_cursor, total = db_operations.get_employees_page(
+            filter_query, sort_by, page_size=page_size, after=after, offset=page_current * page_size
+        )
+    except FilterQueryError as e:
+        logger.warning(f"Unsupported employees table filter: {e}")
+        return [], 1, 0, cursors
+    if next_cursor:
+        cursors['pages'][str(page_current + 1)] = next_cursor
+
+    page_count = max((total + page_size - 1) // page_size, 1)
+    return employees, page_count, page_current, cursors
+
+app.clientside_callback(
+    """
+    function(snapshot) {
+        if (!snapshot) {
+            return [window.dash_clientside.no_update, window.dash_clientside.no_update];
+        }
+        var fio = snapshot.columns.indexOf('fio');
+        // Цілочисельні ключі об'єкта JS перебираються за зростанням, тобто за id
+        var options = Object.keys(snapshot.rows).map(function(id) {
+            return {label: snapshot.rows[id][fio], value: Number(id)};
+        });
+        return [options, options];
+    }
+    """,
+    Output('hr-add-vacation-employee-dropdown', 'options'),
+    Output('hr-edit-employee-fio-dropdown', 'options'),
+    Input('hr-staff-snapshot-store', 'data')
+)
+
+app.clientside_callback(
+    """
+    function(snapshot) {
+        if (!snapshot) {
+            return [window.dash_clientside.no_update, window.dash_clientside.no_update];
+        }
+        var fio = snapshot.columns.indexOf('fio');
+        var role = snapshot.columns.indexOf('role');
+        var names = Object.values(snapshot.rows)
+            .filter(function(row) { return row[role] === 'Manager'; })
+            .map(function(row) { return row[fio]; })
+            .sort(function(a, b) { return a < b ? -1 : (a > b ? 1 : 0); });
+        var options = names.map(function(name) { return {label: name, value: name}; });
+        return [options, options];
+    }
+    """,
+    Output('hr-add-employee-manager-dropdown', 'options'),
+    Output('hr-edit-employee-manager-dropdown', 'options'),
+    Input('hr-staff-snapshot-store', 'data')
+)
 
 @app.callback(
     Output('hr-add-employee-notification', 'children'),
-    Output('hr-data-refresh-trigger', 'data', allow_duplicate=True),
+    Output('hr-data-change-store', 'data', allow_duplicate=True),
     Input('hr-add-employee-submit-button', 'n_clicks'),
     State('hr-add-employee-fio-input', 'value'),
     State('hr-add-employee-ipn-input', 'value'),
@@ -269,63 +494,84 @@ def handle_add_employee(n_clicks, fio, ipn, role, manager_fio, vacation_days):
     
     if employee_id:
         log_user_action(logger, hash_sensitive_data(session.get('user_ipn', '')), "add_employee", f"Added employee: {hash_sensitive_data(ipn)}")
-        return dbc.Alert(f"Сотрудник {fio} успешно добавлен.", color="success"), {'timestamp': datetime.now().timestamp()}
+        changes = db_operations.data_changes(staff_inserted=[employee_id])
+        return dbc.Alert(f"Сотрудник {fio} успешно добавлен.", color="success"), _publish_changes(changes)
     else:
         return dbc.Alert(f"Ошибка добавления сотрудника {fio}.", color="danger"), dash.no_update
 
+# Залишок вибраного співробітника завантажується один раз при виборі (і після
+# змін даних); лічильники днів рахуються в браузері без запитів до сервера.
 @app.callback(
-    Output('hr-add-vacation-employee-dropdown', 'options'),
-    Input('url', 'pathname')
+    Output('hr-add-vacation-balance-store', 'data'),
+    Input('hr-add-vacation-employee-dropdown', 'value'),
+    Input('hr-data-refresh-trigger', 'data'),
+    Input('hr-data-change-store', 'data')
 )
-def update_vacation_employee_dropdown(pathname):
-    if pathname != '/hr':
+def load_add_vacation_employee_balance(employee_id, refresh_trigger, change):
+    if not employee_id:
+        return None
+    if (dash.ctx.triggered_id == 'hr-data-change-store'
+            and employee_id not in _changed_ids(change, 'staff', 'updated', 'deleted')):
         raise PreventUpdate
-    employees = db_operations.get_all_employees() # Assumes this returns list of dicts with 'id' and 'fio'
-    options = [{'label': emp['fio'], 'value': emp['id']} for emp in employees if 'id' in emp and 'fio' in emp]
-    return options
+    employee = db_operations.get_employee_by_id(employee_id)
+    remaining = employee.get('remaining_vacation_days') if employee else None
+    return {'employee_id': employee_id, 'remaining_vacation_days': remaining}
 
-@app.callback(
-    Output('hr-add-vacation-total-days-output', 'children'),
-    Input('hr-add-vacation-start-date', 'date'),
-    Input('hr-add-vacation-end-date', 'date')
-)
-def calculate_vacation_total_days(start_date, end_date):
-    if start_date and end_date:
-        try:
-            days = date_utils.calculate_days(start_date, end_date)
-            return f"Всего дней: {days}" if days > 0 else "Дата окончания должна быть после даты начала."
-        except ValueError:
-            return "Неверный формат дат."
-    return "Всего дней: -"
+app.clientside_callback(
+    """
+    function(balance, startDate, endDate) {
+        // Дні відпустки включно з обома датами, як date_utils.calculate_days
+        function parse(value) {
+            var match = /^(\\d{4})-(\\d{2})-(\\d{2})/.exec(value);
+            if (!match) {
+                return null;
+            }
+            var year = +match[1], month = +match[2] - 1, day = +match[3];
+            var time = Date.UTC(year, month, day);
+            var date = new Date(time);
+            if (date.getUTCFullYear() !== year || date.getUTCMonth() !== month || date.getUTCDate() !== day) {
+                return null;
+            }
+            return time;
+        }
 
-@app.callback(
+        var days = null;
+        var total = 'Всего дней: -';
+        if (startDate && endDate) {
+            var start = parse(startDate);
+            var end = parse(endDate);
+            if (start === null || end === null) {
+                total = 'Неверный формат дат.';
+            } else {
+                days = Math.round((end - start) / 86400000) + 1;
+                total = days > 0 ? 'Всего дней: ' + days : 'Дата окончания должна быть после даты начала.';
+            }
+        }
+
+        var remaining = 'Остаток дней: -';
+        if (balance) {
+            var now = balance.remaining_vacation_days;
+            if (now === null || now === undefined) {
+                remaining = 'Остаток дней: (не удалось загрузить)';
+            } else if (days !== null && days > 0) {
+                remaining = 'Остаток дней (после этого отпуска): ' + (now - days);
+            } else {
+                remaining = 'Остаток дней (текущий): ' + now;
+            }
+        }
+        return [total, remaining];
+    }
+    """,
+    Output('hr-add-vacation-total-days-output', 'children'),
     Output('hr-add-vacation-remaining-days-output', 'children'),
-    Input('hr-add-vacation-employee-dropdown', 'value'),
+    Input('hr-add-vacation-balance-store', 'data'),
     Input('hr-add-vacation-start-date', 'date'),
     Input('hr-add-vacation-end-date', 'date')
 )
-def calculate_vacation_remaining_days(employee_id, start_date, end_date):
-    if not employee_id:
-        return "Остаток дней: -"
-    
-    employee = db_operations.get_employee_by_id(employee_id) # Needs implementation
-    if not employee or 'remaining_vacation_days' not in employee:
-        return "Остаток дней: (не удалось загрузить)"
-
-    remaining_now = employee['remaining_vacation_days']
-    
-    if start_date and end_date:
-        try:
-            days_in_this_vacation = date_utils.calculate_days(start_date, end_date)
-            if days_in_this_vacation > 0:
-                return f"Остаток дней (после этого отпуска): {remaining_now - days_in_this_vacation}"
-        except ValueError:
-            pass # Handled by total_days callback
-    return f"Остаток дней (текущий): {remaining_now}"
 
 @app.callback(
     Output('hr-add-vacation-notification', 'children'),
-    Output('hr-data-refresh-trigger', 'data', allow_duplicate=True),
+    Output('hr-data-change-store', 'data', allow_duplicate=True),
     Input('hr-add-vacation-submit-button', 'n_clicks'),
     State('hr-add-vacation-employee-dropdown', 'value'),
     State('hr-add-vacation-start-date', 'date'),
@@ -353,42 +599,78 @@ def handle_add_vacation(n_clicks, employee_id, start_date, end_date):
         return dbc.Alert("Помилка обчислення днів відпустки.", color="danger"), dash.no_update
 
     try:
-        success = db_operations.add_vacation(employee_id, start_date, end_date, total_days)
+        # Перетин перевіряє add_vacation під блокуванням запису; тут - лише пояснення відмови
+        vacation_id = db_operations.add_vacation(employee_id, start_date, end_date, total_days)
+        overlap = None if vacation_id else db_operations.find_overlapping_vacation(employee_id, start_date, end_date)
     except Exception as e:
         log_error(logger, e, "Error adding vacation")
         return dbc.Alert("Помилка системи при додаванні відпустки.", color="danger"), dash.no_update
     
-    if success:
+    if vacation_id:
         log_user_action(logger, hash_sensitive_data(session.get('user_ipn', '')), "add_vacation", f"Employee ID: {employee_id}")
-        return dbc.Alert("Отпуск успешно добавлен.", color="success"), {'timestamp': datetime.now().timestamp()}
+        changes = db_operations.data_changes(staff_updated=[employee_id], vacations_inserted=[vacation_id])
+        return dbc.Alert("Отпуск успешно добавлен.", color="success"), _publish_changes(changes)
+    elif overlap:
+        return dbc.Alert(overlap['message'], color="warning"), dash.no_update
     else:
         return dbc.Alert("Ошибка добавления отпуска. Проверьте остаток дней.", color="danger"), dash.no_update
 
 @app.callback(
     Output('hr-vacation-history-table', 'columns'),
     Output('hr-vacation-history-table', 'data'),
+    Output('hr-vacation-history-table', 'page_count'),
+    Output('hr-vacation-history-cursors-store', 'data'),
     Input('url', 'pathname'),
-    Input('hr-data-refresh-trigger', 'data')
+    Input('hr-data-refresh-trigger', 'data'),
+    Input('hr-vacation-history-table', 'page_current'),
+    Input('hr-vacation-history-table', 'page_size'),
+    Input('hr-data-change-store', 'data'),
+    State('hr-vacation-history-cursors-store', 'data'),
+    State('hr-vacation-history-table', 'data')
 )
-def update_vacation_history_table(pathname, refresh_trigger):
+def update_vacation_history_table(pathname, refresh_trigger, page_current, page_size, change, cursors, rows):
     if pathname != '/hr':
         raise PreventUpdate
+    if dash.ctx.triggered_id == 'hr-data-change-store' and not _changed_ids(change, 'vacations', 'inserted', 'deleted'):
+        # Рядок історії показує ПІБ і керівника, тож зміна співробітника теж оновлює його рядки
+        staff_ids = _changed_ids(change, 'staff', 'updated')
+        vacation_ids = _changed_ids(change, 'vacations', 'updated') | {
+            row['id'] for row in rows or [] if row.get('staff_id') in staff_ids
+        }
+        patch = _replace_visible_rows(rows, vacation_ids, db_operations.get_vacation_history_rows)
+        return no_update, patch, no_update, no_update
     
     columns = [
         {"name": "Ф.И.О.", "id": "fio"},
         {"name": "Менеджер", "id": "manager_fio"},
         {"name": "Начало", "id": "start_date"},
         {"name": "Конец", "id": "end_date"},
-        {"name": "Всего", "id": "total_days"}
+        {"name": "Всего", "id": "total_days"},
+        {"name": "Рабочих", "id": "working_days"}
     ]
     current_year = datetime.now().year
-    history_data = db_operations.get_vacation_history(current_year)
-    return columns, history_data
+    page_current = page_current or 0
+    page_size = page_size or 10
+
+    # Курсори keyset-пагінації: {номер сторінки: курсор її початку}; скидаються при зміні року чи розміру сторінки
+    if not cursors or cursors.get('year') != current_year or cursors.get('page_size') != page_size:
+        cursors = {'year': current_year, 'page_size': page_size, 'pages': {}}
+    after = cursors['pages'].get(str(page_current))
+
+    history_data, next_cursor = db_operations.get_vacation_history_page(
+        current_year, page_size=page_size, after=after, offset=page_current * page_size
+    )
+    if next_cursor:
+        cursors['pages'][str(page_current + 1)] = next_cursor
+
+    total = db_operations.count_vacation_history(current_year)
+    page_count = max((total + page_size - 1) // page_size, 1)
+    return columns, history_data, page_count, cursors
 
 # --- HR Dashboard: Delete Employee Callback ---
 @app.callback(
     [Output('hr-delete-employee-notification', 'children'),
-     Output('hr-data-refresh-trigger', 'data', allow_duplicate=True)],
+     Output('hr-data-change-store', 'data', allow_duplicate=True)],
     [Input('hr-delete-employee-button', 'n_clicks')],
     [State('all-employees-table', 'selected_row_ids')],
     prevent_initial_call=True
@@ -410,7 +692,7 @@ def handle_delete_employee(n_clicks, selected_row_ids):
         return dbc.Alert(f"Некорректный ID сотрудника: {employee_id_to_delete_str}.", color="danger"), dash.no_update
 
     try:
-        success, message = db_operations.delete_employee(employee_id_to_delete)
+        success, message, changes = db_operations.delete_employee(employee_id_to_delete)
     except Exception as e:
         log_error(logger, e, f"Error deleting employee ID: {employee_id_to_delete}")
         return dbc.Alert("Помилка системи при видаленні співробітника.", color="danger"), dash.no_update
@@ -418,8 +700,8 @@ def handle_delete_employee(n_clicks, selected_row_ids):
     if success:
         log_user_action(logger, hash_sensitive_data(session.get('user_ipn', '')), "delete_employee", f"Employee ID: {employee_id_to_delete}")
         alert_message = dbc.Alert(message, color="success", duration=4000)
-        # Trigger data refresh for tables
-        return alert_message, {'timestamp': datetime.now().timestamp()} 
+        # Publish the touched rows for partial updates of the HR page
+        return alert_message, _publish_changes(changes)
     else:
         alert_message = dbc.Alert(message, color="danger")
         return alert_message, dash.no_update
@@ -427,18 +709,6 @@ def handle_delete_employee(n_clicks, selected_row_ids):
 
 # --- HR Dashboard: Edit Employee Data Callbacks ---
 
-@app.callback(
-    Output('hr-edit-employee-fio-dropdown', 'options'),
-    Input('url', 'pathname'),
-    Input('hr-data-refresh-trigger', 'data')
-)
-def update_edit_employee_fio_dropdown(pathname, refresh_trigger):
-    if pathname != '/hr':
-        raise PreventUpdate
-    employees = db_operations.get_all_employees()
-    options = [{'label': emp['fio'], 'value': emp['id']} for emp in employees if 'id' in emp and 'fio' in emp]
-    return options
-
 @app.callback(
     Output('hr-edit-employee-role-dropdown', 'options'),
     Input('url', 'pathname') # Trigger once when HR page loads
@@ -452,16 +722,6 @@ def update_edit_employee_role_dropdown_options(pathname):
         {'label': 'HR Manager', 'value': 'HR Manager'}
     ]
 
-@app.callback(
-    Output('hr-edit-employee-manager-dropdown', 'options'),
-    Input('url', 'pathname') # Trigger once when HR page loads
-)
-def update_edit_employee_manager_dropdown_options(pathname):
-    if pathname != '/hr':
-        raise PreventUpdate
-    managers = db_operations.get_managers()
-    return managers
-
 @app.callback(
     Output('hr-edit-employee-ipn-input', 'value'),
     Output('hr-edit-employee-role-dropdown', 'value'),
@@ -473,9 +733,10 @@ def update_edit_employee_manager_dropdown_options(pathname):
     Output('hr-edit-employee-selected-id-store', 'data'),
     Output('hr-edit-employee-target-vacation-id-store', 'data'),
     Input('hr-edit-employee-fio-dropdown', 'value'),
-    Input('hr-data-refresh-trigger', 'data') # To refresh form after save
+    Input('hr-data-refresh-trigger', 'data'), # To refresh form after import
+    Input('hr-data-change-store', 'data') # To refresh form after changes to the selected employee
 )
-def populate_edit_employee_form(selected_employee_id, refresh_trigger):
+def populate_edit_employee_form(selected_employee_id, refresh_trigger, change):
     ctx = dash.callback_context
     triggered_input_id = ctx.triggered[0]['prop_id'].split('.')[0]
 
@@ -483,6 +744,10 @@ def populate_edit_employee_form(selected_employee_id, refresh_trigger):
     # Otherwise, only populate if fio_dropdown is the trigger.
     if triggered_input_id == 'hr-data-refresh-trigger' and not selected_employee_id:
         raise PreventUpdate # Don't clear form on general refresh if no employee selected
+    if triggered_input_id == 'hr-data-change-store' and (
+            not selected_employee_id
+            or selected_employee_id not in _changed_ids(change, 'staff', 'updated', 'deleted')):
+        raise PreventUpdate # Other employees changed
         
     if not selected_employee_id:
         return [None] * 7 + [None, None] # Clear all fields and stores
@@ -509,7 +774,7 @@ def populate_edit_employee_form(selected_employee_id, refresh_trigger):
 
 @app.callback(
     Output('hr-edit-employee-notification-div', 'children'),
-    Output('hr-data-refresh-trigger', 'data', allow_duplicate=True),
+    Output('hr-data-change-store', 'data', allow_duplicate=True),
     Input('hr-edit-employee-save-button', 'n_clicks'),
     State('hr-edit-employee-selected-id-store', 'data'),
     State('hr-edit-employee-target-vacation-id-store', 'data'),
@@ -560,10 +825,10 @@ def handle_save_employee_data(n_clicks, employee_id, target_vacation_id, ipn, ro
         'target_vacation_id': int(target_vacation_id) if target_vacation_id else None
     }
 
-    success, message = db_operations.update_employee_data_and_vacation(employee_id, updates)
+    success, message, changes = db_operations.update_employee_data_and_vacation(employee_id, updates)
 
     if success:
-        return dbc.Alert(message, color="success", duration=4000), {'timestamp': datetime.now().timestamp()}
+        return dbc.Alert(message, color="success", duration=4000), _publish_changes(changes)
     else:
         return dbc.Alert(message, color="danger"), dash.no_update
 
@@ -591,45 +856,43 @@ def _create_personal_vacation_details_content(employee_data, user_fio_from_sessi
 @app.callback(
     Output('hr-selected-employee-details-div', 'children'), # Repurposed from original
     Input('url', 'pathname'),
-    Input('hr-data-refresh-trigger', 'data') # Allow refresh if underlying data changes
+    Input('hr-data-refresh-trigger', 'data'), # Allow refresh if underlying data changes
+    Input('hr-data-change-store', 'data')
 )
-def display_hr_personal_vacation_details(pathname, refresh_trigger):
-    if pathname != '/hr' or 'user_ipn' not in session:
+def display_hr_personal_vacation_details(pathname, refresh_trigger, change):
+    identity = _current_identity() if pathname == '/hr' else None
+    if not identity:
+        raise PreventUpdate
+    if (dash.ctx.triggered_id == 'hr-data-change-store'
+            and identity['staff_id'] not in _changed_ids(change, 'staff', 'updated', 'deleted')):
         raise PreventUpdate
 
-    user_ipn = session.get('user_ipn')
-    user_fio = session.get('user_fio', 'HR Менеджер') # Fallback FIO
-    
-    employee_data = db_operations.get_employee_vacation_summary_by_ipn(user_ipn)
-    return _create_personal_vacation_details_content(employee_data, user_fio)
+    employee_data = db_operations.get_employee_vacation_summary_by_id(identity['staff_id'])
+    return _create_personal_vacation_details_content(employee_data, identity['fio'] or 'HR Менеджер')
 
 @app.callback(
     Output('employee-personal-vacation-details-div', 'children'),
     Input('url', 'pathname')
 )
 def display_employee_personal_vacation_details(pathname):
-    if pathname != '/employee' or 'user_ipn' not in session:
+    identity = _current_identity() if pathname == '/employee' else None
+    if not identity:
         raise PreventUpdate
 
-    user_ipn = session.get('user_ipn')
-    user_fio = session.get('user_fio', 'Співробітник') # Fallback FIO
-
-    employee_data = db_operations.get_employee_vacation_summary_by_ipn(user_ipn)
-    return _create_personal_vacation_details_content(employee_data, user_fio)
+    employee_data = db_operations.get_employee_vacation_summary_by_id(identity['staff_id'])
+    return _create_personal_vacation_details_content(employee_data, identity['fio'] or 'Співробітник')
 
 @app.callback(
     Output('manager-personal-vacation-details-div', 'children'),
     Input('url', 'pathname')
 )
 def display_manager_personal_vacation_details(pathname):
-    if pathname != '/manager' or 'user_ipn' not in session:
+    identity = _current_identity() if pathname == '/manager' else None
+    if not identity:
         raise PreventUpdate
 
-    user_ipn = session.get('user_ipn')
-    user_fio = session.get('user_fio', 'Менеджер') # Fallback FIO
-    
-    employee_data = db_operations.get_employee_vacation_summary_by_ipn(user_ipn)
-    return _create_personal_vacation_details_content(employee_data, user_fio)
+    employee_data = db_operations.get_employee_vacation_summary_by_id(identity['staff_id'])
+    return _create_personal_vacation_details_content(employee_data, identity['fio'] or 'Менеджер')
 
 # --- Manager Dashboard: Subordinates Vacations Table Callback ---
 @app.callback(
@@ -652,19 +915,43 @@ def update_manager_subordinates_vacations_table(pathname):
         {"name": "Осталось", "id": "sub_remaining_days"}
     ]
 
-    if pathname != ROLE_PATHS.get('Manager') or session.get('user_role') != 'Manager':
+    identity = _current_identity() if pathname == ROLE_PATHS.get('Manager') else None
+    if not identity or identity['manager_scope'] is None:
         # Not on manager page or not a manager, prevent update or return empty table with headers
         # raise PreventUpdate # Option 1: Prevent update entirely
         return columns, []   # Option 2: Show empty table with headers, as per plan's implication
 
-    manager_fio = session.get('user_fio')
-    if not manager_fio:
-        # Manager FIO not in session, return empty table with headers
-        return columns, []
-
-    subordinates_vacation_data = db_operations.get_subordinates_vacation_details(manager_fio)
+    subordinates_vacation_data = db_operations.get_subordinates_vacation_details(manager_id=identity['manager_scope'])
     return columns, subordinates_vacation_data
 
+# --- Manager Dashboard: Team Occupancy Heatmap Callback ---
+OCCUPANCY_DEFAULT_WEEKS = 12
+
+@app.callback(
+    Output('manager-occupancy-heatmap', 'figure'),
+    Output('manager-occupancy-message', 'children'),
+    Input('url', 'pathname'),
+    Input('manager-occupancy-range', 'start_date'),
+    Input('manager-occupancy-range', 'end_date')
+)
+def update_manager_occupancy_heatmap(pathname, start_date, end_date):
+    identity = _current_identity() if pathname == ROLE_PATHS.get('Manager') else None
+    if not identity or identity['manager_scope'] is None:
+        raise PreventUpdate
+
+    today = datetime.now().date()
+    start = today - timedelta(days=today.weekday())
+    end = start + timedelta(weeks=OCCUPANCY_DEFAULT_WEEKS, days=-1)
+    try:
+        if start_date:
+            start = datetime.strptime(start_date[:10], '%Y-%m-%d').date()
+        if end_date:
+            end = datetime.strptime(end_date[:10], '%Y-%m-%d').date()
+        occupancy = db_operations.get_team_occupancy(identity['manager_scope'], start, end)
+    except ValueError as e:
+        return no_update, dbc.Alert(str(e), color="warning")
+    return manager_dashboard.occupancy_heatmap_figure(occupancy), None
+
 # TODO: Add callbacks for employee-table and manager-table if they are meant to list
 # all vacations for the current user.
 
@@ -675,17 +962,11 @@ def update_manager_subordinates_vacations_table(pathname):
     Input('url', 'pathname')
 )
 def update_manager_own_vacation_history(pathname):
-    if pathname != '/manager' or 'user_ipn' not in session:
+    identity = _current_identity() if pathname == '/manager' else None
+    if not identity:
         raise PreventUpdate
 
-    user_ipn = session.get('user_ipn')
-    manager = db_operations.get_employee_by_ipn(user_ipn)
-    if not manager:
-        return [], []
-    
-    manager_id = manager['id']
-    # Предполагается, что у тебя уже есть эта функция в db_operations.py, как я приказывал
-    history_data = db_operations.get_vacation_history_for_employee(manager_id)
+    history_data = db_operations.get_vacation_history_for_employee(identity['staff_id'])
 
     columns = [
         {"name": "Мои отпуска: Начало", "id": "start_date"},
@@ -701,16 +982,11 @@ def update_manager_own_vacation_history(pathname):
     Input('url', 'pathname')
 )
 def update_employee_vacation_history(pathname):
-    if pathname != '/employee' or 'user_ipn' not in session:
+    identity = _current_identity() if pathname == '/employee' else None
+    if not identity:
         raise PreventUpdate
 
-    user_ipn = session.get('user_ipn')
-    employee = db_operations.get_employee_by_ipn(user_ipn)
-    if not employee:
-        return [], []
-
-    employee_id = employee['id']
-    history_data = db_operations.get_vacation_history_for_employee(employee_id)
+    history_data = db_operations.get_vacation_history_for_employee(identity['staff_id'])
     
     columns = [
         {"name": "Начало", "id": "start_date"},
@@ -721,78 +997,103 @@ def update_employee_vacation_history(pathname):
 
 # --- HR Dashboard: File Import Callbacks ---
 
-def parse_contents(contents, filename):
-    """Разбирает содержимое загруженного файла (CSV или Excel)."""
-    content_type, content_string = contents.split(',')
-    decoded = base64.b64decode(content_string)
+def parse_contents(contents, filename, batch_size=None):
+    """
+    Разбирает загруженный файл (CSV или Excel) потоково: возвращает итератор пакетов
+    DataFrame по batch_size строк, который читает файл прямо во время импорта.
+    """
     try:
-        if 'csv' in filename:
-            df = pd.read_csv(io.StringIO(decoded.decode('utf-8')))
-        elif 'xls' in filename or 'xlsx' in filename:
-            df = pd.read_excel(io.BytesIO(decoded))
-        else:
-            return None, "Неподдерживаемый формат файла. Используйте CSV или Excel."
-        
-        # Переименовываем столбцы для унификации
-        column_mapping = {
-            'ПІБ': 'fio',
-            'ІПН': 'ipn',
-            'Роль': 'role',
-            'Днів відпустки на рік': 'vacation_days_per_year',
-            'Керівник': 'manager_fio'
-        }
-        df.rename(columns=column_mapping, inplace=True)
-
-        required_columns = ['fio', 'ipn']
-        if not all(col in df.columns for col in required_columns):
-            missing = [c for c in required_columns if c not in df.columns]
-            return None, f"В файле отсутствуют обязательные столбцы: {', '.join(missing)} или их эквиваленты."
-
-        return df.to_dict('records'), None
+        batches = excel_handler.read_upload(contents, filename, batch_size or excel_handler.DEFAULT_BATCH_SIZE)
+    except excel_handler.UploadFormatError as e:
+        return None, str(e)
     except Exception as e:
         return None, f"Ошибка при разборе файла: {e}"
+    return batches, None
+
+def _render_import_job(job):
+    """Статус фонової задачі імпорту: прогрес під час виконання, підсумок після завершення."""
+    if job['status'] == 'failed':
+        return html.Div(f"Ошибка импорта: {job['error']}", style={'color': 'red'})
+    if job['status'] == 'succeeded':
+        result = job['result'] or {}
+        success_msg = f"Импорт завершен. Добавлено: {job['imported']}. Обновлено: {job['updated']}."
+        error_msgs = [html.P(f"Ошибка: {e}", style={'color': 'red'}) for e in result.get('errors', [])]
+        hidden = job['error_count'] - len(error_msgs)
+        if hidden > 0:
+            error_msgs.append(html.P(f"...и еще ошибок: {hidden}", style={'color': 'red'}))
+        return html.Div([html.P(success_msg)] + error_msgs)
+
+    total = job['total_rows']
+    processed = job['processed_rows']
+    if not total:
+        label = "Чтение и проверка файла..."
+    elif processed < total:
+        label = f"Запись: {processed} из {total} строк (добавлено {job['imported']}, обновлено {job['updated']}, ошибок {job['error_count']})"
+    else:
+        label = "Обновление иерархии руководителей..."
+    return html.Div([
+        html.P(label),
+        dbc.Progress(value=processed / total * 100 if total else 100, striped=True, animated=True),
+    ])
 
 @app.callback(
     Output('output-data-upload-status', 'children'),
-    Output('all-employees-table', 'data', allow_duplicate=True),
+    Output('hr-import-job-id-store', 'data'),
+    Output('hr-import-job-interval', 'disabled'),
     Input('upload-employee-data', 'contents'),
     State('upload-employee-data', 'filename'),
     prevent_initial_call=True
 )
 def handle_employee_import(contents, filename):
-    """Обрабатывает загрузку файла и инициирует импорт."""
+    """Проверяет загруженный файл и ставит импорт в фоновую очередь; статус опрашивается интервалом."""
     if contents is not None:
         # Валідація файлу
         if not validate_file_upload(filename):
-            return html.Div("Непідтримуваний тип файлу. Використовуйте CSV або Excel.", style={'color': 'red'}), no_update
+            return html.Div("Непідтримуваний тип файлу. Використовуйте CSV або Excel.", style={'color': 'red'}), no_update, no_update
         
-        employees_data, error_message = parse_contents(contents, filename)
+        employees_data, error_message = parse_contents(contents, filename, server.config.get('IMPORT_CHUNK_SIZE'))
         
         if error_message:
             log_error(logger, error_message, "File parsing error")
-            return html.Div(error_message, style={'color': 'red'}), no_update
+            return html.Div(error_message, style={'color': 'red'}), no_update, no_update
 
+        user_hash = hash_sensitive_data(session.get('user_ipn', ''))
         try:
-            imported_count, updated_count, errors = db_operations.batch_import_employees(employees_data)
+            job_id = db_operations.start_import_job(
+                employees_data, owner=user_hash, description=filename,
+                chunk_size=server.config.get('IMPORT_CHUNK_SIZE')
+            )
         except Exception as e:
             log_error(logger, e, "Batch import error")
-            return html.Div("Помилка системи при імпорті даних.", style={'color': 'red'}), no_update
+            return html.Div("Помилка системи при імпорті даних.", style={'color': 'red'}), no_update, no_update
 
-        success_msg = f"Импорт завершен. Добавлено: {imported_count}. Обновлено: {updated_count}."
-        error_msgs = [html.P(f"Ошибка: {e}", style={'color': 'red'}) for e in errors]
-        report = [html.P(success_msg)] + error_msgs
-        
-        log_user_action(logger, hash_sensitive_data(session.get('user_ipn', '')), "batch_import", f"Imported: {imported_count}, Updated: {updated_count}")
-        
-        try:
-            refreshed_data = db_operations.get_all_employees()
-        except Exception as e:
-            log_error(logger, e, "Error refreshing employee data after import")
-            refreshed_data = []
+        log_user_action(logger, user_hash, "batch_import", f"Job queued: {job_id}")
+        return html.Div([html.P("Импорт запущен..."), dbc.Progress(value=100, striped=True, animated=True)]), job_id, False
         
-        return html.Div(report), refreshed_data
-        
-    return no_update, no_update
+    return no_update, no_update, no_update
+
+@app.callback(
+    Output('output-data-upload-status', 'children', allow_duplicate=True),
+    Output('hr-import-job-interval', 'disabled', allow_duplicate=True),
+    Output('hr-data-refresh-trigger', 'data', allow_duplicate=True),
+    Input('hr-import-job-interval', 'n_intervals'),
+    State('hr-import-job-id-store', 'data'),
+    prevent_initial_call=True
+)
+def poll_import_job(n_intervals, job_id):
+    """Опрашивает состояние фонового импорта; после завершения обновляет данные HR-страницы."""
+    if not job_id:
+        return no_update, True, no_update
+
+    job = db_operations.get_import_job(job_id, owner=hash_sensitive_data(session.get('user_ipn', '')))
+    if job is None:
+        return html.Div("Задача импорта не найдена.", style={'color': 'red'}), True, no_update
+    if job['status'] not in ('succeeded', 'failed'):
+        return _render_import_job(job), False, no_update
+
+    if job['status'] == 'succeeded':
+        log_user_action(logger, job['owner'], "batch_import", f"Imported: {job['imported']}, Updated: {job['updated']}")
+    return _render_import_job(job), True, {'timestamp': datetime.now().timestamp()}
 
 if __name__ == '__main__':
     # Створення необхідних директорій
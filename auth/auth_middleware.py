@@ -1,5 +1,176 @@
-def role_check_middleware(app):
+import gzip
+import io
+import json
+
+try:
+    import brotli
+except ImportError:  # brotli необов'язковий: без нього клієнти отримують gzip
+    brotli = None
+
+# Стиснення відповідей Dash: callback-и таблиць та layout повертають великий
+# JSON з повторюваними ключами, який gunicorn віддає без стиснення. Відповіді
+# цих шляхів буферизуються і, якщо вони більші за min_size, стискаються
+# кодуванням, яке приймає клієнт (Accept-Encoding): br, якщо доступний brotli, інакше gzip.
+COMPRESSIBLE_PATHS = ('/_dash-update-component', '/_dash-layout')
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_GZIP_LEVEL = 6
+DEFAULT_BROTLI_QUALITY = 5
+
+
+def _accepted_encodings(header):
+    """{кодування: q} з заголовка Accept-Encoding."""
+    accepted = {}
+    for part in (header or '').split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+
+def choose_encoding(header, brotli_available=None):
+    """Найкраще підтримуване кодування для Accept-Encoding або None (без стиснення)."""
+    if brotli_available is None:
+        brotli_available = brotli is not None
+    accepted = _accepted_encodings(header)
+    wildcard = accepted.get('*', 0.0)
+    candidates = (('br', 'gzip') if brotli_available else ('gzip',))
+    best, best_quality = None, 0.0
+    for encoding in candidates:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+# Ключ "output" шукається лише на початку тіла: завантажений файл у запиті не читається наперед
+CALLBACK_KEY_PREFIX_BYTES = 4096
+
+
+class _PrefixedInput:
+    """wsgi.input, з якого вже прочитано prefix: спершу віддає prefix, потім решту потоку."""
+
+    def __init__(self, prefix, stream):
+        self._prefix = io.BytesIO(prefix)
+        self._stream = stream
+
+    def read(self, size=-1):
+        data = self._prefix.read(size)
+        if size is None or size < 0:
+            return data + self._stream.read()
+        if len(data) < size:
+            data += self._stream.read(size - len(data))
+        return data
+
+    def readline(self, size=-1):
+        line = self._prefix.readline(size)
+        if line.endswith(b'\n') or (size is not None and 0 <= size <= len(line)):
+            return line
+        rest = self._stream.readline() if size is None or size < 0 else self._stream.readline(size - len(line))
+        return line + rest
+
+    def __iter__(self):
+        while True:
+            line = self.readline()
+            if not line:
+                return
+            yield line
+
+
+def _callback_key(environ):
+    """
+    Ідентифікатор callback-а (рядок output з тіла запиту Dash). Читає не більше
+    CALLBACK_KEY_PREFIX_BYTES тіла; прочитане повертається в wsgi.input перед рештою потоку.
+    Без додатного CONTENT_LENGTH (наприклад, chunked-запит) тіло не читається.
+    """
+    try:
+        length = int(environ.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        length = 0
+    if length <= 0:
+        return '_dash-update-component'
+    prefix = environ['wsgi.input'].read(min(length, CALLBACK_KEY_PREFIX_BYTES))
+    environ['wsgi.input'] = _PrefixedInput(prefix, environ['wsgi.input'])
+    text = prefix.decode('utf-8', errors='replace')
+    # "output" - перший ключ запиту; значення (можливо, завантажений файл) не розбираються
+    position = text.find('"output"')
+    if position >= 0:
+        position = text.find(':', position) + 1
+        while position < len(text) and text[position].isspace():
+            position += 1
+        try:
+            return json.JSONDecoder().raw_decode(text, position)[0]
+        except ValueError:
+            pass
+    return '_dash-update-component'
+
+
+def _with_vary_accept_encoding(headers):
+    """Додає Accept-Encoding до заголовка Vary (або сам заголовок), не дублюючи його."""
+    for index, (name, value) in enumerate(headers):
+        if name.lower() == 'vary':
+            fields = [field.strip().lower() for field in value.split(',')]
+            if 'accept-encoding' not in fields and '*' not in fields:
+                headers[index] = (name, f"{value}, Accept-Encoding")
+            return headers
+    return headers + [('Vary', 'Accept-Encoding')]
+
+
+def compression_middleware(app, min_size=DEFAULT_MIN_SIZE, gzip_level=DEFAULT_GZIP_LEVEL,
+                           brotli_quality=DEFAULT_BROTLI_QUALITY, metrics=None):
+    """
+    WSGI middleware Dash-сервера: стискає відповіді COMPRESSIBLE_PATHS і, якщо
+    передано metrics (utils.response_metrics.ResponseMetrics), записує розмір
+    кожної відповіді до та після стиснення за ключем callback-а.
+    """
     def middleware(environ, start_response):
-        # Базова перевірка middleware
-        return app(environ, start_response)
+        path = environ.get('PATH_INFO', '')
+        if not path.endswith(COMPRESSIBLE_PATHS):
+            return app(environ, start_response)
+
+        key = _callback_key(environ) if path.endswith('/_dash-update-component') else '_dash-layout'
+        captured = {}
+        chunks = []
+
+        def capture_start_response(status, headers, exc_info=None):
+            captured['status'], captured['headers'], captured['exc_info'] = status, headers, exc_info
+            return chunks.append
+
+        result = app(environ, capture_start_response)
+        try:
+            chunks.extend(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+
+        status, headers = captured['status'], list(captured['headers'])
+        body = b''.join(chunks)
+        encoding = None
+        if status.startswith('200') and body:
+            already_encoded = any(name.lower() == 'content-encoding' for name, _ in headers)
+            # Vary - лише для відповідей, вміст яких залежить від Accept-Encoding
+            if len(body) >= min_size and not already_encoded:
+                headers = _with_vary_accept_encoding(headers)
+                encoding = choose_encoding(environ.get('HTTP_ACCEPT_ENCODING'))
+            raw_size = len(body)
+            if encoding == 'br':
+                body = brotli.compress(body, quality=brotli_quality)
+            elif encoding == 'gzip':
+                body = gzip.compress(body, compresslevel=gzip_level, mtime=0)
+            if encoding:
+                headers = [(name, value) for name, value in headers if name.lower() != 'content-length']
+                headers += [('Content-Encoding', encoding), ('Content-Length', str(len(body)))]
+            if metrics is not None:
+                metrics.record(key, raw_size, len(body), encoding or 'identity')
+
+        start_response(status, headers, captured['exc_info'])
+        return [body]
     return middleware
@@ -4,8 +4,13 @@ import dash_bootstrap_components as dbc
 layout = html.Div([
     # --- Скрытые компоненты для хранения данных ---
     dcc.Store(id='hr-data-refresh-trigger'), 
+    dcc.Store(id='hr-staff-snapshot-store'), # Знімок staff: {'columns': [...], 'rows': {id: [...]}}
+    dcc.Store(id='hr-data-change-store'), # id рядків, змінених останньою операцією HR (db_operations.data_changes)
+    dcc.Store(id='hr-add-vacation-balance-store'), # Залишок днів співробітника, вибраного для нової відпустки
     dcc.Store(id='hr-edit-employee-selected-id-store'),
     dcc.Store(id='hr-edit-employee-target-vacation-id-store'),
+    dcc.Store(id='hr-vacation-history-cursors-store'), # Курсори keyset-пагінації історії відпусток
+    dcc.Store(id='hr-employees-cursors-store'), # Курсори keyset-пагінації таблиці співробітників
 
     html.H2('HR Manager Dashboard'),
     html.Br(),
@@ -16,10 +21,26 @@ layout = html.Div([
         dbc.CardBody([
             dash_table.DataTable(
                 id='all-employees-table',
-                columns=[],
+                columns=[
+                    {"name": "ФИО", "id": "fio"},
+                    {"name": "ИНН", "id": "ipn"},
+                    {"name": "Роль", "id": "role"},
+                    {"name": "Руководитель", "id": "manager_fio"},
+                    {"name": "Всего дней отпуска", "id": "vacation_days_per_year"},
+                    {"name": "Остаток дней", "id": "remaining_vacation_days"},
+                ],
                 data=[],
                 row_selectable='single',
+                # Сторінки, сортування та фільтр обробляються на сервері (get_employees_page)
+                page_action='custom',
+                page_current=0,
                 page_size=10,
+                sort_action='custom',
+                sort_mode='single',
+                sort_by=[],
+                filter_action='custom',
+                filter_query='',
+                filter_options={'case': 'insensitive'},
                 style_cell={'textAlign': 'left'},
                 style_header={'backgroundColor': 'rgb(230, 230, 230)', 'fontWeight': 'bold'}
             ),
@@ -96,6 +117,8 @@ layout = html.Div([
                         id='hr-vacation-history-table',
                         columns=[],
                         data=[],
+                        page_action='custom', # Сторінки запитуються з сервера по одній
+                        page_current=0,
                         page_size=10,
                         style_cell={'textAlign': 'left'},
                         style_header={'backgroundColor': 'rgb(230, 230, 230)', 'fontWeight': 'bold'}
@@ -126,6 +149,9 @@ layout = html.Div([
                         },
                         multiple=False
                     ),
+                    # Імпорт виконується у фоні; статус задачі опитується інтервалом
+                    dcc.Store(id='hr-import-job-id-store'),
+                    dcc.Interval(id='hr-import-job-interval', interval=1000, disabled=True),
                     html.Div(id='output-data-upload-status'),
                 ])
             ], className="mb-3"),
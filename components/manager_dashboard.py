@@ -1,5 +1,9 @@
-from dash import html, dash_table
+from datetime import date, timedelta
+from dash import html, dash_table, dcc
 import dash_bootstrap_components as dbc
+import plotly.graph_objects as go
+
+WEEKDAY_LABELS = ['Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Нд']
 
 layout = html.Div([
     html.H2('Manager Dashboard'),
@@ -32,5 +36,46 @@ layout = html.Div([
             ], className="mb-3"),
         ], md=6),
     ]),
+    dbc.Card([
+        dbc.CardHeader(html.H4("ВІДСУТНІ В КОМАНДІ ЗА ДНЯМИ")),
+        dbc.CardBody([
+            # Без дат - 12 тижнів від поточного понеділка (див. update_manager_occupancy_heatmap)
+            dcc.DatePickerRange(id='manager-occupancy-range', display_format='DD.MM.YYYY',
+                                first_day_of_week=1, className="mb-2"),
+            html.Div(id='manager-occupancy-message'),
+            dcc.Graph(id='manager-occupancy-heatmap', config={'displayModeBar': False})
+        ])
+    ], className="mb-3"),
     dash_table.DataTable(id='manager-table', columns=[], data=[], page_size=10) # For manager's own vacation list
 ])
+
+
+def occupancy_heatmap_figure(occupancy):
+    """
+    Теплова карта зайнятості (db_operations.get_team_occupancy): стовпці - тижні
+    з кількістю відсутніх за тиждень у підписі, рядки - дні тижня.
+    """
+    start = date.fromisoformat(occupancy['start'])
+    offset = start.weekday()
+    weeks = occupancy['weeks']
+    counts = [[None] * len(weeks) for _ in WEEKDAY_LABELS]
+    dates = [[''] * len(weeks) for _ in WEEKDAY_LABELS]
+    for day, count in enumerate(occupancy['daily']):
+        week, weekday = divmod(offset + day, 7)
+        counts[weekday][week] = count
+        dates[weekday][week] = (start + timedelta(days=day)).strftime('%d.%m.%Y')
+
+    labels = [f"{date.fromisoformat(week['week_start']).strftime('%d.%m')} ({week['absent']})" for week in weeks]
+    figure = go.Figure(go.Heatmap(
+        z=counts, x=labels, y=WEEKDAY_LABELS, customdata=dates,
+        colorscale='Reds', zmin=0, zmax=max(max(occupancy['daily'], default=0), 1),
+        xgap=2, ygap=2, colorbar={'title': 'Відсутні'},
+        hovertemplate='%{customdata}<br>Відсутні: %{z} з ' + str(occupancy['team_size']) + '<extra></extra>',
+    ))
+    figure.update_layout(
+        margin={'l': 40, 'r': 20, 't': 20, 'b': 60},
+        height=300,
+        yaxis={'autorange': 'reversed'},
+        xaxis={'title': 'Тиждень (відсутні за тиждень)', 'type': 'category'},
+    )
+    return figure
@@ -19,6 +19,23 @@ class Config:
     # Налаштування логування
     LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
     LOG_FILE = os.environ.get('LOG_FILE', 'logs/app.log')
+    
+    # Імпорт співробітників: кількість рядків в одній транзакції запису
+    IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', 1000))
+
+    # Обмеження спроб входу за вікно: на один ІПН та на адресу клієнта (за NAT
+    # офісу одна адреса в багатьох користувачів, тому її ліміт більший)
+    LOGIN_RATE_LIMIT_ATTEMPTS = int(os.environ.get('LOGIN_RATE_LIMIT_ATTEMPTS', 5))
+    LOGIN_RATE_LIMIT_ADDRESS_ATTEMPTS = int(os.environ.get('LOGIN_RATE_LIMIT_ADDRESS_ATTEMPTS', 100))
+    LOGIN_RATE_LIMIT_WINDOW_SECONDS = int(os.environ.get('LOGIN_RATE_LIMIT_WINDOW_SECONDS', 900))
+    # 'sqlite' - стан спільний для всіх воркерів (таблиця rate_limits), 'memory' - у межах процесу
+    RATE_LIMIT_STORE = os.environ.get('RATE_LIMIT_STORE', 'sqlite')
+
+    # Стиснення відповідей callback-ів Dash та layout (auth/auth_middleware.py):
+    # відповіді менші за поріг (байт) віддаються як є
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 5))
 
 class DevelopmentConfig(Config):
     """Конфігурація для розробки"""
@@ -38,6 +55,7 @@ class TestingConfig(Config):
     TESTING = True
     DATABASE_URL = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    RATE_LIMIT_STORE = 'memory'
     SESSION_COOKIE_SECURE = False
 
 config = {
@@ -0,0 +1,139 @@
+import os
+import threading
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class ReadThroughCache:
+    """
+    LRU-кеш результатів читання в межах процесу з лічильниками поколінь таблиць.
+
+    get(key, loader, tables) повертає збережене значення або викликає loader()
+    і запам'ятовує результат разом з таблицями, з яких він прочитаний. Кожна
+    функція запису після коміту викликає invalidate(tables): покоління цих
+    таблиць збільшуються, а залежні записи відкидаються (без tables - усі).
+    Значення, завантажене під час запису, що паралельно завершився, не
+    зберігається - воно могло бути прочитане до коміту. Кількість записів
+    обмежена max_entries, найдавніше використані витісняються першими.
+
+    Значення повертаються без копіювання: викликачі не повинні їх змінювати.
+    """
+
+    def __init__(self, max_entries=1024):
+        if max_entries < 1:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._table_generations = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    def _generations(self, tables):
+        return self._generation, tuple(self._table_generations.get(table, 0) for table in tables)
+
+    def get(self, key, loader, tables=()):
+        with self._lock:
+            generations = self._generations(tables)
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry[1]
+            self._stats['misses'] += 1
+
+        # Запит до бази виконується поза блокуванням кешу
+        value = loader()
+
+        with self._lock:
+            if generations == self._generations(tables):
+                self._entries[key] = (frozenset(tables), value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._stats['evictions'] += 1
+        return value
+
+    def invalidate(self, tables=None):
+        """Нове покоління для таблиць tables (None - для всіх): залежні значення застарілі."""
+        with self._lock:
+            self._stats['invalidations'] += 1
+            if tables is None:
+                self._generation += 1
+                self._entries.clear()
+                return
+            tables = set(tables)
+            for table in tables:
+                self._table_generations[table] = self._table_generations.get(table, 0) + 1
+            stale = [key for key, (entry_tables, _) in self._entries.items() if entry_tables & tables]
+            for key in stale:
+                del self._entries[key]
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def stats(self):
+        """Лічильники кешу: влучання, промахи, витіснення, інвалідації, розмір і покоління."""
+        with self._lock:
+            result = dict(self._stats)
+            result['size'] = len(self._entries)
+            result['generation'] = self._generation
+        lookups = result['hits'] + result['misses']
+        result['hit_ratio'] = result['hits'] / lookups if lookups else 0.0
+        return result
+
+
+class TableVersionWatcher:
+    """
+    Визначає, які таблиці змінили інші з'єднання (зокрема інші воркери gunicorn).
+
+    Тримає власне довгоживуче з'єднання лише для читання версій.
+    PRAGMA data_version цього з'єднання змінюється, лише коли будь-яке інше
+    з'єднання комітить зміни до файлу бази, тож звичайна перевірка коштує
+    кілька мікросекунд. Лише після зміни читається таблиця table_versions,
+    лічильники якої збільшують тригери на staff та vacations (міграція 6).
+    """
+
+    def __init__(self, connect):
+        self._connect = connect
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._conn = None
+        self._pid = None
+        self._data_version = None
+        self._versions = None
+
+    def reset(self):
+        """Закриває з'єднання (наприклад, після перемикання файлу бази); наступна перевірка - з нуля."""
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._reset()
+
+    def changed_tables(self):
+        """
+        Повертає множину таблиць, змінених з попереднього виклику, або None,
+        якщо попереднього стану немає (перший виклик, fork) - тоді застарілим
+        слід вважати все.
+        """
+        with self._lock:
+            if self._conn is None or self._pid != os.getpid():
+                # З'єднання батьківського процесу після fork() не використовується
+                self._reset()
+                self._conn = self._connect()
+                self._pid = os.getpid()
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version == self._data_version:
+                return set()
+            versions = dict(self._conn.execute("SELECT table_name, version FROM table_versions").fetchall())
+            previous = self._versions
+            self._data_version = data_version
+            self._versions = versions
+        if previous is None:
+            return None
+        return {table for table in versions.keys() | previous.keys()
+                if versions.get(table) != previous.get(table)}
@@ -0,0 +1,134 @@
+# Журнал змін (CDC) staff та vacations: таблицю change_log заповнюють тригери
+# міграції 9 у тій самій транзакції, що й зміну рядка. seq зростає монотонно
+# (AUTOINCREMENT не використовує номери повторно), а SQLite серіалізує запис,
+# тож порядок seq збігається з порядком комітів: читач, що дочитав до seq,
+# більше ніколи не побачить нових записів з меншим номером.
+
+OPERATION_INSERT = 'insert'
+OPERATION_UPDATE = 'update'
+OPERATION_DELETE = 'delete'
+# Рядок vacations перенесено в vacations_archive (міграція 14, data/vacation_archive.py):
+# з гарячої таблиці він зник, але відпустка не видалена
+OPERATION_ARCHIVE = 'archive'
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Записи старші за стільки днів ущільнюються до одного на рядок, а старші за
+# RETENTION_DAYS видаляються (scripts/compact_change_log.py, нічна задача)
+COMPACT_AFTER_DAYS = 1
+RETENTION_DAYS = 30
+
+
+class ChangeLogTruncatedError(ValueError):
+    """Записи після запитаної позиції вже видалені: споживач має перечитати дані повністю."""
+
+    def __init__(self, seq, pruned_through):
+        super().__init__(f"Журнал змін очищено до {pruned_through}, запитано з {seq}")
+        self.seq = seq
+        self.pruned_through = pruned_through
+
+
+def _pruned_through(conn):
+    return conn.execute("SELECT pruned_through FROM change_log_state WHERE id = 1").fetchone()[0]
+
+
+def position(conn):
+    """Номер останнього запису журналу: з нього споживач починає стежити за змінами."""
+    row = conn.execute("SELECT MAX(seq) FROM change_log").fetchone()
+    return max(row[0] or 0, _pruned_through(conn))
+
+
+def _entry(row):
+    return {
+        'seq': row['seq'],
+        'table': row['table_name'],
+        'row_id': row['row_id'],
+        'operation': row['operation'],
+        'columns': row['changed_columns'].split(',') if row['changed_columns'] else None,
+        'changed_at': row['changed_at'],
+    }
+
+
+def changes_since(conn, seq, limit=DEFAULT_BATCH_SIZE):
+    """
+    Не більше limit записів з номером більшим за seq, за зростанням seq.
+    Повертає (записи, позиція для наступного виклику); менше limit записів
+    означає, що споживач наздогнав журнал. Викидає ChangeLogTruncatedError,
+    якщо частину записів після seq вже видалено.
+    """
+    pruned_through = _pruned_through(conn)
+    if seq < pruned_through:
+        raise ChangeLogTruncatedError(seq, pruned_through)
+    rows = conn.execute("""
+        SELECT seq, table_name, row_id, operation, changed_columns, changed_at
+        FROM change_log WHERE seq > ? ORDER BY seq LIMIT ?
+    """, (seq, limit)).fetchall()
+    entries = [_entry(row) for row in rows]
+    return entries, (entries[-1]['seq'] if entries else seq)
+
+
+def _merge(entries):
+    """Один запис замість кількох змін рядка: видалення перекриває все, потім архівування, вставка - оновлення."""
+    operations = [entry['operation'] for entry in entries]
+    if OPERATION_DELETE in operations:
+        return OPERATION_DELETE, None
+    if OPERATION_ARCHIVE in operations:
+        return OPERATION_ARCHIVE, None
+    if operations[0] == OPERATION_INSERT:
+        return OPERATION_INSERT, None
+    columns = []
+    for entry in entries:
+        columns.extend(column for column in entry['changed_columns'].split(',') if column not in columns)
+    return OPERATION_UPDATE, ','.join(columns)
+
+
+def compact(conn, through_seq):
+    """
+    Ущільнює записи з seq <= through_seq: для кожного рядка залишається лише
+    останній запис з об'єднаними змінами. Споживач, що читає з будь-якої
+    позиції, і далі бачить кожен змінений рядок, але повторна вставка має
+    трактуватися як upsert. Повертає кількість видалених записів (без коміту).
+    """
+    rows = conn.execute("""
+        SELECT seq, table_name, row_id, operation, changed_columns
+        FROM change_log
+        WHERE seq <= :through AND (table_name, row_id) IN (
+            SELECT table_name, row_id FROM change_log
+            WHERE seq <= :through
+            GROUP BY table_name, row_id HAVING COUNT(*) > 1
+        )
+        ORDER BY table_name, row_id, seq
+    """, {'through': through_seq}).fetchall()
+
+    removed = []
+    merged = []
+    group = []
+    for row in rows + [None]:
+        if group and (row is None or (row['table_name'], row['row_id']) != (group[0]['table_name'], group[0]['row_id'])):
+            operation, columns = _merge(group)
+            merged.append((operation, columns, group[-1]['seq']))
+            removed.extend((entry['seq'],) for entry in group[:-1])
+            group = []
+        if row is not None:
+            group.append(row)
+    conn.executemany("UPDATE change_log SET operation = ?, changed_columns = ? WHERE seq = ?", merged)
+    conn.executemany("DELETE FROM change_log WHERE seq = ?", removed)
+    return len(removed)
+
+
+def prune(conn, through_seq):
+    """Видаляє записи з seq <= through_seq; читання з меншої позиції далі неможливе. Без коміту."""
+    deleted = conn.execute("DELETE FROM change_log WHERE seq <= ?", (through_seq,)).rowcount
+    conn.execute(
+        "UPDATE change_log_state SET pruned_through = MAX(pruned_through, ?) WHERE id = 1", (through_seq,)
+    )
+    return deleted
+
+
+def last_seq_before(conn, modifier):
+    """Номер останнього запису, зробленого раніше за datetime('now', modifier), або None."""
+    row = conn.execute("""
+        SELECT seq FROM change_log WHERE changed_at < datetime('now', ?)
+        ORDER BY changed_at DESC, seq DESC LIMIT 1
+    """, (modifier,)).fetchone()
+    return row[0] if row else None
@@ -1,7 +1,11 @@
 import sqlite3
-from datetime import datetime, date
+import atexit
+import time
+from datetime import datetime, date, timedelta
 from utils import date_utils # Ensure date_utils is imported
-from utils.security import validate_ipn, sanitize_input
+from data.db_pool import ConnectionPool
+from data import migrations, vacation_summary, staff_import, jobs, table_query, change_log, occupancy, vacation_overlaps, vacation_ledger, vacation_archive
+from data.cache import ReadThroughCache, TableVersionWatcher
 from pathlib import Path
 import logging
 
@@ -11,95 +15,298 @@ DATA_DIR = Path('data')
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 DB_PATH = str(DATA_DIR / 'vacations.db')
 
+# Пул з'єднань: одне з'єднання на потік/воркер, PRAGMA виконуються один раз
+_pool = ConnectionPool(DB_PATH)
+atexit.register(_pool.close_all)
+
+# Кеш читань списків співробітників/керівників та пошуку за id/ІПН. Кожна
+# функція, що змінює staff або vacations, після коміту викликає _invalidate_cache();
+# записи інших воркерів виявляються через _watcher перед кожним читанням з кешу.
+_read_cache = ReadThroughCache(max_entries=1024)
+_watcher = TableVersionWatcher(lambda: _pool.open_dedicated())
+atexit.register(_watcher.reset)
+
+def _invalidate_cache(tables=None):
+    _read_cache.invalidate(tables)
+
+def _cached(key, loader, tables):
+    """Читання через кеш після перевірки, чи не змінили таблиці інші процеси."""
+    changed = _watcher.changed_tables()
+    if changed is None:
+        _read_cache.invalidate()
+    elif changed:
+        _read_cache.invalidate(changed)
+    return _read_cache.get(key, loader, tables)
+
+def get_cache_stats():
+    """Статистика кешу читань (влучання, промахи, витіснення) для діагностики."""
+    return _read_cache.stats()
+
+def db_connection():
+    """Позичає з'єднання з пулу на час блоку ``with``."""
+    return _pool.connection()
+
 def get_db_connection():
-    """Встановлює з'єднання з базою даних SQLite."""
+    """
+    Встановлює окреме з'єднання з базою даних SQLite (поза пулом).
+    Викликач сам відповідає за conn.close().
+    """
     try:
-        conn = sqlite3.connect(DB_PATH, timeout=30.0)
-        conn.execute("PRAGMA foreign_keys = ON")
-        # Test the connection
-        conn.execute("SELECT 1").fetchone()
-        conn.execute("PRAGMA journal_mode = WAL")
-    except sqlite3.Error as e:
-        logger.error(f"Database connection error: {e}, Path: {DB_PATH}")
+        return _pool.open_dedicated()
+    except sqlite3.Error:
         try:
             Path(DB_PATH).touch(exist_ok=True)
-            conn = sqlite3.connect(DB_PATH, timeout=30.0)
+            return _pool.open_dedicated()
         except Exception as create_error:
             logger.error(f"Failed to create database: {create_error}")
             raise
-    conn.row_factory = sqlite3.Row
-    return conn
+
+def configure_database(db_path):
+    """Перемикає модуль на інший файл бази даних (скрипти, бенчмарки)."""
+    global DB_PATH, _schema_ready
+    DB_PATH = str(db_path)
+    _pool.reconfigure(DB_PATH)
+    _watcher.reset()
+    _invalidate_cache()
+    _schema_ready = False
+
+def get_pool_stats():
+    """Статистика пулу з'єднань для діагностики."""
+    return _pool.stats()
 
 def _ensure_tables_exist(conn_param=None):
-    """Створює таблиці, якщо вони не існують. Це базовий варіант."""
-    close_conn_here = False
+    """Доводить схему до актуальної версії через міграції (див. data/migrations.py)."""
     if conn_param is None:
-        conn = get_db_connection()
-        close_conn_here = True
-    else:
-        conn = conn_param
-
-    cursor = conn.cursor()
-    # Створення таблиці staff
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS staff (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        fio TEXT NOT NULL,
-        ipn TEXT UNIQUE NOT NULL,
-        role TEXT NOT NULL,
-        manager_fio TEXT,
-        vacation_days_per_year INTEGER NOT NULL,
-        remaining_vacation_days INTEGER NOT NULL
-    )
-    """)
-    # Створення таблиці vacations
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS vacations (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        staff_id INTEGER NOT NULL,
-        start_date TEXT NOT NULL,
-        end_date TEXT NOT NULL,
-        total_days INTEGER NOT NULL,
-        FOREIGN KEY (staff_id) REFERENCES staff (id)
-    )
-    """)
-    conn.commit()
-    if close_conn_here:
-        conn.close()
+        with db_connection() as conn:
+            migrations.apply_migrations(conn)
+        return
+    migrations.apply_migrations(conn_param)
+
+_schema_ready = False
 
 def _init_db():
-    """Ініціалізує базу даних, переконуючись, що таблиці існують."""
+    """
+    Ініціалізує базу даних, застосовуючи міграції схеми. Виконується один раз
+    на процес (з initialize_database() в app.py), тому запити читання
+    не виконують DDL і не беруть блокування запису.
+    """
+    global _schema_ready
+    if _schema_ready:
+        return
     _ensure_tables_exist()
+    _schema_ready = True
 
-# Викликаємо ініціалізацію БД при завантаженні модуля
-try:
-    _init_db()
-except Exception as e:
-    logger.error(f"Failed to initialize database: {e}")
+def _load_all_employees():
+    with db_connection() as conn:
+        employees = conn.execute('SELECT id, fio, ipn, role, manager_fio, vacation_days_per_year, remaining_vacation_days FROM staff').fetchall()
+    return [dict(row) for row in employees]
 
 def get_all_employees():
-    """Отримує всіх співробітників з бази даних."""
+    """Отримує всіх співробітників з бази даних (через кеш читань; результат не змінювати)."""
     try:
-        _ensure_tables_exist()
-        conn = get_db_connection()
-        employees = conn.execute('SELECT id, fio, ipn, role, manager_fio, vacation_days_per_year, remaining_vacation_days FROM staff').fetchall()
-        conn.close()
-        return [dict(row) for row in employees]
+        return _cached(('all_employees',), _load_all_employees, ('staff',))
     except Exception as e:
         logger.error(f"Error getting all employees: {e}")
         return []
 
-def get_employee_by_id(employee_id):
-    """Отримує дані співробітника за ID."""
+# Стовпці таблиці співробітників HR: {id: (тип, чи може бути NULL)} - білий
+# список для сортування та фільтрації
+EMPLOYEE_TABLE_COLUMNS = {
+    'fio': ('TEXT', False),
+    'ipn': ('TEXT', False),
+    'role': ('TEXT', False),
+    'manager_fio': ('TEXT', True),
+    'vacation_days_per_year': ('INTEGER', False),
+    'remaining_vacation_days': ('INTEGER', False),
+}
+
+def get_employees_page(filter_query=None, sort_by=None, page_size=10, after=None, offset=0):
+    """
+    Повертає одну сторінку таблиці співробітників, курсор наступної сторінки та
+    кількість рядків, що відповідають фільтру.
+
+    ``filter_query`` та ``sort_by`` - властивості dash_table.DataTable
+    (filter_action/sort_action='custom'); фільтр перекладається в параметризований
+    SQL (data/table_query.py). Порядок - стовпець сортування, далі id, тож
+    ``after`` - курсор [значення стовпця, id] останнього рядка попередньої
+    сторінки; без курсора використовується ``offset``. Результат:
+    (rows, next_cursor, total); next_cursor дорівнює None на останній сторінці
+    та при сортуванні за стовпцем, що може бути NULL (такі сторінки - через ``offset``).
+    Викидає table_query.FilterQueryError для непідтримуваного фільтра.
+    """
+    where, params = table_query.translate_filter(filter_query, EMPLOYEE_TABLE_COLUMNS)
+    sort = (sort_by or [None])[0]
+    column = sort['column_id'] if sort and sort.get('column_id') in EMPLOYEE_TABLE_COLUMNS else None
+    descending = bool(column) and sort.get('direction') == 'desc'
+    direction = 'DESC' if descending else 'ASC'
+    sort_key = column or 'id'
+    # NULL не порівнюється в ключі курсора, а заміна NULL виразом (COALESCE) не дає
+    # сортувати за індексом: стовпці з NULL сортуються як є і гортаються через OFFSET
+    keyset = column is None or not EMPLOYEE_TABLE_COLUMNS[column][1]
+
+    page_size = max(int(page_size), 1)
+    params.update({'limit': page_size + 1, 'offset': 0})
+    after_condition = ''
+    if after and keyset:
+        # Окрема умова на стовпець дає SQLite діапазон для пошуку за індексом
+        bound, compare = ('<=', '<') if descending else ('>=', '>')
+        after_condition = f"AND {sort_key} {bound} :after_key AND ({sort_key}, id) {compare} (:after_key, :after_id)"
+        params.update({'after_key': after[0], 'after_id': after[1]})
+    else:
+        params['offset'] = max(int(offset), 0)
+    query = f"""
+        SELECT id, fio, ipn, role, manager_fio, vacation_days_per_year, remaining_vacation_days,
+               {sort_key} AS sort_key
+        FROM staff
+        WHERE {where} {after_condition}
+        ORDER BY {sort_key} {direction}, id {direction}
+        LIMIT :limit OFFSET :offset
+    """
+    with db_connection() as conn:
+        rows = [dict(row) for row in conn.execute(query, params).fetchall()]
+        total = conn.execute(f"SELECT COUNT(*) FROM staff WHERE {where}", params).fetchone()[0]
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        if keyset:
+            next_cursor = [rows[-1]['sort_key'], rows[-1]['id']]
+    for row in rows:
+        del row['sort_key']
+    return rows, next_cursor, total
+
+# Стовпці компактного знімка staff для списків HR-сторінки (таблиця читається посторінково)
+STAFF_SNAPSHOT_COLUMNS = ['fio', 'role']
+
+def _snapshot_rows(rows):
+    # Ключ - id рядком: так знімок можна частково оновлювати через dash.Patch за id
+    return {str(row['id']): [row[column] for column in STAFF_SNAPSHOT_COLUMNS] for row in rows}
+
+def _load_staff_snapshot():
+    with db_connection() as conn:
+        rows = conn.execute(f"SELECT id, {', '.join(STAFF_SNAPSHOT_COLUMNS)} FROM staff ORDER BY id").fetchall()
+    return {'columns': STAFF_SNAPSHOT_COLUMNS, 'rows': _snapshot_rows(rows)}
+
+def get_staff_snapshot():
+    """
+    Усі співробітники одним запитом у компактному вигляді (назви стовпців один
+    раз і рядки-списки за id) для dcc.Store HR-сторінки (через кеш читань).
+    """
     try:
-        conn = get_db_connection()
+        return _cached(('staff_snapshot',), _load_staff_snapshot, ('staff',))
+    except Exception as e:
+        logger.error(f"Error getting staff snapshot: {e}")
+        return {'columns': STAFF_SNAPSHOT_COLUMNS, 'rows': {}}
+
+def get_employees_by_ids(employee_ids):
+    """
+    Рядки таблиці співробітників (як у get_employees_page) для вказаних id -
+    для часткового оновлення HR-сторінки після запису. Видалених id немає в результаті.
+    """
+    employee_ids = list(employee_ids)
+    if not employee_ids:
+        return []
+    placeholders = ', '.join('?' * len(employee_ids))
+    with db_connection() as conn:
+        rows = conn.execute(f"""
+            SELECT id, fio, ipn, role, manager_fio, vacation_days_per_year, remaining_vacation_days
+            FROM staff WHERE id IN ({placeholders})
+        """, employee_ids).fetchall()
+    return [dict(row) for row in rows]
+
+def get_staff_snapshot_rows(employees):
+    """Рядки знімка staff ({id: [ПІБ, роль]}) для рядків get_employees_by_ids()."""
+    return _snapshot_rows(employees)
+
+def _load_employee_by_id(employee_id):
+    with db_connection() as conn:
         employee = conn.execute('SELECT * FROM staff WHERE id = ?', (employee_id,)).fetchone()
-        conn.close()
-        return dict(employee) if employee else None
+    return dict(employee) if employee else None
+
+def get_employee_by_id(employee_id):
+    """Отримує дані співробітника за ID (через кеш читань; результат не змінювати)."""
+    try:
+        return _cached(('employee_by_id', employee_id), lambda: _load_employee_by_id(employee_id), ('staff',))
     except Exception as e:
         logger.error(f"Error getting employee by ID {employee_id}: {e}")
         return None
 
+# --- Ієрархія підпорядкування: staff.manager_id + таблиця замикання staff_hierarchy ---
+# staff_hierarchy містить пару (предок, нащадок, глибина) для кожного шляху в дереві,
+# включно з рядком (id, id, 0). Підтримується інкрементально всіма функціями запису.
+
+class HierarchyCycleError(ValueError):
+    """Призначення керівника створило б цикл у ієрархії."""
+
+def _resolve_manager_id(conn, manager_fio):
+    """Знаходить id керівника за ПІБ (перевага ролі Manager, далі найменший id)."""
+    if not manager_fio:
+        return None
+    row = conn.execute("""
+        SELECT id FROM staff WHERE fio = ?
+        ORDER BY role = 'Manager' DESC, id
+        LIMIT 1
+    """, (manager_fio,)).fetchone()
+    return row['id'] if row else None
+
+def _insert_hierarchy_node(conn, staff_id, manager_id):
+    """Додає нового співробітника до таблиці замикання під керівника manager_id."""
+    conn.execute("INSERT INTO staff_hierarchy (ancestor_id, descendant_id, depth) VALUES (?, ?, 0)", (staff_id, staff_id))
+    if manager_id is not None:
+        conn.execute("""
+            INSERT INTO staff_hierarchy (ancestor_id, descendant_id, depth)
+            SELECT ancestor_id, ?, depth + 1 FROM staff_hierarchy WHERE descendant_id = ?
+        """, (staff_id, manager_id))
+
+def _move_hierarchy_subtree(conn, staff_id, new_manager_id):
+    """
+    Переносить піддерево співробітника під нового керівника (None - без керівника)
+    та оновлює staff.manager_id. Викидає HierarchyCycleError, якщо новий керівник
+    знаходиться у піддереві співробітника.
+    """
+    if new_manager_id is not None:
+        cycle = conn.execute(
+            "SELECT 1 FROM staff_hierarchy WHERE ancestor_id = ? AND descendant_id = ?",
+            (staff_id, new_manager_id)
+        ).fetchone()
+        if cycle:
+            raise HierarchyCycleError("Керівник не може бути підлеглим цього співробітника.")
+
+    # Видаляємо шляхи від зовнішніх предків до всього піддерева
+    conn.execute("""
+        DELETE FROM staff_hierarchy
+        WHERE descendant_id IN (SELECT descendant_id FROM staff_hierarchy WHERE ancestor_id = :node)
+          AND ancestor_id IN (SELECT ancestor_id FROM staff_hierarchy WHERE descendant_id = :node AND ancestor_id != :node)
+    """, {'node': staff_id})
+    if new_manager_id is not None:
+        conn.execute("""
+            INSERT INTO staff_hierarchy (ancestor_id, descendant_id, depth)
+            SELECT above.ancestor_id, below.descendant_id, above.depth + below.depth + 1
+            FROM staff_hierarchy above
+            JOIN staff_hierarchy below ON below.ancestor_id = :node
+            WHERE above.descendant_id = :manager
+        """, {'node': staff_id, 'manager': new_manager_id})
+    conn.execute("UPDATE staff SET manager_id = ? WHERE id = ?", (new_manager_id, staff_id))
+
+def _remove_hierarchy_node(conn, staff_id):
+    """Видаляє всі шляхи, що проходять через співробітника; його підлеглі стають коренями."""
+    conn.execute("""
+        DELETE FROM staff_hierarchy
+        WHERE ancestor_id IN (SELECT ancestor_id FROM staff_hierarchy WHERE descendant_id = :node)
+          AND descendant_id IN (SELECT descendant_id FROM staff_hierarchy WHERE ancestor_id = :node)
+    """, {'node': staff_id})
+
+def data_changes(staff_inserted=(), staff_updated=(), staff_deleted=(),
+                 vacations_inserted=(), vacations_updated=(), vacations_deleted=()):
+    """
+    Опис змін операції запису: {'staff'|'vacations': {'inserted'|'updated'|'deleted': [id, ...]}}.
+    HR-сторінка за ним частково оновлює знімок і видимі рядки таблиць (dash.Patch).
+    """
+    return {
+        'staff': {'inserted': list(staff_inserted), 'updated': list(staff_updated), 'deleted': list(staff_deleted)},
+        'vacations': {'inserted': list(vacations_inserted), 'updated': list(vacations_updated),
+                      'deleted': list(vacations_deleted)},
+    }
+
 def add_employee(fio, ipn, manager_fio, role, vacation_days_per_year, remaining_vacation_days=None):
     """Додає нового співробітника в базу даних."""
     # Базова валідація
@@ -114,173 +321,396 @@ def add_employee(fio, ipn, manager_fio, role, vacation_days_per_year, remaining_
     if remaining_vacation_days is None:
         remaining_vacation_days = vacation_days_per_year
     
+    with db_connection() as conn:
+        try:
+            cursor = conn.cursor()
+            manager_id = _resolve_manager_id(conn, manager_fio)
+            cursor.execute("""
+                INSERT INTO staff (fio, ipn, manager_fio, manager_id, role, vacation_days_per_year, remaining_vacation_days)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (fio, ipn, manager_fio, manager_id, role, vacation_days_per_year, remaining_vacation_days))
+            employee_id = cursor.lastrowid
+            _insert_hierarchy_node(conn, employee_id, manager_id)
+            vacation_summary.refresh(conn, [employee_id])
+            conn.commit()
+            _invalidate_cache(('staff',))
+            logger.info(f"Employee added successfully: ID {employee_id}")
+            return employee_id
+        except sqlite3.IntegrityError as e:
+            conn.rollback()
+            logger.error(f"Employee creation failed - integrity error: {e}")
+            return None
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Employee creation failed - database error: {e}")
+            return None
+
+def _load_employee_by_ipn(ipn):
+    with db_connection() as conn:
+        employee = conn.execute('SELECT id, ipn, role, fio, remaining_vacation_days FROM staff WHERE ipn = ?', (ipn,)).fetchone()
+    return dict(employee) if employee else None
+
+def get_employee_by_ipn(ipn):
+    """Отримує дані співробітника за ІПН, включаючи ПІБ та роль (через кеш читань)."""
     try:
-        conn = get_db_connection()
-        _ensure_tables_exist(conn)
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO staff (fio, ipn, manager_fio, role, vacation_days_per_year, remaining_vacation_days)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (fio, ipn, manager_fio, role, vacation_days_per_year, remaining_vacation_days))
-        conn.commit()
-        employee_id = cursor.lastrowid
-        logger.info(f"Employee added successfully: ID {employee_id}")
-        return employee_id
-    except sqlite3.IntegrityError as e:
-        conn.rollback()
-        logger.error(f"Employee creation failed - integrity error: {e}")
+        return _cached(('employee_by_ipn', ipn), lambda: _load_employee_by_ipn(ipn), ('staff',))
+    except Exception as e:
+        logger.error(f"Error getting employee by IPN: {e}")
         return None
-    except sqlite3.Error as e:
-        conn.rollback()
-        logger.error(f"Employee creation failed - database error: {e}")
+
+def _load_session_identity(staff_id):
+    with db_connection() as conn:
+        row = conn.execute(
+            'SELECT id, ipn, fio, role, identity_version FROM staff WHERE id = ?', (staff_id,)
+        ).fetchone()
+    if not row:
         return None
-    finally:
-        conn.close()
+    return {
+        'staff_id': row['id'],
+        'ipn': row['ipn'],
+        'fio': row['fio'],
+        'role': row['role'],
+        # Корінь піддерева staff_hierarchy, доступного керівнику
+        'manager_scope': row['id'] if row['role'] == 'Manager' else None,
+        'data_version': row['identity_version'],
+    }
 
-def get_employee_by_ipn(ipn):
-    """Отримує дані співробітника за ІПН, включаючи ПІБ та роль."""
+def get_session_identity(staff_id):
+    """
+    Компактний запис ідентичності користувача для сесії: staff_id, ІПН, ПІБ,
+    роль, область керівника та data_version (staff.identity_version, яку
+    збільшує тригер при зміні ПІБ, ІПН чи ролі). Через кеш читань; None, якщо
+    співробітника видалено.
+    """
     try:
-        conn = get_db_connection()
-        employee = conn.execute('SELECT id, ipn, role, fio, remaining_vacation_days FROM staff WHERE ipn = ?', (ipn,)).fetchone()
-        conn.close()
-        return dict(employee) if employee else None
+        return _cached(('session_identity', staff_id), lambda: _load_session_identity(staff_id), ('staff',))
     except Exception as e:
-        logger.error(f"Error getting employee by IPN: {e}")
+        logger.error(f"Error getting session identity for staff ID {staff_id}: {e}")
         return None
 
+def _load_managers():
+    with db_connection() as conn:
+        managers_cursor = conn.execute("SELECT fio FROM staff WHERE role = 'Manager' ORDER BY fio").fetchall()
+    return [{'label': row['fio'], 'value': row['fio']} for row in managers_cursor]
+
 def get_managers():
-    """Отримує список співробітників з роллю 'Manager'."""
+    """Отримує список співробітників з роллю 'Manager' (через кеш читань)."""
     try:
-        conn = get_db_connection()
-        managers_cursor = conn.execute("SELECT fio FROM staff WHERE role = 'Manager' ORDER BY fio").fetchall()
-        conn.close()
-        return [{'label': row['fio'], 'value': row['fio']} for row in managers_cursor]
+        return _cached(('managers',), _load_managers, ('staff',))
     except Exception as e:
         logger.error(f"Error getting managers: {e}")
         return []
 
 def add_vacation(employee_id, start_date, end_date, total_days):
-    """Додає відпустку для співробітника та оновлює залишок днів."""
+    """Додає відпустку для співробітника та оновлює залишок днів. Повертає id відпустки або False."""
     # Базова валідація
     if total_days <= 0:
         logger.warning(f"Invalid vacation days count: {total_days}")
         return False
     
-    try:
-        conn = get_db_connection()
-        _ensure_tables_exist(conn)
-        cursor = conn.cursor()
-        # Перевірка чи достатньо днів відпустки
-        employee = conn.execute('SELECT remaining_vacation_days FROM staff WHERE id = ?', (employee_id,)).fetchone()
-        if not employee or employee['remaining_vacation_days'] < total_days:
-            logger.warning(f"Insufficient vacation days for employee ID {employee_id}")
+    with db_connection() as conn:
+        try:
+            cursor = conn.cursor()
+            # Перевірки та запис під одним блокуванням запису: паралельні воркери
+            # не можуть обидва пройти перевірку перетину й залишку
+            conn.execute("BEGIN IMMEDIATE")
+            # Перевірка чи достатньо днів відпустки
+            employee = conn.execute('SELECT remaining_vacation_days FROM staff WHERE id = ?', (employee_id,)).fetchone()
+            if not employee or employee['remaining_vacation_days'] < total_days:
+                conn.rollback()
+                logger.warning(f"Insufficient vacation days for employee ID {employee_id}")
+                return False
+            overlap = vacation_overlaps.find_overlap(conn, employee_id, start_date, end_date)
+            if overlap:
+                conn.rollback()
+                logger.warning(f"Vacation for employee ID {employee_id} overlaps vacation ID {overlap['id']}")
+                return False
+
+            cursor.execute("""
+                INSERT INTO vacations (staff_id, start_date, end_date, total_days)
+                VALUES (?, ?, ?, ?)
+            """, (employee_id, start_date, end_date, total_days))
+            vacation_id = cursor.lastrowid
+            
+            # Оновлення залишку днів відпустки
+            new_remaining_days = employee['remaining_vacation_days'] - total_days
+            cursor.execute("""
+                UPDATE staff
+                SET remaining_vacation_days = ?
+                WHERE id = ?
+            """, (new_remaining_days, employee_id))
+            vacation_summary.refresh(conn, [employee_id])
+            
+            conn.commit()
+            _invalidate_cache(('staff', 'vacations'))
+            logger.info(f"Vacation added successfully for employee ID {employee_id}")
+            return vacation_id
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Vacation creation failed: {e}")
             return False
 
-        cursor.execute("""
-            INSERT INTO vacations (staff_id, start_date, end_date, total_days)
-            VALUES (?, ?, ?, ?)
-        """, (employee_id, start_date, end_date, total_days))
-        
-        # Оновлення залишку днів відпустки
-        new_remaining_days = employee['remaining_vacation_days'] - total_days
-        cursor.execute("""
-            UPDATE staff
-            SET remaining_vacation_days = ?
-            WHERE id = ?
-        """, (new_remaining_days, employee_id))
-        
-        conn.commit()
-        logger.info(f"Vacation added successfully for employee ID {employee_id}")
-        return True
-    except sqlite3.Error as e:
-        conn.rollback()
-        logger.error(f"Vacation creation failed: {e}")
-        return False
-    finally:
-        conn.close()
+def _overlap_message(overlap):
+    return f"Період перетинається з відпусткою {overlap['start_date']} - {overlap['end_date']}."
+
+def find_overlapping_vacation(employee_id, start_date, end_date, exclude_vacation_id=None):
+    """
+    Відпустка співробітника, що перетинається з періодом (дати включно), як
+    {'id', 'start_date', 'end_date', 'message'} або None (див. data/vacation_overlaps.py).
+    """
+    with db_connection() as conn:
+        overlap = vacation_overlaps.find_overlap(conn, employee_id, start_date, end_date, exclude_vacation_id)
+    return dict(overlap, message=_overlap_message(overlap)) if overlap else None
+
+def validate_vacation_batch(vacations):
+    """
+    Перевіряє пакет нових відпусток [(staff_id, start_date, end_date), ...] (наприклад,
+    імпорт) одним проходом на перетини з наявними відпустками та між собою.
+    Повертає список конфліктів (порожній - пакет можна записувати).
+    """
+    with db_connection() as conn:
+        return vacation_overlaps.find_overlaps(conn, vacations)
+
+def delete_vacation(vacation_id):
+    """Видаляє відпустку та повертає її дні до залишку співробітника."""
+    with db_connection() as conn:
+        try:
+            vacation = conn.execute('SELECT staff_id, total_days FROM vacations WHERE id = ?', (vacation_id,)).fetchone()
+            if not vacation:
+                logger.warning(f"Vacation not found for deletion: ID {vacation_id}")
+                return False
+
+            conn.execute('DELETE FROM vacations WHERE id = ?', (vacation_id,))
+            conn.execute("""
+                UPDATE staff
+                SET remaining_vacation_days = remaining_vacation_days + ?
+                WHERE id = ?
+            """, (vacation['total_days'], vacation['staff_id']))
+            vacation_summary.refresh(conn, [vacation['staff_id']])
+
+            conn.commit()
+            _invalidate_cache(('staff', 'vacations'))
+            logger.info(f"Vacation deleted successfully: ID {vacation_id}")
+            return True
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Vacation deletion failed: {e}")
+            return False
+
+def _year_bounds(year):
+    """Повертає (перший день року, перший день наступного року) у форматі ISO."""
+    year = int(year)
+    return f"{year:04d}-01-01", f"{year + 1:04d}-01-01"
 
 def get_vacation_history(year):
-    """Отримує історію відпусток за вказаний рік."""
+    """Отримує історію відпусток за вказаний рік (відпустки, що перетинають рік)."""
+    year_start, next_year = _year_bounds(year)
     try:
-        conn = get_db_connection()
-        _ensure_tables_exist(conn)
-        query = """
-            SELECT s.fio, s.manager_fio, v.start_date, v.end_date, v.total_days
-            FROM vacations v
-            JOIN staff s ON v.staff_id = s.id
-            WHERE strftime('%Y', v.start_date) = ? OR strftime('%Y', v.end_date) = ?
-            ORDER BY v.start_date DESC
-        """
-        history = conn.execute(query, (str(year), str(year))).fetchall()
-        conn.close()
+        with db_connection() as conn:
+            query = f"""
+                SELECT s.fio, s.manager_fio, v.start_date, v.end_date, v.total_days
+                FROM {vacation_archive.source_for(conn, year_start)} v
+                JOIN staff s ON v.staff_id = s.id
+                WHERE v.start_date < ? AND v.end_date >= ?
+                ORDER BY v.start_date DESC
+            """
+            history = conn.execute(query, (next_year, year_start)).fetchall()
         return [dict(row) for row in history]
     except Exception as e:
         logger.error(f"Error getting vacation history: {e}")
         return []
 
+def get_vacation_history_page(year, page_size=10, after=None, offset=0):
+    """
+    Повертає одну сторінку історії відпусток за рік та курсор наступної сторінки.
 
-def get_employee_vacation_summary_by_ipn(ipn):
-    """Отримує зведені дані про відпустку для співробітника за ІПН."""
-    conn = get_db_connection()
-    _ensure_tables_exist(conn)
+    Сортування: start_date DESC, end_date DESC, id DESC (збігається з індексом
+    idx_vacations_start_end). ``after`` - курсор [start_date, end_date, id]
+    останнього рядка попередньої сторінки; без курсора використовується ``offset``.
+    Результат: (rows, next_cursor), next_cursor дорівнює None на останній сторінці.
+    """
+    year_start, next_year = _year_bounds(year)
+    params = {'year_start': year_start, 'next_year': next_year, 'limit': page_size + 1, 'offset': 0}
+    if after:
+        # Курсор завжди менший за next_year, тому він і є верхньою межею діапазону індексу
+        range_filter = """v.start_date <= :after_start
+              AND (v.start_date, v.end_date, v.id) < (:after_start, :after_end, :after_id)"""
+        params.update({'after_start': after[0], 'after_end': after[1], 'after_id': after[2]})
+    else:
+        range_filter = "v.start_date < :next_year"
+        params['offset'] = max(int(offset), 0)
     query = """
+        SELECT v.id, v.staff_id, s.fio, s.manager_fio, v.start_date, v.end_date, v.total_days
+        FROM {source} v
+        JOIN staff s ON v.staff_id = s.id
+        WHERE {range_filter} AND v.end_date >= :year_start
+        ORDER BY v.start_date DESC, v.end_date DESC, v.id DESC
+        LIMIT :limit OFFSET :offset
+    """
+    try:
+        with db_connection() as conn:
+            # Роки до межі архіву читаються з vacations_all (див. data/vacation_archive.py)
+            source = vacation_archive.source_for(conn, year_start)
+            rows = [dict(row) for row in conn.execute(
+                query.format(source=source, range_filter=range_filter), params
+            ).fetchall()]
+    except Exception as e:
+        logger.error(f"Error getting vacation history page: {e}")
+        return [], None
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = [last['start_date'], last['end_date'], last['id']]
+    return _with_working_days(rows), next_cursor
+
+def _with_working_days(rows):
+    """Додає до рядків відпусток кількість робочих днів (один пакетний розрахунок на сторінку)."""
+    if not rows:
+        return rows
+    try:
+        days = date_utils.working_days_batch([row['start_date'] for row in rows], [row['end_date'] for row in rows])
+    except ValueError as e:
+        logger.warning(f"Cannot count working days for vacation rows: {e}")
+        days = [None] * len(rows)
+    for row, count in zip(rows, days):
+        row['working_days'] = None if count is None else int(count)
+    return rows
+
+def get_vacation_history_rows(vacation_ids):
+    """Рядки історії відпусток (як у get_vacation_history_page) для вказаних id відпусток."""
+    vacation_ids = list(vacation_ids)
+    if not vacation_ids:
+        return []
+    placeholders = ', '.join('?' * len(vacation_ids))
+    with db_connection() as conn:
+        rows = conn.execute(f"""
+            SELECT v.id, v.staff_id, s.fio, s.manager_fio, v.start_date, v.end_date, v.total_days
+            FROM {vacation_archive.ALL_VIEW} v
+            JOIN staff s ON v.staff_id = s.id
+            WHERE v.id IN ({placeholders})
+        """, vacation_ids).fetchall()
+    return _with_working_days([dict(row) for row in rows])
+
+def count_vacation_history(year):
+    """Кількість відпусток, що перетинають вказаний рік."""
+    year_start, next_year = _year_bounds(year)
+    try:
+        with db_connection() as conn:
+            row = conn.execute(
+                f"SELECT COUNT(*) FROM {vacation_archive.source_for(conn, year_start)} WHERE start_date < ? AND end_date >= ?",
+                (next_year, year_start)
+            ).fetchone()
+        return row[0]
+    except Exception as e:
+        logger.error(f"Error counting vacation history: {e}")
+        return 0
+
+
+# --- Матеріалізоване зведення відпусток (таблиця vacation_summary, див. data/vacation_summary.py) ---
+
+_summary_checked_for = None
+_summary_recheck_at = 0.0
+
+# Поки нічна задача не оновила зведення, читання повторно перевіряють їх
+# не частіше ніж раз на стільки секунд
+_SUMMARY_RECHECK_SECONDS = 60
+
+def roll_forward_vacation_summaries(today=None):
+    """Оновлює зведення, термін дії яких минув (нічна задача, scripts/roll_forward_vacations.py). Повертає кількість оновлених."""
+    with db_connection() as conn:
+        refreshed = vacation_summary.roll_forward(conn, today)
+        conn.commit()
+    logger.info(f"Vacation summaries rolled forward: {refreshed}")
+    return refreshed
+
+def _ensure_summaries_current():
+    """
+    Перевіряє (лише читанням, за індексом valid_until), чи оновила нічна задача
+    зведення на сьогодні. Шлях читання нічого не записує: якщо задача ще не
+    виконувалась, читання бачать зведення за попередній день, а в журнал
+    пишеться попередження.
+    """
+    global _summary_checked_for, _summary_recheck_at
+    today = date.today()
+    if _summary_checked_for == today or time.monotonic() < _summary_recheck_at:
+        return
+    try:
+        with db_connection() as conn:
+            expired = vacation_summary.has_expired(conn, today)
+    except sqlite3.Error as e:
+        logger.error(f"Vacation summary check failed: {e}")
+        return
+    if expired:
+        _summary_recheck_at = time.monotonic() + _SUMMARY_RECHECK_SECONDS
+        logger.warning("Vacation summaries are stale: scripts/roll_forward_vacations.py has not run today")
+        return
+    _summary_checked_for = today
+
+def _get_employee_vacation_summary(column, value):
+    _ensure_summaries_current()
+    query = f"""
     SELECT 
         s.id, s.fio, s.ipn, s.role, s.manager_fio, s.remaining_vacation_days,
         v.start_date AS current_vacation_start_date,
         v.end_date AS current_vacation_end_date,
         v.total_days AS current_vacation_total_days
     FROM staff s
-    LEFT JOIN (
-        SELECT staff_id, start_date, end_date, total_days,
-               ROW_NUMBER() OVER (PARTITION BY staff_id ORDER BY end_date DESC) as rn
-        FROM vacations
-        WHERE date(end_date) >= date('now', '-90 days') -- Consider recent/future vacations (adjust window as needed)
-    ) v ON s.id = v.staff_id AND v.rn = 1
-    WHERE s.ipn = ?;
-    """
-    employee_data = conn.execute(query, (ipn,)).fetchone()
-    conn.close()
+    LEFT JOIN vacation_summary vs ON vs.staff_id = s.id
+    LEFT JOIN vacations v
+        ON v.id = COALESCE(vs.current_vacation_id, vs.next_vacation_id, vs.last_vacation_id)
+        AND v.end_date >= ?
+    WHERE s.{column} = ?;
+    """
+    recent_cutoff = (date.today() - timedelta(days=90)).isoformat()
+    with db_connection() as conn:
+        employee_data = conn.execute(query, (recent_cutoff, value)).fetchone()
     return dict(employee_data) if employee_data else None
 
+def get_employee_vacation_summary_by_ipn(ipn):
+    """
+    Отримує зведені дані про відпустку для співробітника за ІПН:
+    поточна, інакше наступна, інакше остання (якщо завершилась за останні 90 днів).
+    """
+    return _get_employee_vacation_summary('ipn', ipn)
+
+def get_employee_vacation_summary_by_id(employee_id):
+    """Те саме, що get_employee_vacation_summary_by_ipn, за первинним ключем (staff_id із сесії)."""
+    return _get_employee_vacation_summary('id', employee_id)
+
 def get_employee_details_for_edit(employee_id: int):
     """
     Fetches comprehensive data for a given employee_id for editing purposes.
     Includes employee details and their "most relevant" vacation.
     "Most relevant" is defined as:
-    1. The next upcoming vacation (start_date >= today).
-    2. If no upcoming, then the most recent past vacation (end_date < today).
+    1. The vacation in progress today.
+    2. Otherwise the next upcoming vacation.
+    3. If no upcoming, then the most recent past vacation.
     """
-    _ensure_tables_exist()
-    conn = get_db_connection()
-    employee_data = conn.execute('SELECT id, fio, ipn, role, manager_fio, vacation_days_per_year, remaining_vacation_days FROM staff WHERE id = ?', (employee_id,)).fetchone()
-    
+    _ensure_summaries_current()
+    query = """
+        SELECT s.id, s.fio, s.ipn, s.role, s.manager_fio, s.vacation_days_per_year, s.remaining_vacation_days,
+               v.id AS vacation_id, v.start_date, v.end_date, v.total_days
+        FROM staff s
+        LEFT JOIN vacation_summary vs ON vs.staff_id = s.id
+        LEFT JOIN vacations v ON v.id = COALESCE(vs.current_vacation_id, vs.next_vacation_id, vs.last_vacation_id)
+        WHERE s.id = ?
+    """
+    with db_connection() as conn:
+        employee_data = conn.execute(query, (employee_id,)).fetchone()
     if not employee_data:
-        conn.close()
         return None
 
-    result = dict(employee_data)
-    today_iso = date.today().isoformat()
-
-    # Try to find next upcoming vacation
-    relevant_vacation = conn.execute("""
-        SELECT id, start_date, end_date, total_days FROM vacations
-        WHERE staff_id = ? AND date(start_date) >= date(?)
-        ORDER BY date(start_date) ASC
-        LIMIT 1
-    """, (employee_id, today_iso)).fetchone()
-
-    if not relevant_vacation:
-        # If no upcoming, find most recent past vacation
-        relevant_vacation = conn.execute("""
-            SELECT id, start_date, end_date, total_days FROM vacations
-            WHERE staff_id = ? AND date(end_date) < date(?)
-            ORDER BY date(end_date) DESC
-            LIMIT 1
-        """, (employee_id, today_iso)).fetchone()
-
-    conn.close()
-
-    result['target_vacation'] = dict(relevant_vacation) if relevant_vacation else None
+    result = {key: employee_data[key] for key in
+              ('id', 'fio', 'ipn', 'role', 'manager_fio', 'vacation_days_per_year', 'remaining_vacation_days')}
+    result['target_vacation'] = None
+    if employee_data['vacation_id'] is not None:
+        result['target_vacation'] = {
+            'id': employee_data['vacation_id'],
+            'start_date': employee_data['start_date'],
+            'end_date': employee_data['end_date'],
+            'total_days': employee_data['total_days'],
+        }
     return result
 
 def update_employee_data_and_vacation(employee_id: int, updates: dict):
@@ -288,266 +718,411 @@ def update_employee_data_and_vacation(employee_id: int, updates: dict):
     Atomically updates employee information in the staff table and, if applicable,
     their "most relevant" vacation in the vacations table.
     Correctly recalculates staff.remaining_vacation_days.
-    Returns a tuple (bool_success, message_string).
+    Returns a tuple (bool_success, message_string, changes); changes is a
+    data_changes() record of the touched rows (None on failure).
     """
-    _ensure_tables_exist()
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    with db_connection() as conn:
+        cursor = conn.cursor()
 
-    try:
-        # Get current staff data for calculations
-        old_staff_data = cursor.execute('SELECT vacation_days_per_year, remaining_vacation_days FROM staff WHERE id = ?', (employee_id,)).fetchone()
-        if not old_staff_data:
-            conn.close()
-            return False, "Сотрудник не найден."
-
-        old_vacation_days_per_year = old_staff_data['vacation_days_per_year']
-        old_remaining_vacation_days = old_staff_data['remaining_vacation_days']
-        current_total_taken_or_booked_days = old_vacation_days_per_year - old_remaining_vacation_days
-
-        target_vacation_id = updates.get('target_vacation_id')
-        new_vacation_start_date = updates.get('vacation_start_date')
-        new_vacation_end_date = updates.get('vacation_end_date')
-
-        if target_vacation_id and new_vacation_start_date and new_vacation_end_date:
-            old_vacation = cursor.execute('SELECT total_days FROM vacations WHERE id = ? AND staff_id = ?', (target_vacation_id, employee_id)).fetchone()
-            if old_vacation:
-                old_total_days_for_target_vacation = old_vacation['total_days']
-                new_total_days_for_target_vacation = date_utils.calculate_days(new_vacation_start_date, new_vacation_end_date)
-                
-                if new_total_days_for_target_vacation <= 0:
-                    conn.rollback()
-                    conn.close()
-                    return False, "Некорректний період відпустки."
-
-                cursor.execute('UPDATE vacations SET start_date = ?, end_date = ?, total_days = ? WHERE id = ?',
-                               (new_vacation_start_date, new_vacation_end_date, new_total_days_for_target_vacation, target_vacation_id))
-                current_total_taken_or_booked_days = current_total_taken_or_booked_days - old_total_days_for_target_vacation + new_total_days_for_target_vacation
-
-        # Update staff table
-        cursor.execute("""
-            UPDATE staff SET fio = ?, ipn = ?, role = ?, manager_fio = ?, vacation_days_per_year = ?
-            WHERE id = ?
-        """, (updates['fio'], updates['ipn'], updates['role'], updates.get('manager_fio'), updates['vacation_days_per_year'], employee_id))
-
-        new_annual_days = updates['vacation_days_per_year']
-        final_remaining_vacation_days = new_annual_days - current_total_taken_or_booked_days
-        cursor.execute('UPDATE staff SET remaining_vacation_days = ? WHERE id = ?', (final_remaining_vacation_days, employee_id))
+        try:
+            # Перевірка перетину та перерахунок залишку - під блокуванням запису (як в add_vacation)
+            conn.execute("BEGIN IMMEDIATE")
+            # Get current staff data for calculations
+            old_staff_data = cursor.execute('SELECT fio, manager_id, vacation_days_per_year, remaining_vacation_days FROM staff WHERE id = ?', (employee_id,)).fetchone()
+            if not old_staff_data:
+                conn.rollback()
+                return False, "Сотрудник не найден.", None
 
-        conn.commit()
-        return True, "Дані співробітника успішно оновлені."
-    except sqlite3.IntegrityError: # Handles unique constraint violation for IPN
-        conn.rollback()
-        return False, "Помилка: ІПН вже існує для іншого співробітника."
-    except Exception as e:
-        conn.rollback()
-        print(f"Помилка оновлення даних співробітника: {e}")
-        return False, f"Произошла ошибка: {e}"
-    finally:
-        conn.close()
+            old_vacation_days_per_year = old_staff_data['vacation_days_per_year']
+            old_remaining_vacation_days = old_staff_data['remaining_vacation_days']
+            current_total_taken_or_booked_days = old_vacation_days_per_year - old_remaining_vacation_days
+
+            updated_staff = [employee_id]
+            updated_vacations = []
+            target_vacation_id = updates.get('target_vacation_id')
+            new_vacation_start_date = updates.get('vacation_start_date')
+            new_vacation_end_date = updates.get('vacation_end_date')
+
+            if target_vacation_id and new_vacation_start_date and new_vacation_end_date:
+                old_vacation = cursor.execute('SELECT total_days FROM vacations WHERE id = ? AND staff_id = ?', (target_vacation_id, employee_id)).fetchone()
+                if old_vacation:
+                    old_total_days_for_target_vacation = old_vacation['total_days']
+                    new_total_days_for_target_vacation = date_utils.calculate_days(new_vacation_start_date, new_vacation_end_date)
+                    
+                    if new_total_days_for_target_vacation <= 0:
+                        conn.rollback()
+                        return False, "Некорректний період відпустки.", None
+                    overlap = vacation_overlaps.find_overlap(conn, employee_id, new_vacation_start_date,
+                                                             new_vacation_end_date, exclude_id=target_vacation_id)
+                    if overlap:
+                        conn.rollback()
+                        return False, _overlap_message(overlap), None
+
+                    cursor.execute('UPDATE vacations SET start_date = ?, end_date = ?, total_days = ? WHERE id = ?',
+                                   (new_vacation_start_date, new_vacation_end_date, new_total_days_for_target_vacation, target_vacation_id))
+                    current_total_taken_or_booked_days = current_total_taken_or_booked_days - old_total_days_for_target_vacation + new_total_days_for_target_vacation
+                    updated_vacations.append(target_vacation_id)
+                    vacation_summary.refresh(conn, [employee_id])
+
+            # Update staff table
+            cursor.execute("""
+                UPDATE staff SET fio = ?, ipn = ?, role = ?, manager_fio = ?, vacation_days_per_year = ?
+                WHERE id = ?
+            """, (updates['fio'], updates['ipn'], updates['role'], updates.get('manager_fio'), updates['vacation_days_per_year'], employee_id))
 
-def get_subordinates_vacation_details(manager_fio):
+            # Keep the ID-based hierarchy and subordinates' manager_fio in sync
+            new_manager_id = _resolve_manager_id(conn, updates.get('manager_fio'))
+            if new_manager_id == employee_id:
+                raise HierarchyCycleError("Співробітник не може бути власним керівником.")
+            if new_manager_id != old_staff_data['manager_id']:
+                _move_hierarchy_subtree(conn, employee_id, new_manager_id)
+            if updates['fio'] != old_staff_data['fio']:
+                subordinates = cursor.execute('SELECT id FROM staff WHERE manager_id = ?', (employee_id,)).fetchall()
+                updated_staff.extend(row['id'] for row in subordinates)
+                cursor.execute('UPDATE staff SET manager_fio = ? WHERE manager_id = ?', (updates['fio'], employee_id))
+
+            new_annual_days = updates['vacation_days_per_year']
+            final_remaining_vacation_days = new_annual_days - current_total_taken_or_booked_days
+            cursor.execute('UPDATE staff SET remaining_vacation_days = ? WHERE id = ?', (final_remaining_vacation_days, employee_id))
+
+            conn.commit()
+            _invalidate_cache(('staff', 'vacations'))
+            changes = data_changes(staff_updated=updated_staff, vacations_updated=updated_vacations)
+            return True, "Дані співробітника успішно оновлені.", changes
+        except sqlite3.IntegrityError: # Handles unique constraint violation for IPN
+            conn.rollback()
+            return False, "Помилка: ІПН вже існує для іншого співробітника.", None
+        except HierarchyCycleError as e:
+            conn.rollback()
+            return False, f"Помилка: {e}", None
+        except Exception as e:
+            conn.rollback()
+            print(f"Помилка оновлення даних співробітника: {e}")
+            return False, f"Произошла ошибка: {e}", None
+
+def get_subordinates_vacation_details(manager_fio=None, manager_id=None):
     """
     Получает детали отпусков для ВСЕХ подчиненных в иерархии (прямых и косвенных)
-    с использованием рекурсивного запроса.
+    одним индексированным соединением с таблицей замыкания staff_hierarchy.
+    Руководитель задаётся через manager_id или, если он не указан, через ПІБ.
     """
-    conn = get_db_connection()
+    _ensure_summaries_current()
     query = """
-        WITH RECURSIVE SubordinateHierarchy AS (
-            -- Базовий випадок: прямі підлеглі топ-менеджера
-            SELECT id, fio, ipn, role, manager_fio, remaining_vacation_days, vacation_days_per_year
-            FROM staff
-            WHERE manager_fio = :manager_name
-
-            UNION ALL
-
-            -- Рекурсивний крок: співробітники, які підпорядковуються підлеглим, знайденим на попередньому кроці
-            SELECT s.id, s.fio, s.ipn, s.role, s.manager_fio, s.remaining_vacation_days, s.vacation_days_per_year
-            FROM staff s
-            INNER JOIN SubordinateHierarchy sh ON s.manager_fio = sh.fio
-        ),
-        LatestVacations AS (
-            -- Знаходимо найближчу до сьогоднішнього дня відпустку (минулу чи майбутню) для кожного співробітника
-            SELECT
-                v.staff_id,
-                v.start_date,
-                v.end_date,
-                v.total_days,
-                ROW_NUMBER() OVER(PARTITION BY v.staff_id ORDER BY ABS(julianday(v.start_date) - julianday('now'))) as rn
-            FROM vacations v
-            INNER JOIN SubordinateHierarchy sh ON v.staff_id = sh.id
-        )
-        -- Тепер обираємо з ієрархії та приєднуємо дані про найближчу відпустку
         SELECT
-            h.fio AS sub_fio,
-            h.ipn AS sub_ipn,
-            h.role AS sub_role,
-            lv.start_date as vac_start_date,
-            lv.end_date as vac_end_date,
-            lv.total_days as vac_total_days,
-            h.remaining_vacation_days AS sub_remaining_days
-        FROM SubordinateHierarchy h
-        LEFT JOIN LatestVacations lv ON h.id = lv.staff_id AND lv.rn = 1
-        ORDER BY h.fio;
+            s.fio AS sub_fio,
+            s.ipn AS sub_ipn,
+            s.role AS sub_role,
+            v.start_date as vac_start_date,
+            v.end_date as vac_end_date,
+            v.total_days as vac_total_days,
+            s.remaining_vacation_days AS sub_remaining_days
+        FROM staff_hierarchy h
+        JOIN staff s ON s.id = h.descendant_id
+        -- Найближча до сьогоднішнього дня відпустка (минула чи майбутня), див. vacation_summary
+        LEFT JOIN vacation_summary vs ON vs.staff_id = s.id
+        LEFT JOIN vacations v ON v.id = vs.closest_vacation_id
+        WHERE h.ancestor_id = :manager_id AND h.depth > 0
+        ORDER BY s.fio;
     """
     try:
-        subordinates = conn.execute(query, {'manager_name': manager_fio}).fetchall()
-        conn.close()
+        with db_connection() as conn:
+            if manager_id is None:
+                manager_id = _resolve_manager_id(conn, manager_fio)
+                if manager_id is None:
+                    return []
+            subordinates = conn.execute(query, {'manager_id': manager_id}).fetchall()
         return [dict(row) for row in subordinates]
     except Exception as e:
-        print(f"Recursive query failed: {e}")
-        conn.close()
+        logger.error(f"Subordinates query failed: {e}")
         return []
 
-def delete_employee(employee_id: int) -> tuple[bool, str]:
-    """Deletes an employee, their vacations, and nullifies manager references."""
+def _load_team_occupancy(manager_id, start_date, end_date):
+    with db_connection() as conn:
+        team_size = conn.execute(
+            "SELECT COUNT(*) FROM staff_hierarchy WHERE ancestor_id = ? AND depth > 0", (manager_id,)
+        ).fetchone()[0]
+        # Те саме піддерево, що й у get_subordinates_vacation_details, але всі відпустки діапазону
+        rows = conn.execute(f"""
+            SELECT v.staff_id, v.start_date, v.end_date
+            FROM staff_hierarchy h
+            JOIN {vacation_archive.source_for(conn, start_date.isoformat())} v ON v.staff_id = h.descendant_id
+            WHERE h.ancestor_id = :manager_id AND h.depth > 0
+              AND v.start_date <= :end AND v.end_date >= :start
+        """, {'manager_id': manager_id, 'start': start_date.isoformat(), 'end': end_date.isoformat()}).fetchall()
+    return occupancy.compute(rows, start_date, end_date, team_size)
+
+def get_team_occupancy(manager_id, start_date, end_date):
+    """
+    Кількість відсутніх підлеглих (усе піддерево) за днями та тижнями діапазону
+    дат (див. data/occupancy.py). Кешується за керівником і діапазоном до
+    наступної зміни staff або vacations. Викидає ValueError для завеликого діапазону.
+    """
+    return _cached(('team_occupancy', manager_id, start_date, end_date),
+                   lambda: _load_team_occupancy(manager_id, start_date, end_date), ('staff', 'vacations'))
+
+def delete_employee(employee_id: int) -> tuple[bool, str, dict | None]:
+    """
+    Deletes an employee, their vacations, and nullifies manager references.
+    Returns (success, message, changes); changes is a data_changes() record or None.
+    """
     if not isinstance(employee_id, int) or employee_id <= 0:
         logger.warning(f"Invalid employee ID for deletion: {employee_id}")
-        return False, "Некоректний ID співробітника"
+        return False, "Некоректний ID співробітника", None
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    try:
-        # Get F.I.O. of the employee being deleted to update manager_fio for their subordinates
-        employee_to_delete = cursor.execute('SELECT fio FROM staff WHERE id = ?', (employee_id,)).fetchone()
-        if not employee_to_delete:
-            conn.close()
-            return False, "Сотрудник не найден."
-        
-        deleted_employee_fio = employee_to_delete['fio']
-
-        # Start transaction
-        cursor.execute("BEGIN TRANSACTION")
-
-        # Nullify manager_fio for subordinates of the deleted employee
-        # This is important if the deleted employee was a manager
-        cursor.execute("UPDATE staff SET manager_fio = NULL WHERE manager_fio = ?", (deleted_employee_fio,))
-
-        # Delete associated vacations
-        cursor.execute("DELETE FROM vacations WHERE staff_id = ?", (employee_id,))
-
-        # Delete the employee
-        cursor.execute("DELETE FROM staff WHERE id = ?", (employee_id,))
-        
-        conn.commit()
-        logger.info(f"Employee deleted successfully: ID {employee_id}")
-        return True, "Сотрудник успешно удален."
-    except sqlite3.Error as e:
-        conn.rollback()
-        logger.error(f"Employee deletion failed for ID {employee_id}: {e}")
-        return False, f"Ошибка удаления сотрудника: {e}"
-    finally:
-        conn.close()
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            employee_to_delete = cursor.execute('SELECT id FROM staff WHERE id = ?', (employee_id,)).fetchone()
+            if not employee_to_delete:
+                return False, "Сотрудник не найден.", None
 
-# Приклад використання (можна закоментувати або видалити пізніше)
-if __name__ == '__main__':
-    _ensure_tables_exist() # Make sure tables are created for testing
-    print("Tables ensured.")
+            # Start transaction
+            cursor.execute("BEGIN TRANSACTION")
 
-    print("\nВсі співробітники:")
-    all_staff = get_all_employees()
-    for emp in all_staff:
-        print(emp)
+            # Detach the employee from the hierarchy and nullify manager references of direct subordinates
+            # This is important if the deleted employee was a manager
+            _remove_hierarchy_node(conn, employee_id)
+            subordinates = cursor.execute('SELECT id FROM staff WHERE manager_id = ?', (employee_id,)).fetchall()
+            cursor.execute("UPDATE staff SET manager_fio = NULL, manager_id = NULL WHERE manager_id = ?", (employee_id,))
 
-    print("\nVacation History (current year):")
-    history = get_vacation_history(datetime.now().year)
-    for item in history:
-        print(item)
+            # Delete associated vacations
+            vacations = cursor.execute('SELECT id FROM vacations WHERE staff_id = ?', (employee_id,)).fetchall()
+            cursor.execute("DELETE FROM vacations WHERE staff_id = ?", (employee_id,))
+            cursor.execute("DELETE FROM vacations_archive WHERE staff_id = ?", (employee_id,))
+            cursor.execute("DELETE FROM legacy_overlap_staff WHERE staff_id = ?", (employee_id,))
+
+            # Delete the employee
+            cursor.execute("DELETE FROM staff WHERE id = ?", (employee_id,))
+            
+            conn.commit()
+            _invalidate_cache(('staff', 'vacations'))
+            logger.info(f"Employee deleted successfully: ID {employee_id}")
+            changes = data_changes(staff_updated=[row['id'] for row in subordinates], staff_deleted=[employee_id],
+                                   vacations_deleted=[row['id'] for row in vacations])
+            return True, "Сотрудник успешно удален.", changes
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Employee deletion failed for ID {employee_id}: {e}")
+            return False, f"Ошибка удаления сотрудника: {e}", None
 
-    print("\nDatabase operations module loaded successfully.")
 def get_vacation_history_for_employee(employee_id):
     """Отримує історію відпусток для конкретного співробітника."""
-    conn = get_db_connection()
-    query = """
+    query = f"""
         SELECT start_date, end_date, total_days
-        FROM vacations
+        FROM {vacation_archive.ALL_VIEW}
         WHERE staff_id = ?
         ORDER BY start_date DESC
     """
-    history = conn.execute(query, (employee_id,)).fetchall()
-    conn.close()
+    with db_connection() as conn:
+        history = conn.execute(query, (employee_id,)).fetchall()
     return [dict(row) for row in history]
 
-def batch_import_employees(employees_data):
+def batch_import_employees(employees_data, chunk_size=None, on_chunk=None):
     """
-    Пакетний імпорт або оновлення співробітників. Усовершенствованная версія,
-    яка коректно обробляє менеджерів, визначених в тому ж файлі.
+    Пакетний імпорт або оновлення співробітників за ІПН (див. data/staff_import.py).
+    employees_data - список словників або ітератор пакетів DataFrame. Менеджери,
+    визначені в тому ж файлі, прив'язуються коректно; зміни зберігаються
+    блоками по chunk_size рядків.
     """
-    if not employees_data:
+    if employees_data is None or (isinstance(employees_data, list) and not employees_data):
         logger.warning("Empty employee data provided for batch import")
         return 0, 0, ["Порожні дані для імпорту"]
-    
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    imported_count = 0
-    updated_count = 0
-    errors = []
-
-    # Шаг 1: Собрати всіх відомих менеджерів (з БД і з поточного файлу)
-    db_managers_query = conn.execute("SELECT fio FROM staff WHERE role = 'Manager'").fetchall()
-    all_managers = {row['fio'] for row in db_managers_query}
-    
-    # Попередній прохід по файлу для пошуку нових менеджерів
-    for emp in employees_data:
-        if emp.get('role') == 'Manager':
-            all_managers.add(emp['fio'])
 
-    # Шаг 2: Основний цикл імпорту з використанням повного списку менеджерів
-    for emp in employees_data:
-        try:
-            # Валідація та очищення даних
-            emp['fio'] = sanitize_input(emp.get('fio', ''))
-            emp['ipn'] = sanitize_input(emp.get('ipn', ''))
-            
-            if not emp['fio'] or not emp['ipn']:
-                errors.append(f"Пропущені обов'язкові поля для запису: {emp}")
-                continue
-                
-            if not validate_ipn(emp['ipn']):
-                errors.append(f"Некоректний ІПН: {emp['ipn']}")
-                continue
-            
-            cursor.execute("SELECT id, vacation_days_per_year, remaining_vacation_days FROM staff WHERE ipn = ?", (emp['ipn'],))
-            existing_employee = cursor.fetchone()
-
-            manager_fio = emp.get('manager_fio')
-            if manager_fio and manager_fio not in all_managers:
-                # Якщо менеджер вказаний, але його немає ні в БД, ні в цьому файлі, обнуляємо
-                manager_fio = None
-
-            vacation_days = int(emp.get('vacation_days_per_year', 24))
-
-            if existing_employee:
-                old_total_days = existing_employee['vacation_days_per_year']
-                old_remaining_days = existing_employee['remaining_vacation_days']
-                days_diff = vacation_days - old_total_days
-                new_remaining_days = old_remaining_days + days_diff
-
-                cursor.execute("""
-                    UPDATE staff
-                    SET fio = ?, role = ?, vacation_days_per_year = ?, remaining_vacation_days = ?, manager_fio = ?
-                    WHERE ipn = ?
-                """, (emp['fio'], emp.get('role', 'Employee'), vacation_days, new_remaining_days, manager_fio, emp['ipn']))
-                updated_count += 1
-            else:
-                cursor.execute("""
-                    INSERT INTO staff (fio, ipn, role, manager_fio, vacation_days_per_year, remaining_vacation_days)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (emp['fio'], emp['ipn'], emp.get('role', 'Employee'), manager_fio, vacation_days, vacation_days))
-                imported_count += 1
-        except Exception as e:
-            errors.append(f"Помилка для запису з ІПН {emp.get('ipn', 'N/A')}: {str(e)}")
-            logger.error(f"Batch import error for IPN {emp.get('ipn', 'N/A')}: {e}")
-            continue
-    
+    def chunk_committed(report):
+        # Кожен блок імпорту комітиться окремо
+        _invalidate_cache(('staff',))
+        if on_chunk:
+            on_chunk(report)
+
     try:
-        conn.commit()
-        logger.info(f"Batch import completed: {imported_count} imported, {updated_count} updated, {len(errors)} errors")
-    except sqlite3.Error as e:
-        conn.rollback()
-        logger.error(f"Batch import commit failed: {e}")
-        errors.append(f"Помилка збереження змін: {e}")
+        with db_connection() as conn:
+            return staff_import.import_employees(conn, employees_data, chunk_size, chunk_committed)
     finally:
-        conn.close()
-    
-    return imported_count, updated_count, errors
\ No newline at end of file
+        # Прив'язка керівників комітиться після всіх блоків
+        _invalidate_cache(('staff',))
+
+# --- Фонові задачі: імпорт виконується поза воркером запиту ---
+# Один потік на процес: SQLite однаково серіалізує запис, а черга не дає
+# кільком імпортам змагатися за блокування.
+_job_runner = jobs.JobRunner(db_connection, max_workers=1)
+atexit.register(_job_runner.shutdown)
+
+def _run_import_job(employees_data, chunk_size, progress):
+    totals = {'imported': 0, 'updated': 0, 'errors': 0}
+
+    def on_chunk(report):
+        totals['imported'] += report['imported']
+        totals['updated'] += report['updated']
+        totals['errors'] += len(report['errors'])
+        progress(report['last_row'], report['total_rows'],
+                 totals['imported'], totals['updated'], totals['errors'])
+
+    return batch_import_employees(employees_data, chunk_size, on_chunk)
+
+def start_import_job(employees_data, owner, description=None, chunk_size=None):
+    """
+    Ставить пакетний імпорт у фонову чергу процесу і одразу повертає id задачі;
+    стан і прогрес читаються через get_import_job.
+    """
+    with db_connection() as conn:
+        job_id = jobs.create_job(conn, 'employee_import', owner, description)
+    _job_runner.submit(job_id, _run_import_job, employees_data, chunk_size)
+    logger.info(f"Import job {job_id} queued")
+    return job_id
+
+def get_import_job(job_id, owner=None):
+    """Стан задачі імпорту (див. data/jobs.py) або None, якщо її немає чи вона чужа."""
+    try:
+        with db_connection() as conn:
+            return jobs.get_job(conn, job_id, owner)
+    except sqlite3.Error as e:
+        logger.error(f"Error getting job {job_id}: {e}")
+        return None
+
+# --- Журнал змін (CDC): таблиця change_log заповнюється тригерами, див. data/change_log.py ---
+# Кеші, експорт і зовнішні синхронізації запам'ятовують позицію та дочитують
+# лише нові записи замість повного перечитування staff і vacations.
+
+def get_change_log_position():
+    """Номер останнього запису журналу змін (початкова позиція нового споживача)."""
+    with db_connection() as conn:
+        return change_log.position(conn)
+
+def changes_since(seq, limit=change_log.DEFAULT_BATCH_SIZE):
+    """
+    Зміни staff та vacations після позиції seq пакетами по limit записів:
+    (записи, наступна позиція). Запис - {'seq', 'table', 'row_id', 'operation',
+    'columns', 'changed_at'}; columns - змінені стовпці для 'update'. Викидає
+    change_log.ChangeLogTruncatedError, якщо позиція старша за очищені записи.
+    """
+    with db_connection() as conn:
+        return change_log.changes_since(conn, seq, limit)
+
+def compact_change_log(compact_after_days=change_log.COMPACT_AFTER_DAYS,
+                       retention_days=change_log.RETENTION_DAYS):
+    """
+    Нічне обслуговування журналу: записи старші за compact_after_days
+    ущільнюються до одного на рядок, старші за retention_days видаляються.
+    Повертає {'compacted': ..., 'pruned': ...} - кількість видалених записів.
+    """
+    with db_connection() as conn:
+        try:
+            pruned = 0
+            prune_through = change_log.last_seq_before(conn, f'-{retention_days} days')
+            if prune_through is not None:
+                pruned = change_log.prune(conn, prune_through)
+            compacted = 0
+            compact_through = change_log.last_seq_before(conn, f'-{compact_after_days} days')
+            if compact_through is not None:
+                compacted = change_log.compact(conn, compact_through)
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+    logger.info(f"Change log compacted: {compacted} merged, {pruned} pruned")
+    return {'compacted': compacted, 'pruned': pruned}
+
+# --- Архів відпусток закритих років (data/vacation_archive.py) ---
+
+def archive_closed_vacations(keep_closed_years=vacation_archive.DEFAULT_KEEP_CLOSED_YEARS, today=None,
+                             batch_size=vacation_archive.DEFAULT_BATCH_SIZE):
+    """
+    Нічна задача: переносить відпустки, що закінчились до початку
+    (поточний рік - keep_closed_years), у vacations_archive. Кожен пакет
+    комітиться окремо, щоб не тримати блокування запису. Повертає
+    {'archived_before', 'archived'}.
+    """
+    boundary = vacation_archive.archive_boundary(today, keep_closed_years)
+    archived = 0
+    with db_connection() as conn:
+        # Посилання зведення мають бути актуальними: такі відпустки лишаються гарячими
+        vacation_summary.roll_forward(conn, today)
+        conn.commit()
+        while True:
+            try:
+                moved = vacation_archive.archive_batch(conn, boundary, batch_size)
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+            archived += moved
+            if moved < batch_size:
+                break
+    if archived:
+        _invalidate_cache(('vacations',))
+    logger.info(f"Vacations archived before {boundary}: {archived}")
+    return {'archived_before': boundary, 'archived': archived}
+
+# --- Журнал балансу відпусток: staff.remaining_vacation_days звіряється з vacation_ledger ---
+
+def reconcile_vacation_balances(repair=False):
+    """
+    Звіряє залишки всіх співробітників з журналом балансу одним запитом.
+    Повертає {'checked', 'drifted': [...], 'repaired'} (див. vacation_ledger.reconcile);
+    repair=True виправляє лічильники з розбіжністю.
+    """
+    with db_connection() as conn:
+        try:
+            result = vacation_ledger.reconcile(conn, repair)
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+    if result['repaired']:
+        _invalidate_cache(('staff',))
+    if result['drifted']:
+        logger.warning(f"Vacation balance drift: {len(result['drifted'])} of {result['checked']} employees, "
+                       f"{result['repaired']} repaired")
+    return result
+
+def run_annual_rollover(year, carry_over_limit=None):
+    """
+    Щорічне нарахування днів відпустки всім співробітникам (див.
+    vacation_ledger.annual_rollover). Повторний запуск за рік - ValueError.
+    """
+    with db_connection() as conn:
+        try:
+            result = vacation_ledger.annual_rollover(conn, year, carry_over_limit)
+            conn.commit()
+        except (sqlite3.Error, ValueError):
+            conn.rollback()
+            raise
+    _invalidate_cache(('staff',))
+    logger.info(f"Annual rollover {result['year']}: {result['accrued']} accrued, {result['expired']} expired")
+    return result
+
+def adjust_vacation_balance(employee_id, days, reference=None):
+    """Ручне коригування залишку днів співробітника із записом у журнал. Повертає True/False."""
+    with db_connection() as conn:
+        try:
+            adjusted = vacation_ledger.adjust(conn, employee_id, days, reference)
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Vacation balance adjustment failed for employee ID {employee_id}: {e}")
+            return False
+    if adjusted:
+        _invalidate_cache(('staff',))
+    return adjusted
+
+def get_vacation_ledger(employee_id):
+    """Записи журналу балансу співробітника від найновішого."""
+    with db_connection() as conn:
+        return vacation_ledger.entries(conn, employee_id)
+
+# Приклад використання (можна закоментувати або видалити пізніше)
+if __name__ == '__main__':
+    _ensure_tables_exist() # Make sure tables are created for testing
+    print("Tables ensured.")
+
+    print("\nВсі співробітники:")
+    all_staff = get_all_employees()
+    for emp in all_staff:
+        print(emp)
+
+    print("\nVacation History (current year):")
+    history = get_vacation_history(datetime.now().year)
+    for item in history:
+        print(item)
+
+    print("\nDatabase operations module loaded successfully.")
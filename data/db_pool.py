@@ -0,0 +1,189 @@
+import os
+import sqlite3
+import threading
+import time
+import logging
+import weakref
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Політики перевірки з'єднання при видачі з пулу
+HEALTH_CHECK_ALWAYS = 'always'  # SELECT 1 при кожній видачі
+HEALTH_CHECK_IDLE = 'idle'      # SELECT 1 лише якщо з'єднання простоювало довше idle_check_after
+HEALTH_CHECK_NEVER = 'never'
+
+
+def _casefold(value):
+    return value.casefold() if isinstance(value, str) else value
+
+
+class _PooledConnection:
+    """З'єднання пулу разом з метаданими для перевірки та перестворення."""
+
+    __slots__ = ('conn', 'created_at', 'last_used', 'pid', 'closed', '__weakref__')
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.pid = os.getpid()
+        self.closed = False
+
+
+class ConnectionPool:
+    """
+    Пул з'єднань SQLite: одне багаторазове з'єднання на потік (і на процес-воркер).
+
+    PRAGMA виконуються один раз при відкритті з'єднання. При видачі з'єднання
+    застосовується політика перевірки (health check), з'єднання старші за
+    ``max_age`` секунд перестворюються. Після fork() з'єднання батьківського
+    процесу не використовуються повторно.
+    """
+
+    def __init__(self, db_path, timeout=30.0, max_age=3600.0,
+                 health_check=HEALTH_CHECK_IDLE, idle_check_after=30.0):
+        if health_check not in (HEALTH_CHECK_ALWAYS, HEALTH_CHECK_IDLE, HEALTH_CHECK_NEVER):
+            raise ValueError(f"Unknown health check policy: {health_check}")
+        self.db_path = db_path
+        self.timeout = timeout
+        self.max_age = max_age
+        self.health_check = health_check
+        self.idle_check_after = idle_check_after
+        self._reset_process_state()
+
+    def _reset_process_state(self):
+        self._pid = os.getpid()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Слабкі посилання: з'єднання потоку, що завершився, закривається разом з його threading.local
+        self._connections = weakref.WeakSet()
+        self._stats = {'opened': 0, 'reused': 0, 'recycled': 0, 'health_check_failures': 0, 'closed': 0}
+
+    def _check_fork(self):
+        # Після fork() успадковані з'єднання не можна ні використовувати, ні закривати
+        # у дочірньому процесі, тому просто забуваємо про них.
+        if os.getpid() != self._pid:
+            inherited = list(self._connections)
+            self._reset_process_state()
+            self._inherited = inherited
+
+    def _connect(self):
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+            conn.execute("PRAGMA foreign_keys = ON")
+            conn.execute("PRAGMA journal_mode = WAL")
+        except sqlite3.Error as e:
+            logger.error(f"Database connection error: {e}, Path: {self.db_path}")
+            raise
+        conn.row_factory = sqlite3.Row
+        # Регістронезалежне порівняння не лише ASCII (фільтри таблиць, див. data/table_query.py)
+        conn.create_function('casefold', 1, _casefold, deterministic=True)
+        return conn
+
+    def open_dedicated(self):
+        """Відкриває окреме з'єднання з тими ж PRAGMA, яке не повертається до пулу."""
+        return self._connect()
+
+    def _open(self):
+        slot = _PooledConnection(self._connect())
+        with self._lock:
+            self._connections.add(slot)
+            self._stats['opened'] += 1
+        return slot
+
+    def _discard(self, slot):
+        with self._lock:
+            self._connections.discard(slot)
+        if not slot.closed:
+            slot.closed = True
+            try:
+                slot.conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"Error closing pooled connection: {e}")
+
+    def _is_usable(self, slot):
+        if slot.closed or slot.pid != os.getpid():
+            return False
+        now = time.monotonic()
+        if self.max_age is not None and now - slot.created_at > self.max_age:
+            with self._lock:
+                self._stats['recycled'] += 1
+            return False
+        if self.health_check == HEALTH_CHECK_ALWAYS or (
+                self.health_check == HEALTH_CHECK_IDLE and now - slot.last_used > self.idle_check_after):
+            try:
+                slot.conn.execute("SELECT 1").fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"Pooled connection failed health check: {e}")
+                with self._lock:
+                    self._stats['health_check_failures'] += 1
+                return False
+        return True
+
+    def _acquire(self):
+        self._check_fork()
+        slot = getattr(self._local, 'slot', None)
+        self._local.slot = None
+        if slot is not None:
+            if self._is_usable(slot):
+                with self._lock:
+                    self._stats['reused'] += 1
+                return slot
+            self._discard(slot)
+        return self._open()
+
+    def _release(self, slot):
+        if slot.closed:
+            return
+        try:
+            if slot.conn.in_transaction:
+                # Незафіксовані зміни відкидаються, як і при conn.close()
+                slot.conn.rollback()
+        except sqlite3.Error as e:
+            logger.warning(f"Rollback on connection release failed: {e}")
+            self._discard(slot)
+            return
+        slot.last_used = time.monotonic()
+        if slot.pid != self._pid or getattr(self._local, 'slot', None) is not None:
+            # Вкладене запозичення в тому ж потоці: зайве з'єднання закриваємо
+            self._discard(slot)
+        else:
+            self._local.slot = slot
+
+    @contextmanager
+    def connection(self):
+        """Позичає з'єднання на час блоку ``with`` і повертає його до пулу."""
+        slot = self._acquire()
+        try:
+            yield slot.conn
+        finally:
+            self._release(slot)
+
+    def close_all(self):
+        """Закриває всі з'єднання поточного процесу (хук завершення роботи)."""
+        self._check_fork()
+        with self._lock:
+            slots = list(self._connections)
+            self._connections.clear()
+            self._stats['closed'] += len(slots)
+        for slot in slots:
+            if not slot.closed:
+                slot.closed = True
+                try:
+                    slot.conn.close()
+                except sqlite3.Error as e:
+                    logger.warning(f"Error closing pooled connection: {e}")
+        self._local = threading.local()
+
+    def reconfigure(self, db_path):
+        """Перемикає пул на інший файл бази даних, закриваючи поточні з'єднання."""
+        self.close_all()
+        self.db_path = db_path
+
+    def stats(self):
+        """Повертає лічильники пулу (відкриті, повторно використані, перестворені з'єднання)."""
+        with self._lock:
+            result = dict(self._stats)
+            result['open'] = len(self._connections)
+        return result
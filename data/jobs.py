@@ -0,0 +1,174 @@
+import json
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_SUCCEEDED = 'succeeded'
+STATUS_FAILED = 'failed'
+
+# У записі завершеної задачі зберігається не більше стількох повідомлень про помилки
+MAX_STORED_ERRORS = 500
+
+# Задача у стані running без оновлень довше цього вважається перерваною (воркер
+# перезапущено або процес завершився разом з потоком задачі). Задача в черзі
+# (queued) може чекати довше за попередню задачу пулу, тож на неї це не поширюється
+STALE_AFTER_SECONDS = 900
+INTERRUPTED_MESSAGE = 'Задачу перервано: процес, що її виконував, завершився'
+
+# Завершені задачі зберігаються стільки днів
+RETENTION_DAYS = 30
+
+_JOB_COLUMNS = """
+    id, kind, owner, description, status, total_rows, processed_rows, imported, updated,
+    error_count, result, error, created_at, updated_at, finished_at
+"""
+
+
+def create_job(conn, kind, owner, description=None):
+    """
+    Створює запис задачі у стані queued; заодно зберігає стан перерваних
+    задач і видаляє застарілі завершені. Повертає id.
+    """
+    job_id = uuid.uuid4().hex
+    fail_stale_jobs(conn)
+    conn.execute(
+        "DELETE FROM jobs WHERE finished_at < datetime('now', ?)", (f'-{RETENTION_DAYS} days',)
+    )
+    conn.execute(
+        "INSERT INTO jobs (id, kind, owner, description, status) VALUES (?, ?, ?, ?, ?)",
+        (job_id, kind, owner, description, STATUS_QUEUED)
+    )
+    conn.commit()
+    return job_id
+
+
+def mark_running(conn, job_id):
+    """
+    Переводить задачу з queued у running. Повертає False, якщо задача вже не в
+    черзі (наприклад, її позначили перерваною) - тоді її не можна запускати.
+    """
+    started = conn.execute(
+        "UPDATE jobs SET status = ?, updated_at = datetime('now') WHERE id = ? AND status = ?",
+        (STATUS_RUNNING, job_id, STATUS_QUEUED)
+    ).rowcount
+    conn.commit()
+    return started == 1
+
+
+def update_progress(conn, job_id, processed_rows, total_rows=None, imported=0, updated=0, error_count=0):
+    """Оновлює лічильники активної задачі (кожне оновлення - також ознака, що задача жива)."""
+    conn.execute("""
+        UPDATE jobs SET processed_rows = ?, total_rows = ?, imported = ?, updated = ?,
+                        error_count = ?, updated_at = datetime('now')
+        WHERE id = ?
+    """, (processed_rows, total_rows, imported, updated, error_count, job_id))
+    conn.commit()
+
+
+def finish_job(conn, job_id, imported, updated, errors):
+    """Зберігає підсумок успішної задачі; список помилок обрізається до MAX_STORED_ERRORS."""
+    result = {'imported': imported, 'updated': updated, 'errors': errors[:MAX_STORED_ERRORS]}
+    conn.execute("""
+        UPDATE jobs SET status = ?, imported = ?, updated = ?, error_count = ?, result = ?,
+                        updated_at = datetime('now'), finished_at = datetime('now')
+        WHERE id = ?
+    """, (STATUS_SUCCEEDED, imported, updated, len(errors), json.dumps(result, ensure_ascii=False), job_id))
+    conn.commit()
+
+
+def fail_job(conn, job_id, message):
+    conn.execute("""
+        UPDATE jobs SET status = ?, error = ?, updated_at = datetime('now'), finished_at = datetime('now')
+        WHERE id = ?
+    """, (STATUS_FAILED, message, job_id))
+    conn.commit()
+
+
+def fail_stale_jobs(conn):
+    """
+    Позначає перерваними задачі у стані running, що не оновлювались довше
+    STALE_AFTER_SECONDS (у транзакції викликача). Повертає їх кількість.
+    """
+    return conn.execute("""
+        UPDATE jobs SET status = ?, error = ?, finished_at = datetime('now')
+        WHERE finished_at IS NULL AND status = ? AND updated_at < datetime('now', ?)
+    """, (STATUS_FAILED, INTERRUPTED_MESSAGE, STATUS_RUNNING, f'-{STALE_AFTER_SECONDS} seconds')).rowcount
+
+
+def get_job(conn, job_id, owner=None):
+    """
+    Повертає задачу як словник (result розібраний з JSON) або None.
+    Якщо задано owner, задачі інших користувачів не повертаються.
+    Лише читання (статус опитують з кожного воркера): задача у стані running,
+    що давно не оновлювалась, повертається як перервана, а зберігає це fail_stale_jobs.
+    """
+    row = conn.execute(f"""
+        SELECT {_JOB_COLUMNS}, updated_at < datetime('now', ?) AS stale FROM jobs WHERE id = ?
+    """, (f'-{STALE_AFTER_SECONDS} seconds', job_id)).fetchone()
+    if row is None or (owner is not None and row['owner'] != owner):
+        return None
+    job = dict(row)
+    if job.pop('stale') and job['status'] == STATUS_RUNNING:
+        job.update(status=STATUS_FAILED, error=INTERRUPTED_MESSAGE, finished_at=job['updated_at'])
+    job['result'] = json.loads(job['result']) if job['result'] else None
+    return job
+
+
+class JobRunner:
+    """
+    Виконує довгі задачі (імпорт) у фоновому пулі потоків процесу, записуючи
+    стан і прогрес у таблицю jobs, щоб будь-який воркер міг віддати статус.
+    ``connection_factory`` - контекстний менеджер, що видає з'єднання
+    (db_operations.db_connection); кожен потік отримує власне з'єднання пулу.
+    """
+
+    def __init__(self, connection_factory, max_workers=1):
+        self._connection_factory = connection_factory
+        self._max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers,
+                                                    thread_name_prefix='job-runner')
+            return self._executor
+
+    def submit(self, job_id, func, *args, **kwargs):
+        """
+        Ставить func(*args, progress=..., **kwargs) у чергу. func повертає
+        (додано, оновлено, помилки); progress(processed_rows, total_rows, imported,
+        updated, error_count) зберігає проміжні лічильники.
+        """
+        return self._get_executor().submit(self._run, job_id, func, args, kwargs)
+
+    def _run(self, job_id, func, args, kwargs):
+        with self._connection_factory() as conn:
+            if not mark_running(conn, job_id):
+                logger.warning(f"Job {job_id} is no longer queued, not starting it")
+                return
+
+            def progress(processed_rows, total_rows=None, imported=0, updated=0, error_count=0):
+                update_progress(conn, job_id, processed_rows, total_rows, imported, updated, error_count)
+
+            try:
+                imported, updated, errors = func(*args, progress=progress, **kwargs)
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"Job {job_id} failed: {e}")
+                fail_job(conn, job_id, str(e))
+                return
+            finish_job(conn, job_id, imported, updated, errors)
+            logger.info(f"Job {job_id} finished: {imported} imported, {updated} updated, {len(errors)} errors")
+
+    def shutdown(self, wait=False):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+                self._executor = None
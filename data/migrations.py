@@ -0,0 +1,547 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Вторинні індекси: (ім'я, таблиця, стовпці). Набір кожної міграції
+# фіксований; INDEXES - повний керований набір, на який мають спиратися
+# всі фільтри/з'єднання в db_operations (див. scripts/check_query_plans.py).
+_BASE_INDEXES = [
+    ('idx_vacations_staff_start', 'vacations', ('staff_id', 'start_date')),
+    ('idx_vacations_staff_end', 'vacations', ('staff_id', 'end_date')),
+    ('idx_vacations_start_end', 'vacations', ('start_date', 'end_date')),
+    ('idx_staff_manager_fio', 'staff', ('manager_fio',)),
+    ('idx_staff_role_fio', 'staff', ('role', 'fio')),
+]
+
+_HIERARCHY_INDEXES = [
+    ('idx_staff_fio', 'staff', ('fio',)),
+    ('idx_staff_manager_id', 'staff', ('manager_id',)),
+    ('idx_staff_hierarchy_descendant', 'staff_hierarchy', ('descendant_id', 'depth')),
+]
+
+_SUMMARY_INDEXES = [
+    ('idx_vacation_summary_valid_until', 'vacation_summary', ('valid_until',)),
+]
+
+_JOB_INDEXES = [
+    ('idx_jobs_finished_at', 'jobs', ('finished_at',)),
+]
+
+_RATE_LIMIT_INDEXES = [
+    ('idx_rate_limits_expires_at', 'rate_limits', ('expires_at',)),
+]
+
+_CHANGE_LOG_INDEXES = [
+    ('idx_change_log_changed_at', 'change_log', ('changed_at',)),
+]
+
+# Стовпці, зміни яких журналюються в change_log (identity_version - похідний лічильник)
+_CHANGE_LOG_COLUMNS_V9 = {
+    'staff': ['fio', 'ipn', 'role', 'manager_fio', 'manager_id', 'vacation_days_per_year', 'remaining_vacation_days'],
+    'vacations': ['staff_id', 'start_date', 'end_date', 'total_days'],
+}
+
+# Покривний індекс для перевірки перетину відпусток (data/vacation_overlaps.py);
+# він же замінює idx_vacations_staff_start, який є його префіксом
+_OVERLAP_INDEXES = [
+    ('idx_vacations_staff_start_end', 'vacations', ('staff_id', 'start_date', 'end_date')),
+]
+
+# Баланс співробітника (SUM(days) за staff_id) та записи щорічного нарахування
+# (reference) читаються лише з індексів (data/vacation_ledger.py)
+_LEDGER_INDEXES = [
+    ('idx_vacation_ledger_staff', 'vacation_ledger', ('staff_id', 'days')),
+    ('idx_vacation_ledger_reference', 'vacation_ledger', ('reference', 'staff_id', 'days')),
+]
+
+# Архів відпусток закритих років (data/vacation_archive.py): ті самі запити, що й до гарячої таблиці
+_ARCHIVE_INDEXES = [
+    ('idx_vacations_archive_staff_start_end', 'vacations_archive', ('staff_id', 'start_date', 'end_date')),
+    ('idx_vacations_archive_start_end', 'vacations_archive', ('start_date', 'end_date')),
+]
+
+# Індекси, видалені пізнішими міграціями
+_DROPPED_INDEXES = {'idx_vacations_staff_start'}
+
+INDEXES = [
+    index for index in (_BASE_INDEXES + _HIERARCHY_INDEXES + _SUMMARY_INDEXES + _JOB_INDEXES
+                         + _RATE_LIMIT_INDEXES + _CHANGE_LOG_INDEXES + _OVERLAP_INDEXES + _LEDGER_INDEXES
+                         + _ARCHIVE_INDEXES)
+    if index[0] not in _DROPPED_INDEXES
+]
+
+
+def _backfill_manager_ids(conn):
+    # ПІБ не унікальне: перевага співробітнику з роллю Manager, далі - найменший id
+    conn.execute("""
+        UPDATE staff SET manager_id = (
+            SELECT m.id FROM staff m
+            WHERE m.fio = staff.manager_fio AND m.id != staff.id
+            ORDER BY m.role = 'Manager' DESC, m.id
+            LIMIT 1
+        )
+        WHERE manager_fio IS NOT NULL
+    """)
+
+
+def _backfill_staff_hierarchy(conn):
+    # Обмеження глибини кількістю співробітників захищає від циклів у старих даних
+    staff_count = conn.execute("SELECT COUNT(*) FROM staff").fetchone()[0]
+    conn.execute("""
+        INSERT OR IGNORE INTO staff_hierarchy (ancestor_id, descendant_id, depth)
+        WITH RECURSIVE chain(ancestor_id, descendant_id, depth) AS (
+            SELECT id, id, 0 FROM staff
+            UNION ALL
+            SELECT s.manager_id, c.descendant_id, c.depth + 1
+            FROM chain c
+            JOIN staff s ON s.id = c.ancestor_id
+            WHERE s.manager_id IS NOT NULL AND c.depth < ?
+        )
+        SELECT ancestor_id, descendant_id, depth FROM chain
+    """, (staff_count,))
+
+
+def _report_vacation_overlaps_v10(conn):
+    # Перевірка спирається на відсутність перетинів; старі перетини не видаляються автоматично
+    overlaps = conn.execute("""
+        SELECT COUNT(*) FROM (
+            SELECT start_date, MAX(end_date) OVER (
+                PARTITION BY staff_id ORDER BY start_date, id
+                ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+            ) AS previous_end
+            FROM vacations
+        ) WHERE start_date <= previous_end
+    """).fetchone()[0]
+    if overlaps:
+        logger.warning(f"{overlaps} existing vacation(s) overlap an earlier vacation of the same employee")
+
+
+def _flag_legacy_overlaps_v13(conn):
+    # Співробітники з перетинами, що існували до перевірки (у тому числі між
+    # гарячою таблицею та архівом): для них find_overlap додатково перевіряє діапазон
+    flagged = conn.execute("""
+        INSERT OR IGNORE INTO legacy_overlap_staff (staff_id)
+        SELECT DISTINCT staff_id FROM (
+            SELECT staff_id, start_date, MAX(end_date) OVER (
+                PARTITION BY staff_id ORDER BY start_date, id
+                ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+            ) AS previous_end
+            FROM vacations_all
+        ) WHERE start_date <= previous_end
+    """).rowcount
+    if flagged:
+        logger.warning(f"{flagged} employee(s) have overlapping vacations recorded before the overlap check")
+
+
+def _change_log_trigger_statements_v9(tracked_columns):
+    """Тригери AFTER INSERT/UPDATE/DELETE, що додають записи до change_log ({таблиця: стовпці})."""
+    statements = []
+    for table, columns in tracked_columns.items():
+        changed = ' || '.join(
+            f"CASE WHEN OLD.{column} IS NOT NEW.{column} THEN '{column},' ELSE '' END" for column in columns
+        )
+        any_changed = ' OR '.join(f"OLD.{column} IS NOT NEW.{column}" for column in columns)
+        statements += [
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_change_log_insert
+            AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO change_log (table_name, row_id, operation) VALUES ('{table}', NEW.id, 'insert');
+            END
+            """,
+            # Оновлення без змін відстежуваних стовпців (зокрема identity_version) не журналюються
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_change_log_update
+            AFTER UPDATE ON {table}
+            WHEN {any_changed}
+            BEGIN
+                INSERT INTO change_log (table_name, row_id, operation, changed_columns)
+                VALUES ('{table}', NEW.id, 'update', rtrim({changed}, ','));
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_change_log_delete
+            AFTER DELETE ON {table}
+            BEGIN
+                INSERT INTO change_log (table_name, row_id, operation) VALUES ('{table}', OLD.id, 'delete');
+            END
+            """,
+        ]
+    return statements
+
+
+# Таблиці, зміни яких відстежуються лічильниками table_versions (див. data/cache.py)
+_VERSIONED_TABLES_V6 = ['staff', 'vacations']
+
+
+def _version_trigger_statements_v6(tables):
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{event.lower()}
+        AFTER {event} ON {table}
+        BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}';
+        END
+        """
+        for table in tables
+        for event in ('INSERT', 'UPDATE', 'DELETE')
+    ]
+
+
+def _index_statements(indexes):
+    return [
+        f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+        for name, table, columns in indexes
+    ]
+
+
+# Упорядкований список міграцій схеми: (версія, опис, кроки).
+# Крок - це SQL-рядок або функція, що приймає з'єднання. Функції-кроки
+# визначаються тут же і не викликають код інших модулів data/: результат
+# міграції на новій базі не залежить від пізніших змін цих модулів.
+# Нові міграції додаються лише в кінець списку з наступним номером версії.
+MIGRATIONS = [
+    (1, "Базові таблиці staff та vacations", [
+        """
+        CREATE TABLE IF NOT EXISTS staff (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fio TEXT NOT NULL,
+            ipn TEXT UNIQUE NOT NULL,
+            role TEXT NOT NULL,
+            manager_fio TEXT,
+            vacation_days_per_year INTEGER NOT NULL,
+            remaining_vacation_days INTEGER NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS vacations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            staff_id INTEGER NOT NULL,
+            start_date TEXT NOT NULL,
+            end_date TEXT NOT NULL,
+            total_days INTEGER NOT NULL,
+            FOREIGN KEY (staff_id) REFERENCES staff (id)
+        )
+        """,
+    ]),
+    (2, "Вторинні індекси для staff та vacations", _index_statements(_BASE_INDEXES)),
+    (3, "Ієрархія за manager_id та таблиця замикання staff_hierarchy", [
+        "ALTER TABLE staff ADD COLUMN manager_id INTEGER REFERENCES staff (id)",
+        """
+        CREATE TABLE IF NOT EXISTS staff_hierarchy (
+            ancestor_id INTEGER NOT NULL REFERENCES staff (id) ON DELETE CASCADE,
+            descendant_id INTEGER NOT NULL REFERENCES staff (id) ON DELETE CASCADE,
+            depth INTEGER NOT NULL,
+            PRIMARY KEY (ancestor_id, descendant_id)
+        ) WITHOUT ROWID
+        """,
+        *_index_statements(_HIERARCHY_INDEXES),
+        _backfill_manager_ids,
+        _backfill_staff_hierarchy,
+    ]),
+    (4, "Матеріалізоване зведення поточної/наступної/останньої відпустки", [
+        """
+        CREATE TABLE IF NOT EXISTS vacation_summary (
+            staff_id INTEGER PRIMARY KEY REFERENCES staff (id) ON DELETE CASCADE,
+            current_vacation_id INTEGER,
+            next_vacation_id INTEGER,
+            last_vacation_id INTEGER,
+            closest_vacation_id INTEGER,
+            valid_until TEXT,
+            computed_for TEXT NOT NULL
+        )
+        """,
+        *_index_statements(_SUMMARY_INDEXES),
+        # Зведення заповнює вже застосунок: рядки з минулим valid_until оновлює
+        # перший roll_forward (data/vacation_summary.py) поточним кодом
+        """
+        INSERT OR IGNORE INTO vacation_summary (staff_id, valid_until, computed_for)
+        SELECT id, '0001-01-01', '0001-01-01' FROM staff
+        """,
+    ]),
+    (5, "Записи фонових задач (імпорт) з прогресом та підсумком", [
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            owner TEXT,
+            description TEXT,
+            status TEXT NOT NULL,
+            total_rows INTEGER,
+            processed_rows INTEGER NOT NULL DEFAULT 0,
+            imported INTEGER NOT NULL DEFAULT 0,
+            updated INTEGER NOT NULL DEFAULT 0,
+            error_count INTEGER NOT NULL DEFAULT 0,
+            result TEXT,
+            error TEXT,
+            created_at TEXT NOT NULL DEFAULT (datetime('now')),
+            updated_at TEXT NOT NULL DEFAULT (datetime('now')),
+            finished_at TEXT
+        )
+        """,
+        *_index_statements(_JOB_INDEXES),
+    ]),
+    (6, "Лічильники змін staff та vacations для узгодження кешів воркерів", [
+        """
+        CREATE TABLE IF NOT EXISTS table_versions (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+        """,
+        *[f"INSERT OR IGNORE INTO table_versions (table_name) VALUES ('{table}')" for table in _VERSIONED_TABLES_V6],
+        *_version_trigger_statements_v6(_VERSIONED_TABLES_V6),
+    ]),
+    (7, "Версія ідентичності співробітника для записів сесій", [
+        "ALTER TABLE staff ADD COLUMN identity_version INTEGER NOT NULL DEFAULT 0",
+        # Зміна ПІБ, ІПН чи ролі робить застарілими збережені в сесіях записи
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_staff_identity_version
+        AFTER UPDATE OF fio, ipn, role ON staff
+        WHEN OLD.fio IS NOT NEW.fio OR OLD.ipn IS NOT NEW.ipn OR OLD.role IS NOT NEW.role
+        BEGIN
+            UPDATE staff SET identity_version = identity_version + 1 WHERE id = NEW.id;
+        END
+        """,
+    ]),
+    (8, "Спільний для воркерів стан обмеження частоти спроб (utils/rate_limiter.py)", [
+        """
+        CREATE TABLE IF NOT EXISTS rate_limits (
+            key TEXT PRIMARY KEY,
+            tokens REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            expires_at REAL NOT NULL
+        ) WITHOUT ROWID
+        """,
+        *_index_statements(_RATE_LIMIT_INDEXES),
+    ]),
+    (9, "Журнал змін staff та vacations (CDC, data/change_log.py)", [
+        # AUTOINCREMENT: номери видалених при очищенні записів не використовуються повторно
+        """
+        CREATE TABLE IF NOT EXISTS change_log (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            operation TEXT NOT NULL,
+            changed_columns TEXT,
+            changed_at TEXT NOT NULL DEFAULT (datetime('now'))
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS change_log_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            pruned_through INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        "INSERT OR IGNORE INTO change_log_state (id) VALUES (1)",
+        *_index_statements(_CHANGE_LOG_INDEXES),
+        *_change_log_trigger_statements_v9(_CHANGE_LOG_COLUMNS_V9),
+    ]),
+    (10, "Покривний індекс (staff_id, start_date, end_date) для перевірки перетину відпусток", [
+        *_index_statements(_OVERLAP_INDEXES),
+        "DROP INDEX IF EXISTS idx_vacations_staff_start",
+        _report_vacation_overlaps_v10,
+    ]),
+    (11, "Журнал балансу відпусток (data/vacation_ledger.py)", [
+        # Без зовнішнього ключа: записи видалених співробітників лишаються в журналі
+        # (AUTOINCREMENT staff не використовує їхні id повторно)
+        """
+        CREATE TABLE IF NOT EXISTS vacation_ledger (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            staff_id INTEGER NOT NULL,
+            entry_type TEXT NOT NULL,
+            days INTEGER NOT NULL,
+            vacation_id INTEGER,
+            reference TEXT,
+            created_at TEXT NOT NULL DEFAULT (datetime('now'))
+        )
+        """,
+        *_index_statements(_LEDGER_INDEXES),
+        # Початкові записи: поточний залишок кожного співробітника
+        """
+        INSERT INTO vacation_ledger (staff_id, entry_type, days)
+        SELECT id, 'opening', remaining_vacation_days FROM staff
+        WHERE NOT EXISTS (SELECT 1 FROM vacation_ledger l WHERE l.staff_id = staff.id)
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_staff_ledger_opening
+        AFTER INSERT ON staff
+        BEGIN
+            INSERT INTO vacation_ledger (staff_id, entry_type, days)
+            VALUES (NEW.id, 'opening', NEW.remaining_vacation_days);
+        END
+        """,
+        # Зміна річної норми переноситься на залишок (як у update_employee_data_and_vacation та імпорті)
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_staff_ledger_accrual
+        AFTER UPDATE OF vacation_days_per_year ON staff
+        WHEN OLD.vacation_days_per_year IS NOT NEW.vacation_days_per_year
+        BEGIN
+            INSERT INTO vacation_ledger (staff_id, entry_type, days)
+            VALUES (NEW.id, 'accrual', NEW.vacation_days_per_year - OLD.vacation_days_per_year);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_vacations_ledger_insert
+        AFTER INSERT ON vacations
+        BEGIN
+            INSERT INTO vacation_ledger (staff_id, entry_type, days, vacation_id)
+            VALUES (NEW.staff_id, 'booking', -NEW.total_days, NEW.id);
+        END
+        """,
+        # Зміна відпустки - скасування старого бронювання та нове бронювання
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_vacations_ledger_update
+        AFTER UPDATE OF staff_id, total_days ON vacations
+        WHEN OLD.staff_id IS NOT NEW.staff_id OR OLD.total_days IS NOT NEW.total_days
+        BEGIN
+            INSERT INTO vacation_ledger (staff_id, entry_type, days, vacation_id)
+            VALUES (OLD.staff_id, 'booking', OLD.total_days, OLD.id),
+                   (NEW.staff_id, 'booking', -NEW.total_days, NEW.id);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_vacations_ledger_delete
+        AFTER DELETE ON vacations
+        BEGIN
+            INSERT INTO vacation_ledger (staff_id, entry_type, days, vacation_id)
+            VALUES (OLD.staff_id, 'booking', OLD.total_days, OLD.id);
+        END
+        """,
+    ]),
+    (12, "Архів відпусток закритих років та представлення vacations_all", [
+        """
+        CREATE TABLE IF NOT EXISTS vacations_archive (
+            id INTEGER PRIMARY KEY,
+            staff_id INTEGER NOT NULL,
+            start_date TEXT NOT NULL,
+            end_date TEXT NOT NULL,
+            total_days INTEGER NOT NULL,
+            archived_at TEXT NOT NULL DEFAULT (datetime('now'))
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS vacation_archive_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            archived_before TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE VIEW IF NOT EXISTS vacations_all AS
+        SELECT id, staff_id, start_date, end_date, total_days FROM vacations
+        UNION ALL
+        SELECT id, staff_id, start_date, end_date, total_days FROM vacations_archive
+        """,
+        *_index_statements(_ARCHIVE_INDEXES),
+        # Видалення при перенесенні в архів не повертає дні в журнал балансу
+        "DROP TRIGGER IF EXISTS trg_vacations_ledger_delete",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_vacations_ledger_delete
+        AFTER DELETE ON vacations
+        WHEN NOT EXISTS (SELECT 1 FROM vacations_archive WHERE id = OLD.id)
+        BEGIN
+            INSERT INTO vacation_ledger (staff_id, entry_type, days, vacation_id)
+            VALUES (OLD.staff_id, 'booking', OLD.total_days, OLD.id);
+        END
+        """,
+    ]),
+    (13, "Співробітники з перетинами відпусток, записаними до перевірки перетинів", [
+        """
+        CREATE TABLE IF NOT EXISTS legacy_overlap_staff (
+            staff_id INTEGER PRIMARY KEY
+        )
+        """,
+        _flag_legacy_overlaps_v13,
+    ]),
+    (14, "Перенесення відпусток в архів журналюється як 'archive', а не видалення", [
+        # Рядки, що вже в архіві, не видалені, а перенесені (data/vacation_archive.py)
+        "DROP TRIGGER IF EXISTS trg_vacations_change_log_delete",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_vacations_change_log_delete
+        AFTER DELETE ON vacations
+        BEGIN
+            INSERT INTO change_log (table_name, row_id, operation)
+            VALUES ('vacations', OLD.id,
+                    CASE WHEN EXISTS (SELECT 1 FROM vacations_archive WHERE id = OLD.id)
+                         THEN 'archive' ELSE 'delete' END);
+        END
+        """,
+        # Лічильник версії vacations archive_batch збільшує один раз на пакет, а не на рядок
+        "DROP TRIGGER IF EXISTS trg_vacations_version_delete",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_vacations_version_delete
+        AFTER DELETE ON vacations
+        WHEN NOT EXISTS (SELECT 1 FROM vacations_archive WHERE id = OLD.id)
+        BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE table_name = 'vacations';
+        END
+        """,
+    ]),
+]
+
+
+def _ensure_version_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT NOT NULL DEFAULT (datetime('now'))
+        )
+    """)
+
+
+def get_schema_version(conn):
+    """Повертає номер останньої застосованої міграції (0 для порожньої бази)."""
+    table = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'"
+    ).fetchone()
+    if not table:
+        return 0
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def latest_version():
+    """Версія схеми, яку очікує код."""
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def apply_migrations(conn):
+    """
+    Застосовує всі незастосовані міграції по порядку, кожну у власній транзакції.
+    BEGIN IMMEDIATE серіалізує воркери, що стартують одночасно: версія
+    перечитується вже під блокуванням запису. Повертає кількість застосованих міграцій.
+    """
+    if get_schema_version(conn) >= latest_version():
+        return 0
+
+    applied = 0
+    for version, description, steps in MIGRATIONS:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            _ensure_version_table(conn)
+            if get_schema_version(conn) >= version:
+                conn.rollback()
+                continue
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (version, description)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.error(f"Migration {version} ({description}) failed")
+            raise
+        applied += 1
+        logger.info(f"Applied migration {version}: {description}")
+    return applied
+
+
+def missing_indexes(conn):
+    """Повертає імена індексів з INDEXES, яких немає в базі."""
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    return [name for name, _, _ in INDEXES if name not in existing]
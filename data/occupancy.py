@@ -0,0 +1,83 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+# Зайнятість команди: скільки підлеглих відсутні кожного дня та кожного тижня
+# діапазону. Відпустки співробітника, що перетинаються, спочатку об'єднуються
+# (одна людина рахується один раз), далі кожен інтервал дає +1 у день початку
+# та -1 у день після кінця масиву різниць; накопичена сума - кількість
+# відсутніх за днями. Вартість - O(v log v + днів) замість O(людей × днів).
+
+MAX_RANGE_DAYS = 366
+
+
+def _merge(intervals, gap):
+    """
+    Об'єднує інтервали (співробітник, початок, кінець) одного співробітника, між
+    якими менше gap одиниць. Повертає масиви початків і кінців.
+    """
+    starts, ends = [], []
+    last_staff = None
+    for staff_id, start, end in sorted(intervals):
+        if staff_id == last_staff and start <= ends[-1] + gap:
+            if end > ends[-1]:
+                ends[-1] = end
+            continue
+        last_staff = staff_id
+        starts.append(start)
+        ends.append(end)
+    return np.array(starts, dtype=np.int64), np.array(ends, dtype=np.int64)
+
+
+def _counts(starts, ends, size):
+    """Кількість інтервалів [start, end], що покривають кожну з size позицій (масив різниць)."""
+    diff = np.bincount(starts, minlength=size + 1) - np.bincount(ends + 1, minlength=size + 1)
+    return np.cumsum(diff[:size])
+
+
+def compute(vacations, start_date, end_date, team_size=0):
+    """
+    Зайнятість за діапазоном [start_date, end_date] (date) для відпусток
+    vacations - рядків (staff_id, start_date, end_date) з ISO-датами.
+    Повертає {'start', 'end', 'team_size', 'daily': [кількість за днями],
+    'weeks': [{'week_start', 'absent', 'peak'}]}: absent - скільки людей
+    відсутні хоча б один день тижня (тижні з понеділка), peak - найбільше за день.
+    """
+    days = (end_date - start_date).days + 1
+    if days < 1 or days > MAX_RANGE_DAYS:
+        raise ValueError(f"Діапазон має містити від 1 до {MAX_RANGE_DAYS} днів")
+    origin = start_date.toordinal()
+    # Дні рахуються від понеділка тижня start_date, щоб індекс тижня був day // 7
+    week_offset = start_date.weekday()
+
+    intervals = []
+    for staff_id, vacation_start, vacation_end in vacations:
+        first = max(date.fromisoformat(vacation_start).toordinal() - origin, 0)
+        last = min(date.fromisoformat(vacation_end).toordinal() - origin, days - 1)
+        if first <= last:
+            intervals.append((staff_id, first, last))
+
+    daily_starts, daily_ends = _merge(intervals, gap=1)
+    daily = _counts(daily_starts, daily_ends, days)
+
+    week_count = (week_offset + days + 6) // 7
+    weekly_intervals = [(staff_id, (week_offset + first) // 7, (week_offset + last) // 7)
+                        for staff_id, first, last in intervals]
+    weekly_starts, weekly_ends = _merge(weekly_intervals, gap=0)
+    absent = _counts(weekly_starts, weekly_ends, week_count)
+
+    padded = np.zeros(week_count * 7, dtype=np.int64)
+    padded[week_offset:week_offset + days] = daily
+    peak = padded.reshape(week_count, 7).max(axis=1)
+
+    monday = start_date - timedelta(days=week_offset)
+    return {
+        'start': start_date.isoformat(),
+        'end': end_date.isoformat(),
+        'team_size': team_size,
+        'daily': daily.tolist(),
+        'weeks': [
+            {'week_start': (monday + timedelta(weeks=week)).isoformat(), 'absent': int(absent[week]), 'peak': int(peak[week])}
+            for week in range(week_count)
+        ],
+    }
@@ -0,0 +1,441 @@
+import sqlite3
+import logging
+import pandas as pd
+from utils.security import sanitize_series, ipn_mask
+from data import vacation_summary
+
+logger = logging.getLogger(__name__)
+
+# Кількість рядків файлу, що застосовуються в одній транзакції запису
+DEFAULT_CHUNK_SIZE = 1000
+
+IMPORT_COLUMNS = ['fio', 'ipn', 'role', 'manager_fio', 'vacation_days_per_year']
+DEFAULT_VACATION_DAYS = 24
+MAX_VACATION_DAYS_PER_YEAR = 366
+
+# Рядки файлу спершу завантажуються в тимчасову таблицю з'єднання (блокування
+# запису основної бази при цьому не береться), а потім застосовуються до staff
+# кількома set-based запитами на кожен блок рядків.
+_STAGING_TABLES = [
+    "DROP TABLE IF EXISTS temp.import_staging",
+    "DROP TABLE IF EXISTS temp.import_links",
+    "DROP TABLE IF EXISTS temp.import_paths",
+    "DROP TABLE IF EXISTS temp.import_affected",
+    "DROP TABLE IF EXISTS temp.import_frontier",
+    "DROP TABLE IF EXISTS temp.import_next",
+    """
+    CREATE TEMP TABLE import_staging (
+        row_no INTEGER PRIMARY KEY,
+        fio TEXT NOT NULL,
+        ipn TEXT NOT NULL,
+        role TEXT NOT NULL,
+        manager_fio TEXT,
+        vacation_days_per_year INTEGER NOT NULL,
+        staff_id INTEGER,
+        existed INTEGER
+    )
+    """,
+    "CREATE INDEX temp.idx_import_staging_ipn ON import_staging (ipn, row_no)",
+    "CREATE INDEX temp.idx_import_staging_role_fio ON import_staging (role, fio)",
+    """
+    CREATE TEMP TABLE import_links (
+        staff_id INTEGER PRIMARY KEY,
+        row_no INTEGER NOT NULL,
+        old_manager_id INTEGER,
+        new_manager_id INTEGER
+    )
+    """,
+    """
+    CREATE TEMP TABLE import_paths (
+        start_id INTEGER NOT NULL,
+        node_id INTEGER NOT NULL,
+        PRIMARY KEY (start_id, node_id)
+    ) WITHOUT ROWID
+    """,
+    "CREATE TEMP TABLE import_affected (staff_id INTEGER PRIMARY KEY, done INTEGER NOT NULL DEFAULT 0)",
+    "CREATE TEMP TABLE import_frontier (staff_id INTEGER PRIMARY KEY)",
+    "CREATE TEMP TABLE import_next (staff_id INTEGER PRIMARY KEY)",
+]
+
+_DROP_STAGING_TABLES = [statement for statement in _STAGING_TABLES if statement.startswith("DROP")]
+
+# Керівник, якого немає серед менеджерів ні в БД, ні у файлі, обнуляється
+_CLEAR_UNKNOWN_MANAGERS = """
+    UPDATE import_staging SET manager_fio = NULL
+    WHERE manager_fio IS NOT NULL
+      AND NOT EXISTS (SELECT 1 FROM staff WHERE role = 'Manager' AND fio = import_staging.manager_fio)
+      AND NOT EXISTS (SELECT 1 FROM import_staging m WHERE m.role = 'Manager' AND m.fio = import_staging.manager_fio)
+"""
+
+# Повтор ІПН всередині блоку теж рахується оновленням (як при построковій обробці)
+_MARK_EXISTING = """
+    UPDATE import_staging SET
+        staff_id = (SELECT id FROM staff WHERE staff.ipn = import_staging.ipn),
+        existed = EXISTS (SELECT 1 FROM staff WHERE staff.ipn = import_staging.ipn)
+               OR EXISTS (SELECT 1 FROM import_staging earlier
+                          WHERE earlier.ipn = import_staging.ipn
+                            AND earlier.row_no >= :first AND earlier.row_no < import_staging.row_no)
+    WHERE row_no BETWEEN :first AND :last
+"""
+
+# Зміна річної норми переноситься на залишок: remaining += new_per_year - old_per_year
+_UPSERT_STAFF = """
+    INSERT INTO staff (fio, ipn, role, manager_fio, vacation_days_per_year, remaining_vacation_days)
+    SELECT fio, ipn, role, manager_fio, vacation_days_per_year, vacation_days_per_year
+    FROM import_staging
+    WHERE row_no BETWEEN :first AND :last
+    ORDER BY row_no
+    ON CONFLICT (ipn) DO UPDATE SET
+        fio = excluded.fio,
+        role = excluded.role,
+        manager_fio = excluded.manager_fio,
+        remaining_vacation_days = remaining_vacation_days + excluded.vacation_days_per_year - vacation_days_per_year,
+        vacation_days_per_year = excluded.vacation_days_per_year
+"""
+
+_ASSIGN_NEW_IDS = """
+    UPDATE import_staging SET staff_id = (SELECT id FROM staff WHERE staff.ipn = import_staging.ipn)
+    WHERE row_no BETWEEN :first AND :last AND staff_id IS NULL
+"""
+
+_INSERT_NEW_NODES = """
+    INSERT OR IGNORE INTO staff_hierarchy (ancestor_id, descendant_id, depth)
+    SELECT staff_id, staff_id, 0 FROM import_staging
+    WHERE row_no BETWEEN :first AND :last AND existed = 0
+"""
+
+# Останній рядок файлу для кожного співробітника визначає його керівника
+_COLLECT_LINKS = """
+    INSERT OR REPLACE INTO import_links (staff_id, row_no, old_manager_id, new_manager_id)
+    SELECT st.staff_id, st.row_no, s.manager_id, (
+        SELECT m.id FROM staff m WHERE m.fio = st.manager_fio
+        ORDER BY m.role = 'Manager' DESC, m.id
+        LIMIT 1
+    )
+    FROM import_staging st
+    JOIN staff s ON s.id = st.staff_id
+    WHERE st.staff_id IS NOT NULL
+    ORDER BY st.row_no
+"""
+
+# Тимчасові таблиці не мають статистики, тому в з'єднаннях з ними порядок
+# закріплено через CROSS JOIN: робоча таблиця завжди є зовнішнім циклом.
+
+# Піддерева переприв'язаних співробітників (за старою ієрархією) - лише для
+# них перебудовуються рядки замикання
+_COLLECT_AFFECTED = """
+    INSERT OR IGNORE INTO import_affected (staff_id)
+    SELECT h.descendant_id FROM import_links l
+    CROSS JOIN staff_hierarchy h ON h.ancestor_id = l.staff_id
+"""
+
+# Готові до прив'язки: керівник поза зміненими піддеревами (його замикання
+# актуальне) або вже оброблений
+_READY_FRONTIER = """
+    INSERT INTO import_frontier (staff_id)
+    SELECT a.staff_id
+    FROM import_affected a
+    CROSS JOIN staff s ON s.id = a.staff_id
+    LEFT JOIN import_affected m ON m.staff_id = s.manager_id
+    WHERE a.done = 0 AND (m.staff_id IS NULL OR m.done = 1)
+"""
+
+_ATTACH_FRONTIER = """
+    INSERT INTO staff_hierarchy (ancestor_id, descendant_id, depth)
+    SELECT h.ancestor_id, f.staff_id, h.depth + 1
+    FROM import_frontier f
+    CROSS JOIN staff s ON s.id = f.staff_id
+    CROSS JOIN staff_hierarchy h ON h.descendant_id = s.manager_id
+"""
+
+_NEXT_FRONTIER = """
+    INSERT INTO import_next (staff_id)
+    SELECT s.id
+    FROM import_frontier f
+    CROSS JOIN staff s ON s.manager_id = f.staff_id
+    JOIN import_affected a ON a.staff_id = s.id AND a.done = 0
+"""
+
+# Шляхи вгору за новими manager_id від переприв'язаних співробітників, які
+# не вдалося прив'язати. UNION зупиняє обхід на повторі, тож цикл не зациклює запит.
+_TRACE_PATHS = """
+    INSERT INTO import_paths (start_id, node_id)
+    WITH RECURSIVE up(start_id, node_id) AS (
+        SELECT l.staff_id, l.new_manager_id
+        FROM import_links l
+        JOIN import_affected a ON a.staff_id = l.staff_id AND a.done = 0
+        WHERE l.new_manager_id IS NOT NULL
+        UNION
+        SELECT up.start_id, s.manager_id
+        FROM up
+        JOIN staff s ON s.id = up.node_id
+        WHERE s.manager_id IS NOT NULL AND up.node_id != up.start_id
+    )
+    SELECT start_id, node_id FROM up
+"""
+
+# У кожному циклі відкочується зміна з найпізнішого рядка файлу
+_CYCLE_BREAKERS = """
+    SELECT l.staff_id, l.row_no, st.ipn
+    FROM import_links l
+    JOIN import_staging st ON st.row_no = l.row_no
+    WHERE EXISTS (SELECT 1 FROM import_paths p WHERE p.start_id = l.staff_id AND p.node_id = l.staff_id)
+      AND NOT EXISTS (
+          SELECT 1 FROM import_paths p
+          JOIN import_links other ON other.staff_id = p.node_id
+          WHERE p.start_id = l.staff_id AND other.staff_id != l.staff_id AND other.row_no > l.row_no
+      )
+"""
+
+
+def _frames(employees, chunk_size):
+    """Пакети DataFrame передаються як є, окремі записи-словники групуються по chunk_size."""
+    if isinstance(employees, pd.DataFrame):
+        employees = [employees]
+    batch = []
+    for item in employees:
+        if isinstance(item, pd.DataFrame):
+            if batch:
+                yield pd.DataFrame(batch)
+                batch = []
+            yield item
+            continue
+        batch.append(item)
+        if len(batch) >= chunk_size:
+            yield pd.DataFrame(batch)
+            batch = []
+    if batch:
+        yield pd.DataFrame(batch)
+
+
+def validate_batch(frame, first_row_no):
+    """
+    Валідує пакет рядків файлу масками по стовпцях (без циклу по рядках Python):
+    обов'язкові поля, ІПН, роль та діапазон норми днів. bleach викликається лише
+    для значень з розміткою. Повертає (кортежі для import_staging,
+    {номер рядка: помилка}).
+    """
+    row_no = pd.RangeIndex(first_row_no, first_row_no + len(frame))
+    source = frame.reindex(columns=IMPORT_COLUMNS).set_axis(row_no)
+
+    fio = sanitize_series(source['fio'])
+    ipn = sanitize_series(source['ipn'])
+    manager_fio = sanitize_series(source['manager_fio'])
+    # Стовпець, якого немає у файлі, отримує значення за замовчуванням;
+    # порожня клітинка в наявному стовпці - помилка рядка
+    if 'role' in frame.columns:
+        role = sanitize_series(source['role'])
+    else:
+        role = pd.Series('Employee', index=row_no, dtype=object)
+    if 'vacation_days_per_year' in frame.columns:
+        days = pd.to_numeric(source['vacation_days_per_year'].astype(object), errors='coerce')
+    else:
+        days = pd.Series(DEFAULT_VACATION_DAYS, index=row_no, dtype=float)
+
+    missing = fio.isna() | ipn.isna()
+    bad_ipn = ~missing & ~ipn_mask(ipn)
+    bad_role = ~missing & ~bad_ipn & role.isna()
+    days_ok = days.notna() & (days % 1 == 0) & days.between(0, MAX_VACATION_DAYS_PER_YEAR)
+    bad_days = ~(missing | bad_ipn | bad_role) & ~days_ok
+
+    errors = {}
+    if missing.any():
+        original = frame.set_axis(row_no)[missing.to_numpy()]
+        for number, emp in original.astype(object).where(original.notna(), None).to_dict('index').items():
+            errors[number] = f"Пропущені обов'язкові поля для запису: {emp}"
+    for number, value in ipn[bad_ipn].items():
+        errors[number] = f"Некоректний ІПН: {value}"
+    for number, value in ipn[bad_role].items():
+        errors[number] = f"Помилка для запису з ІПН {value}: не вказано роль"
+    for number, value in ipn[bad_days].items():
+        errors[number] = (f"Помилка для запису з ІПН {value}: некоректна кількість днів відпустки "
+                          f"({source.at[number, 'vacation_days_per_year']}), очікується ціле число "
+                          f"від 0 до {MAX_VACATION_DAYS_PER_YEAR}")
+
+    valid = ~(missing | bad_ipn | bad_role | bad_days)
+    rows = list(zip(
+        row_no[valid.to_numpy()].tolist(),
+        fio[valid].tolist(),
+        ipn[valid].tolist(),
+        role[valid].tolist(),
+        manager_fio[valid].tolist(),
+        days[valid].astype(int).tolist(),
+    ))
+    return rows, dict(sorted(errors.items()))
+
+
+def _stage_rows(conn, employees, chunk_size):
+    """
+    Валідує пакети та завантажує коректні рядки до import_staging.
+    Повертає (кількість рядків, {номер рядка: помилка}).
+    """
+    errors = {}
+    row_count = 0
+    for frame in _frames(employees, chunk_size):
+        rows, batch_errors = validate_batch(frame, row_count + 1)
+        conn.executemany("""
+            INSERT INTO import_staging (row_no, fio, ipn, role, manager_fio, vacation_days_per_year)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, rows)
+        errors.update(batch_errors)
+        row_count += len(frame)
+    conn.execute(_CLEAR_UNKNOWN_MANAGERS)
+    conn.commit()
+    return row_count, errors
+
+
+def _apply_chunk(conn, first, last):
+    """Застосовує рядки first..last до staff в одній транзакції. Повертає (додано, оновлено)."""
+    params = {'first': first, 'last': last}
+    conn.execute("BEGIN IMMEDIATE")
+    conn.execute(_MARK_EXISTING, params)
+    conn.execute(_UPSERT_STAFF, params)
+    conn.execute(_ASSIGN_NEW_IDS, params)
+    conn.execute(_INSERT_NEW_NODES, params)
+    new_ids = [row[0] for row in conn.execute(
+        "SELECT DISTINCT staff_id FROM import_staging WHERE row_no BETWEEN :first AND :last AND existed = 0",
+        params
+    )]
+    vacation_summary.refresh(conn, new_ids)
+    counts = conn.execute("""
+        SELECT COUNT(*) - COALESCE(SUM(existed), 0), COALESCE(SUM(existed), 0)
+        FROM import_staging WHERE row_no BETWEEN :first AND :last
+    """, params).fetchone()
+    conn.commit()
+    return counts[0], counts[1]
+
+
+def _revert_links(conn, staff_ids):
+    """Повертає співробітникам попереднього керівника (manager_id та manager_fio)."""
+    conn.executemany("""
+        UPDATE staff SET
+            manager_id = (SELECT old_manager_id FROM import_links WHERE staff_id = :id),
+            manager_fio = (SELECT m.fio FROM import_links l JOIN staff m ON m.id = l.old_manager_id
+                           WHERE l.staff_id = :id)
+        WHERE id = :id
+    """, [{'id': staff_id} for staff_id in staff_ids])
+    conn.executemany("DELETE FROM import_links WHERE staff_id = ?", [(staff_id,) for staff_id in staff_ids])
+
+
+def _relink_hierarchy(conn):
+    """
+    Прив'язує імпортованих співробітників до керівників за id та перебудовує
+    таблицю замикання лише для змінених піддерев. Повертає список помилок.
+    """
+    errors = []
+    conn.execute("BEGIN IMMEDIATE")
+    conn.execute(_COLLECT_LINKS)
+    conn.execute("DELETE FROM import_links WHERE new_manager_id IS old_manager_id")
+
+    self_managed = conn.execute("""
+        SELECT l.staff_id, l.row_no, st.ipn FROM import_links l
+        JOIN import_staging st ON st.row_no = l.row_no
+        WHERE l.new_manager_id = l.staff_id
+    """).fetchall()
+    for row in self_managed:
+        errors.append(f"Рядок {row['row_no']}: помилка ієрархії для запису з ІПН {row['ipn']}: "
+                      f"Співробітник не може бути власним керівником.")
+    _revert_links(conn, [row['staff_id'] for row in self_managed])
+
+    conn.execute("""
+        UPDATE staff SET manager_id = (SELECT new_manager_id FROM import_links WHERE staff_id = staff.id)
+        WHERE id IN (SELECT staff_id FROM import_links)
+    """)
+
+    conn.execute(_COLLECT_AFFECTED)
+    conn.execute("""
+        DELETE FROM staff_hierarchy
+        WHERE descendant_id IN (SELECT staff_id FROM import_affected) AND depth > 0
+    """)
+
+    # Прив'язка рівень за рівнем згори вниз; вузли, до яких черга не дійшла,
+    # лежать у циклі або під ним - відкочуємо по одній зміні на цикл і продовжуємо
+    while True:
+        conn.execute(_READY_FRONTIER)
+        while conn.execute("SELECT 1 FROM import_frontier LIMIT 1").fetchone():
+            conn.execute(_ATTACH_FRONTIER)
+            conn.execute("UPDATE import_affected SET done = 1 WHERE staff_id IN (SELECT staff_id FROM import_frontier)")
+            conn.execute(_NEXT_FRONTIER)
+            conn.execute("DELETE FROM import_frontier")
+            conn.execute("INSERT INTO import_frontier (staff_id) SELECT staff_id FROM import_next")
+            conn.execute("DELETE FROM import_next")
+
+        if not conn.execute("SELECT 1 FROM import_affected WHERE done = 0 LIMIT 1").fetchone():
+            break
+        conn.execute("DELETE FROM import_paths")
+        conn.execute(_TRACE_PATHS)
+        breakers = conn.execute(_CYCLE_BREAKERS).fetchall()
+        if not breakers:
+            raise sqlite3.DatabaseError("staff hierarchy contains a cycle outside of the imported rows")
+        for row in breakers:
+            errors.append(f"Рядок {row['row_no']}: помилка ієрархії для запису з ІПН {row['ipn']}: "
+                          f"Керівник не може бути підлеглим цього співробітника.")
+        _revert_links(conn, [row['staff_id'] for row in breakers])
+    conn.commit()
+    return errors
+
+
+def import_employees(conn, employees, chunk_size=None, on_chunk=None):
+    """
+    Імпортує або оновлює співробітників за ІПН set-based запитами.
+
+    ``employees`` - DataFrame, ітерабельний набір пакетів DataFrame (як з
+    excel_handler.read_upload) або словників зі стовпцями IMPORT_COLUMNS;
+    кожен пакет валідується векторно (validate_batch). Рядки застосовуються блоками по
+    ``chunk_size`` з окремим комітом на кожен блок; ``on_chunk`` (якщо задано)
+    отримує звіт блоку: {'first_row', 'last_row', 'total_rows', 'imported',
+    'updated', 'errors'}.
+    Керівники прив'язуються після всіх блоків, тож менеджер може бути в будь-якому
+    місці файлу. Повертає (додано, оновлено, помилки).
+    """
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+    imported_count = 0
+    updated_count = 0
+    errors = []
+
+    for statement in _STAGING_TABLES:
+        conn.execute(statement)
+    try:
+        row_count, staging_errors = _stage_rows(conn, employees, chunk_size)
+        errors.extend(f"Рядок {row_no}: {message}" for row_no, message in staging_errors.items())
+
+        for first in range(1, row_count + 1, chunk_size):
+            last = min(first + chunk_size - 1, row_count)
+            chunk_errors = [f"Рядок {row_no}: {message}" for row_no, message in staging_errors.items()
+                            if first <= row_no <= last]
+            try:
+                imported, updated = _apply_chunk(conn, first, last)
+            except sqlite3.Error as e:
+                conn.rollback()
+                logger.error(f"Batch import chunk {first}-{last} failed: {e}")
+                imported, updated = 0, 0
+                failed_rows = conn.execute(
+                    "SELECT row_no, ipn FROM import_staging WHERE row_no BETWEEN ? AND ?", (first, last)
+                ).fetchall()
+                # Рядки блоку не збережені - виключаємо їх з прив'язки до керівників
+                conn.execute("DELETE FROM import_staging WHERE row_no BETWEEN ? AND ?", (first, last))
+                conn.commit()
+                failed = [f"Рядок {row['row_no']}: помилка збереження запису з ІПН {row['ipn']}: {e}"
+                          for row in failed_rows]
+                errors.extend(failed)
+                chunk_errors.extend(failed)
+            imported_count += imported
+            updated_count += updated
+            if on_chunk:
+                on_chunk({'first_row': first, 'last_row': last, 'total_rows': row_count,
+                          'imported': imported, 'updated': updated, 'errors': chunk_errors})
+
+        try:
+            errors.extend(_relink_hierarchy(conn))
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Batch import hierarchy update failed: {e}")
+            errors.append(f"Помилка оновлення ієрархії керівників: {e}")
+    finally:
+        conn.rollback()
+        for statement in _DROP_STAGING_TABLES:
+            conn.execute(statement)
+        conn.commit()
+
+    logger.info(f"Batch import completed: {imported_count} imported, {updated_count} updated, {len(errors)} errors")
+    return imported_count, updated_count, errors
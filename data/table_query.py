@@ -0,0 +1,133 @@
+import re
+
+# Переклад filter_query з dash_table.DataTable (filter_action='custom') у
+# параметризовану умову WHERE. Підтримуються вирази стовпців, з'єднані &&:
+#   {fio} icontains Іван && {remaining_vacation_days} >= 5
+# Імена стовпців беруться лише з білого списку, значення - лише через параметри.
+
+
+class FilterQueryError(ValueError):
+    """Вираз фільтра таблиці не підтримується або містить некоректне значення."""
+
+
+# Оператори, що можуть мати префікс s (з урахуванням регістру) або i (без)
+_CASE_OPERATORS = {'eq', 'ne', 'lt', 'le', 'gt', 'ge', 'contains'}
+_SYMBOL_OPERATORS = {'=': 'eq', '!=': 'ne', '<': 'lt', '<=': 'le', '>': 'gt', '>=': 'ge'}
+_COMPARISONS = {'eq': '=', 'ne': 'IS NOT', 'lt': '<', 'le': '<=', 'gt': '>', 'ge': '>='}
+_QUOTES = '"\'`'
+
+_CLAUSE_RE = re.compile(r'^\{(?P<column>[^{}]+)\}\s+(?P<operator>is\s+\w+|\S+)\s*(?P<value>.*)$', re.DOTALL)
+
+
+def _split_clauses(filter_query):
+    """Розбиває вираз за && поза лапками."""
+    clauses = []
+    current = []
+    quote = None
+    i = 0
+    while i < len(filter_query):
+        char = filter_query[i]
+        if quote:
+            current.append(char)
+            if char == '\\' and i + 1 < len(filter_query):
+                current.append(filter_query[i + 1])
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in _QUOTES:
+            quote = char
+            current.append(char)
+        elif filter_query.startswith('&&', i):
+            clauses.append(''.join(current).strip())
+            current = []
+            i += 1
+        elif filter_query.startswith('||', i) or char in '()':
+            raise FilterQueryError("Підтримуються лише умови стовпців, з'єднані &&")
+        else:
+            current.append(char)
+        i += 1
+    if quote:
+        raise FilterQueryError("Незакриті лапки у фільтрі")
+    clauses.append(''.join(current).strip())
+    return [clause for clause in clauses if clause]
+
+
+def _parse_value(raw, column, column_type):
+    raw = raw.strip()
+    if len(raw) >= 2 and raw[0] in _QUOTES and raw[-1] == raw[0]:
+        value = re.sub(r'\\(.)', r'\1', raw[1:-1])
+    else:
+        value = raw
+    if value == '':
+        raise FilterQueryError(f"Не вказано значення фільтра для {column}")
+    if column_type == 'INTEGER':
+        try:
+            return int(value)
+        except ValueError:
+            try:
+                return float(value)
+            except ValueError:
+                raise FilterQueryError(f"Значення фільтра для {column} має бути числом: {value}")
+    return value
+
+
+def _normalize_operator(operator):
+    """Повертає (оператор, чутливість до регістру)."""
+    operator = re.sub(r'\s+', ' ', operator.lower())
+    if operator in _SYMBOL_OPERATORS:
+        return _SYMBOL_OPERATORS[operator], True
+    if operator in _CASE_OPERATORS or operator in ('datestartswith', 'is blank', 'is nil'):
+        return operator, True
+    if operator[:1] in ('s', 'i') and operator[1:] in _CASE_OPERATORS:
+        return operator[1:], operator[0] == 's'
+    raise FilterQueryError(f"Непідтримуваний оператор фільтра: {operator}")
+
+
+def translate_filter(filter_query, columns, alias=None):
+    """
+    Перекладає filter_query у (умова WHERE, параметри).
+
+    ``columns`` - {id стовпця: (тип 'TEXT' або 'INTEGER', чи може бути NULL)};
+    лише ці стовпці дозволені у фільтрі. Порожній фільтр дає ('1', {}).
+    Порівняння тексту без урахування регістру використовують SQL-функцію
+    casefold, яку реєструє пул з'єднань. Викидає FilterQueryError.
+    """
+    conditions = []
+    params = {}
+    for clause in _split_clauses(filter_query or ''):
+        match = _CLAUSE_RE.match(clause)
+        if not match:
+            raise FilterQueryError(f"Некоректна умова фільтра: {clause}")
+        column = match.group('column').strip()
+        if column not in columns:
+            raise FilterQueryError(f"Фільтр за стовпцем {column} не підтримується")
+        column_type = columns[column][0]
+        operator, case_sensitive = _normalize_operator(match.group('operator'))
+        expression = f"{alias}.{column}" if alias else column
+
+        if operator == 'is blank':
+            conditions.append(f"({expression} IS NULL OR {expression} = '')")
+            continue
+        if operator == 'is nil':
+            conditions.append(f"{expression} IS NULL")
+            continue
+
+        name = f"filter_{len(params)}"
+        if operator in ('contains', 'datestartswith'):
+            value = str(_parse_value(match.group('value'), column, 'TEXT'))
+            if column_type != 'TEXT':
+                expression = f"CAST({expression} AS TEXT)"
+        else:
+            value = _parse_value(match.group('value'), column, column_type)
+        if not case_sensitive and column_type == 'TEXT':
+            expression = f"casefold({expression})"
+            value = value.casefold()
+        params[name] = value
+
+        if operator == 'contains':
+            conditions.append(f"instr({expression}, :{name}) > 0")
+        elif operator == 'datestartswith':
+            conditions.append(f"substr({expression}, 1, length(:{name})) = :{name}")
+        else:
+            conditions.append(f"{expression} {_COMPARISONS[operator]} :{name}")
+    return (' AND '.join(conditions) or '1'), params
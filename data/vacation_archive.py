@@ -0,0 +1,81 @@
+from datetime import date
+
+# Архів відпусток закритих років: гаряча таблиця vacations містить поточні
+# роки (та відпустки, на які посилається vacation_summary), тож її індекси не
+# ростуть з роками історії. Відпустки, що закінчились до archived_before,
+# переносяться у vacations_archive пакетами; представлення vacations_all
+# (UNION ALL обох таблиць) використовують сторінки історії за архівні роки.
+#
+# Інваріант: усі рядки архіву закінчуються до archived_before, тож запитам по
+# датах від archived_before і пізніше достатньо гарячої таблиці (source_for).
+
+HOT_TABLE = 'vacations'
+ALL_VIEW = 'vacations_all'
+
+# Скільки завершених років лишаються в гарячій таблиці (минулий рік - для річних звітів)
+DEFAULT_KEEP_CLOSED_YEARS = 1
+DEFAULT_BATCH_SIZE = 5000
+
+# Відпустки, на які посилається зведення (поточна, наступна, остання), не архівуються:
+# зведення та сторінки керівника читають лише гарячу таблицю
+_SELECT_BATCH = """
+    INSERT INTO archive_batch (id)
+    SELECT v.id FROM vacations v
+    WHERE v.start_date < :boundary AND v.end_date < :boundary
+      AND NOT EXISTS (
+          SELECT 1 FROM vacation_summary vs
+          WHERE vs.staff_id = v.staff_id
+            AND v.id IN (vs.current_vacation_id, vs.next_vacation_id, vs.last_vacation_id, vs.closest_vacation_id)
+      )
+    ORDER BY v.start_date
+    LIMIT :limit
+"""
+
+# Робоча таблиця з id поточного пакета (як робочі таблиці імпорту в data/staff_import.py)
+BATCH_TABLE = "CREATE TEMP TABLE IF NOT EXISTS archive_batch (id INTEGER PRIMARY KEY)"
+
+
+def archive_boundary(today=None, keep_closed_years=DEFAULT_KEEP_CLOSED_YEARS):
+    """Перший день першого року, що лишається гарячим (ISO)."""
+    year = (today or date.today()).year - keep_closed_years
+    return f"{year:04d}-01-01"
+
+
+def archived_before(conn):
+    """Межа архіву (ISO-дата) або None, якщо архівування ще не виконувалось."""
+    row = conn.execute("SELECT archived_before FROM vacation_archive_state WHERE id = 1").fetchone()
+    return row[0] if row else None
+
+
+def source_for(conn, start_date):
+    """Таблиця для запиту відпусток, що закінчуються не раніше start_date (ISO): гаряча або vacations_all."""
+    boundary = archived_before(conn)
+    return HOT_TABLE if boundary is None or start_date >= boundary else ALL_VIEW
+
+
+def archive_batch(conn, boundary, limit=DEFAULT_BATCH_SIZE):
+    """
+    Переносить до limit відпусток, що закінчились до boundary, в архів (у
+    транзакції викликача). Повертає кількість перенесених рядків.
+    """
+    conn.execute("""
+        INSERT INTO vacation_archive_state (id, archived_before) VALUES (1, :boundary)
+        ON CONFLICT (id) DO UPDATE SET archived_before = MAX(archived_before, excluded.archived_before)
+    """, {'boundary': boundary})
+    conn.execute(BATCH_TABLE)
+    conn.execute("DELETE FROM archive_batch")
+    moved = conn.execute(_SELECT_BATCH, {'boundary': boundary, 'limit': limit}).rowcount
+    if not moved:
+        return 0
+    # Спершу вставка: тригер журналу балансу не повертає дні за рядки, що вже в архіві
+    conn.execute("""
+        INSERT INTO vacations_archive (id, staff_id, start_date, end_date, total_days)
+        SELECT v.id, v.staff_id, v.start_date, v.end_date, v.total_days
+        FROM archive_batch b CROSS JOIN vacations v ON v.id = b.id
+    """)
+    # Тригери change_log пишуть для цих рядків 'archive', тригер версії їх пропускає:
+    # версія vacations зростає один раз на пакет
+    conn.execute("DELETE FROM vacations WHERE id IN (SELECT id FROM archive_batch)")
+    conn.execute("UPDATE table_versions SET version = version + 1 WHERE table_name = 'vacations'")
+    conn.execute("DELETE FROM archive_batch")
+    return moved
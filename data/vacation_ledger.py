@@ -0,0 +1,112 @@
+# Журнал балансу відпусток (vacation_ledger): лише додавання записів
+# нарахувань, бронювань та коригувань. Залишок співробітника - сума його
+# записів; staff.remaining_vacation_days лишається денормалізованим лічильником,
+# який змінюють шляхи запису (read-modify-write), а reconcile порівнює його з
+# журналом одним запитом і за потреби виправляє.
+#
+# Записи бронювань та нарахувань додають тригери міграцій 11-12 (data/migrations.py)
+# у тій самій транзакції, що й зміну відпустки чи річної норми, тому журнал не
+# залежить від коду, який перераховує лічильник. Значення entry_type у тригерах -
+# константи ENTRY_* нижче.
+
+ENTRY_OPENING = 'opening'        # Початковий залишок (новий співробітник або запуск журналу)
+ENTRY_ACCRUAL = 'accrual'        # Нарахування: зміна річної норми, щорічне нарахування
+ENTRY_BOOKING = 'booking'        # Бронювання (-дні) та його скасування (+дні)
+ENTRY_ADJUSTMENT = 'adjustment'  # Ручне коригування
+ENTRY_EXPIRY = 'expiry'          # Згоряння залишку понад ліміт перенесення
+
+ROLLOVER_REFERENCE = 'rollover:{year}'
+
+
+def _drift(conn):
+    # Баланс кожного співробітника - сума за покривним індексом (staff_id, days)
+    return [dict(row) for row in conn.execute("""
+        SELECT staff_id, fio, remaining, ledger_balance, remaining - ledger_balance AS drift
+        FROM (
+            SELECT s.id AS staff_id, s.fio, s.remaining_vacation_days AS remaining,
+                   (SELECT COALESCE(SUM(l.days), 0) FROM vacation_ledger l WHERE l.staff_id = s.id) AS ledger_balance
+            FROM staff s
+        )
+        WHERE remaining IS NOT ledger_balance
+        ORDER BY staff_id
+    """)]
+
+
+def reconcile(conn, repair=False):
+    """
+    Порівнює залишки всіх співробітників із журналом одним запитом.
+    Повертає {'checked', 'drifted': [{'staff_id', 'fio', 'remaining',
+    'ledger_balance', 'drift'}], 'repaired'}; з repair=True лічильники з
+    розбіжністю встановлюються в баланс журналу (коміт - на стороні викликача).
+    """
+    checked = conn.execute("SELECT COUNT(*) FROM staff").fetchone()[0]
+    drifted = _drift(conn)
+    repaired = 0
+    if repair and drifted:
+        # Умова на старе значення: рядок, змінений після звіту, не перезаписується
+        repaired = conn.executemany(
+            "UPDATE staff SET remaining_vacation_days = ? WHERE id = ? AND remaining_vacation_days = ?",
+            [(row['ledger_balance'], row['staff_id'], row['remaining']) for row in drifted]
+        ).rowcount
+    return {'checked': checked, 'drifted': drifted, 'repaired': repaired}
+
+
+def adjust(conn, staff_id, days, reference=None):
+    """Ручне коригування залишку: запис журналу та зміна лічильника. Повертає False, якщо співробітника немає."""
+    updated = conn.execute(
+        "UPDATE staff SET remaining_vacation_days = remaining_vacation_days + ? WHERE id = ?", (days, staff_id)
+    ).rowcount
+    if not updated:
+        return False
+    conn.execute(
+        "INSERT INTO vacation_ledger (staff_id, entry_type, days, reference) VALUES (?, ?, ?, ?)",
+        (staff_id, ENTRY_ADJUSTMENT, days, reference)
+    )
+    return True
+
+
+def annual_rollover(conn, year, carry_over_limit=None):
+    """
+    Щорічне нарахування для всіх співробітників кількома запитами: спершу
+    (якщо задано carry_over_limit) згоряє баланс журналу понад ліміт, потім
+    нараховується річна норма, і лічильники змінюються на суму записів цього
+    нарахування. Повторний запуск за той самий рік - ValueError.
+    Повертає {'year', 'accrued', 'expired'} (кількість співробітників).
+    """
+    reference = ROLLOVER_REFERENCE.format(year=int(year))
+    if conn.execute("SELECT 1 FROM vacation_ledger WHERE reference = ? LIMIT 1", (reference,)).fetchone():
+        raise ValueError(f"Щорічне нарахування за {int(year)} рік уже виконано")
+
+    expired = 0
+    if carry_over_limit is not None:
+        expired = conn.execute(f"""
+            INSERT INTO vacation_ledger (staff_id, entry_type, days, reference)
+            SELECT staff_id, '{ENTRY_EXPIRY}', :limit - balance, :reference
+            FROM (
+                SELECT s.id AS staff_id,
+                       (SELECT SUM(l.days) FROM vacation_ledger l WHERE l.staff_id = s.id) AS balance
+                FROM staff s
+            )
+            WHERE balance > :limit
+        """, {'limit': carry_over_limit, 'reference': reference}).rowcount
+    accrued = conn.execute(f"""
+        INSERT INTO vacation_ledger (staff_id, entry_type, days, reference)
+        SELECT id, '{ENTRY_ACCRUAL}', vacation_days_per_year, ? FROM staff
+        WHERE vacation_days_per_year != 0
+    """, (reference,)).rowcount
+    conn.execute("""
+        UPDATE staff SET remaining_vacation_days = remaining_vacation_days + (
+            SELECT SUM(l.days) FROM vacation_ledger l WHERE l.reference = :reference AND l.staff_id = staff.id
+        )
+        WHERE id IN (SELECT staff_id FROM vacation_ledger WHERE reference = :reference)
+    """, {'reference': reference})
+    return {'year': int(year), 'accrued': accrued, 'expired': expired}
+
+
+def entries(conn, staff_id):
+    """Записи журналу співробітника від найновішого."""
+    return [dict(row) for row in conn.execute("""
+        SELECT id, entry_type, days, vacation_id, reference, created_at
+        FROM vacation_ledger WHERE staff_id = ?
+        ORDER BY id DESC
+    """, (staff_id,))]
@@ -0,0 +1,104 @@
+# Перевірка перетину відпусток одного співробітника.
+#
+# Інваріант: відпустки співробітника не перетинаються (його підтримують
+# add_vacation та update_employee_data_and_vacation), тож упорядковані за
+# початком вони впорядковані й за кінцем. Тому новий період [start, end]
+# перетинається з якоюсь відпусткою тоді й лише тоді, коли перетинається з
+# відпусткою з найпізнішим start_date <= end. Це один пошук у покривному
+# індексі (staff_id, start_date, end_date) - O(log n) без читання рядків таблиці.
+# Дати зберігаються як ISO-рядки, тож порівнюються як рядки без перетворень.
+# Архів закритих років (vacations_archive) перевіряється таким самим пошуком.
+#
+# Перетини, що існували до перевірки, інваріант порушують: міграція 13 записує
+# таких співробітників у legacy_overlap_staff, і для них після пошуку виконується
+# ще й перевірка діапазону (start_date <= end AND end_date >= start) за тим самим індексом.
+
+_TABLES = ('vacations', 'vacations_archive')
+
+# Максимальна кількість id в одному IN (...) (ліміт змінних SQLite з запасом)
+_CHUNK_SIZE = 500
+
+
+def find_overlap(conn, staff_id, start_date, end_date, exclude_id=None):
+    """
+    Відпустка співробітника, що перетинається з періодом [start_date, end_date]
+    (обидві дати включно), як {'id', 'start_date', 'end_date'} або None.
+    exclude_id - відпустка, яку редагують (не порівнюється сама з собою).
+    """
+    params = {'staff_id': staff_id, 'start': start_date, 'end': end_date, 'exclude': exclude_id}
+    for table in _TABLES:
+        row = conn.execute(f"""
+            SELECT id, start_date, end_date FROM {table}
+            WHERE staff_id = :staff_id AND start_date <= :end AND id IS NOT :exclude
+            ORDER BY start_date DESC
+            LIMIT 1
+        """, params).fetchone()
+        if row is not None and row['end_date'] >= start_date:
+            return {'id': row['id'], 'start_date': row['start_date'], 'end_date': row['end_date']}
+    if conn.execute("SELECT 1 FROM legacy_overlap_staff WHERE staff_id = ?", (staff_id,)).fetchone():
+        for table in _TABLES:
+            row = conn.execute(f"""
+                SELECT id, start_date, end_date FROM {table}
+                WHERE staff_id = :staff_id AND start_date <= :end AND end_date >= :start AND id IS NOT :exclude
+                LIMIT 1
+            """, params).fetchone()
+            if row is not None:
+                return {'id': row['id'], 'start_date': row['start_date'], 'end_date': row['end_date']}
+    return None
+
+
+def find_overlaps(conn, vacations):
+    """
+    Перевіряє пакет нових відпусток [(staff_id, start_date, end_date), ...] одним
+    проходом: з наявними відпустками тих самих співробітників і між собою.
+    Повертає список конфліктів {'index', 'staff_id', 'start_date', 'end_date',
+    'conflicts_with'} за зростанням index; conflicts_with - {'vacation_id': id}
+    для наявної відпустки або {'index': i} для іншого рядка пакета.
+    """
+    by_staff = {}
+    for index, (staff_id, start_date, end_date) in enumerate(vacations):
+        by_staff.setdefault(staff_id, []).append((start_date, end_date, ('index', index)))
+
+    staff_ids = list(by_staff)
+    for i in range(0, len(staff_ids), _CHUNK_SIZE):
+        chunk = staff_ids[i:i + _CHUNK_SIZE]
+        placeholders = ', '.join('?' * len(chunk))
+        for row in conn.execute(f"""
+            SELECT staff_id, start_date, end_date, id FROM vacations_all WHERE staff_id IN ({placeholders})
+        """, chunk):
+            by_staff[row['staff_id']].append((row['start_date'], row['end_date'], ('vacation_id', row['id'])))
+
+    conflicts = {}
+    for staff_id, intervals in by_staff.items():
+        intervals.sort()
+        # Інтервал перетинається з якимось попереднім, якщо його початок не пізніше
+        # найбільшого кінця попередніх, і з якимось наступним - якщо наступний
+        # за порядком інтервал починається не пізніше його кінця
+        widest = None
+        for position, (start_date, end_date, source) in enumerate(intervals):
+            partner = None
+            if widest is not None and start_date <= widest[1]:
+                partner = widest[2]
+            elif position + 1 < len(intervals) and intervals[position + 1][0] <= end_date:
+                partner = intervals[position + 1][2]
+            if partner is not None and source[0] == 'index':
+                conflicts[source[1]] = {
+                    'index': source[1], 'staff_id': staff_id, 'start_date': start_date, 'end_date': end_date,
+                    'conflicts_with': {partner[0]: partner[1]},
+                }
+            if widest is None or end_date > widest[1]:
+                widest = (start_date, end_date, source)
+    return [conflicts[index] for index in sorted(conflicts)]
+
+
+def count_existing_overlaps(conn):
+    """Кількість наявних відпусток, що перетинаються з попередньою відпусткою того ж співробітника."""
+    return conn.execute("""
+        SELECT COUNT(*) FROM (
+            SELECT start_date, MAX(end_date) OVER (
+                PARTITION BY staff_id ORDER BY start_date, id
+                ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+            ) AS previous_end
+            FROM vacations
+        ) WHERE start_date <= previous_end
+    """).fetchone()[0]
@@ -0,0 +1,92 @@
+from datetime import date
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Максимальна кількість id в одному IN (...) (ліміт змінних SQLite з запасом)
+_CHUNK_SIZE = 500
+
+# Для кожного співробітника зберігається поточна (з кількох - та, що почалась
+# пізніше), наступна та остання завершена відпустка відносно дня computed_for,
+# а також найближча за датою початку з поточної/останньої та наступної
+# (за рівної відстані - наступна). valid_until - перший день, коли цей вибір
+# зміниться сам по собі (закінчиться поточна, почнеться наступна або наступна
+# стане ближчою за вже розпочату); NULL - без нових записів не зміниться ніколи.
+_REFRESH_SQL = """
+    INSERT OR REPLACE INTO vacation_summary
+        (staff_id, current_vacation_id, next_vacation_id, last_vacation_id,
+         closest_vacation_id, valid_until, computed_for)
+    SELECT
+        ids.staff_id, ids.current_id, ids.next_id, ids.last_id,
+        CASE
+            WHEN nxt.id IS NULL THEN started.id
+            WHEN started.id IS NULL THEN nxt.id
+            WHEN julianday(:today) - julianday(started.start_date)
+                 < julianday(nxt.start_date) - julianday(:today) THEN started.id
+            ELSE nxt.id
+        END,
+        NULLIF(MIN(
+            COALESCE(date(cur.end_date, '+1 day'), '9999-12-31'),
+            COALESCE(nxt.start_date, '9999-12-31'),
+            COALESCE(date(started.start_date, '+' || CAST(
+                (julianday(nxt.start_date) - julianday(started.start_date) + 1) / 2 AS INTEGER
+            ) || ' days'), '9999-12-31')
+        ), '9999-12-31'),
+        :today
+    FROM (
+        SELECT
+            s.id AS staff_id,
+            (SELECT id FROM vacations WHERE staff_id = s.id AND end_date >= :today AND start_date <= :today
+             ORDER BY start_date DESC LIMIT 1) AS current_id,
+            (SELECT id FROM vacations WHERE staff_id = s.id AND start_date > :today
+             ORDER BY start_date LIMIT 1) AS next_id,
+            (SELECT id FROM vacations WHERE staff_id = s.id AND end_date < :today
+             ORDER BY end_date DESC LIMIT 1) AS last_id
+        FROM staff s
+        WHERE {staff_filter}
+    ) ids
+    LEFT JOIN vacations cur ON cur.id = ids.current_id
+    LEFT JOIN vacations nxt ON nxt.id = ids.next_id
+    LEFT JOIN vacations started ON started.id = COALESCE(ids.current_id, ids.last_id)
+"""
+
+
+def _today_iso(today=None):
+    return (today or date.today()).isoformat()
+
+
+def refresh(conn, staff_ids, today=None):
+    """Перераховує зведення для вказаних співробітників (у транзакції викликача)."""
+    staff_ids = [staff_id for staff_id in staff_ids if staff_id is not None]
+    today_iso = _today_iso(today)
+    for offset in range(0, len(staff_ids), _CHUNK_SIZE):
+        chunk = staff_ids[offset:offset + _CHUNK_SIZE]
+        params = {'today': today_iso}
+        params.update({f'id{i}': staff_id for i, staff_id in enumerate(chunk)})
+        placeholders = ', '.join(f':id{i}' for i in range(len(chunk)))
+        conn.execute(_REFRESH_SQL.format(staff_filter=f"s.id IN ({placeholders})"), params)
+
+
+def rebuild(conn, today=None):
+    """Перераховує зведення для всіх співробітників."""
+    conn.execute(_REFRESH_SQL.format(staff_filter="1"), {'today': _today_iso(today)})
+
+
+def has_expired(conn, today=None):
+    """Чи є зведення, термін дії яких минув до ``today`` (лише читання за індексом valid_until)."""
+    return conn.execute(
+        "SELECT 1 FROM vacation_summary WHERE valid_until <= ? LIMIT 1", (_today_iso(today),)
+    ).fetchone() is not None
+
+
+def roll_forward(conn, today=None):
+    """
+    Оновлює лише ті зведення, термін дії яких минув до ``today``
+    (відпустка закінчилась або почалась). Повертає кількість оновлених рядків.
+    """
+    today_iso = _today_iso(today)
+    staff_ids = [row[0] for row in conn.execute(
+        "SELECT staff_id FROM vacation_summary WHERE valid_until <= ?", (today_iso,)
+    )]
+    refresh(conn, staff_ids, today)
+    return len(staff_ids)
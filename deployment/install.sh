@@ -142,6 +142,9 @@ ufw allow 'Nginx Full'
 # Налаштування cron для бекапів
 echo "💾 Налаштування автоматичних бекапів..."
 (crontab -l 2>/dev/null; echo "0 2 * * * $APP_DIR/scripts/backup.sh") | crontab -
+(crontab -l 2>/dev/null; echo "5 0 * * * cd $APP_DIR && $APP_DIR/venv/bin/python scripts/roll_forward_vacations.py") | crontab -
+(crontab -l 2>/dev/null; echo "15 0 * * * cd $APP_DIR && $APP_DIR/venv/bin/python scripts/compact_change_log.py") | crontab -
+(crontab -l 2>/dev/null; echo "25 0 * * * cd $APP_DIR && $APP_DIR/venv/bin/python scripts/archive_vacations.py") | crontab -
 
 # Запуск сервісів
 echo "🚀 Запуск сервісів..."
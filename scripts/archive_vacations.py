@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+Нічна задача: переносить відпустки закритих років у vacations_archive
+(див. data/vacation_archive.py); гаряча таблиця vacations лишається малою.
+Використання (cron): cd /opt/vacation-dashboard && venv/bin/python scripts/archive_vacations.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data import db_operations
+
+
+def main():
+    db_operations._init_db()
+    result = db_operations.archive_closed_vacations()
+    print(f"Vacations archived before {result['archived_before']}: {result['archived']}")
+
+
+if __name__ == "__main__":
+    main()
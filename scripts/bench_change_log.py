@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк та перевірка журналу змін (change_log, data/change_log.py).
+
+Без журналу споживач (кеш, експорт, зовнішня синхронізація) мусить щоразу
+перечитувати всі рядки staff. Тепер він запам'ятовує позицію і дочитує лише
+нові записи через changes_since(). Для 30k співробітників вимірюються ціна
+тригерів при запису, повне перечитування проти наздоганяння 100 змін та
+ефект ущільнення. Перевіряється, що копія staff, яку споживач підтримує лише
+за журналом, збігається з базою - зокрема після ущільнення та при читанні
+з позиції всередині ущільненого діапазону; читання з очищеної позиції
+викидає ChangeLogTruncatedError.
+"""
+
+import sys
+import os
+import random
+import tempfile
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data import db_operations, change_log
+
+STAFF_COUNT = 30000
+CHANGE_COUNT = 100
+BATCH_SIZE = 500
+
+STAFF_COLUMNS = "id, fio, ipn, role, manager_fio, vacation_days_per_year, remaining_vacation_days"
+
+
+def insert_staff(size):
+    rows = [
+        (f"Співробітник {i}", f"{1000000000 + i}", 'Manager' if i % 10 == 0 else 'Employee',
+         f"Співробітник {i - i % 10}" if i % 10 else None, 24, 24)
+        for i in range(size)
+    ]
+    start = time.perf_counter()
+    with db_operations.db_connection() as conn:
+        conn.executemany("""
+            INSERT INTO staff (fio, ipn, role, manager_fio, vacation_days_per_year, remaining_vacation_days)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, rows)
+        conn.execute("UPDATE staff SET remaining_vacation_days = remaining_vacation_days - 1")
+        conn.commit()
+    return time.perf_counter() - start
+
+
+def read_all_staff():
+    with db_operations.db_connection() as conn:
+        return {row['id']: dict(row) for row in conn.execute(f"SELECT {STAFF_COLUMNS} FROM staff")}
+
+
+class StaffMirror:
+    """Споживач журналу: копія staff, що оновлюється лише за змінами."""
+
+    def __init__(self):
+        self.position = db_operations.get_change_log_position()
+        self.rows = read_all_staff()
+
+    def catch_up(self):
+        while True:
+            entries, self.position = db_operations.changes_since(self.position, BATCH_SIZE)
+            staff = [entry for entry in entries if entry['table'] == 'staff']
+            changed = {entry['row_id'] for entry in staff if entry['operation'] != change_log.OPERATION_DELETE}
+            for entry in staff:
+                if entry['operation'] == change_log.OPERATION_DELETE:
+                    self.rows.pop(entry['row_id'], None)
+            if changed:
+                placeholders = ', '.join('?' * len(changed))
+                with db_operations.db_connection() as conn:
+                    for row in conn.execute(f"SELECT {STAFF_COLUMNS} FROM staff WHERE id IN ({placeholders})",
+                                            list(changed)):
+                        self.rows[row['id']] = dict(row)
+            if len(entries) < BATCH_SIZE:
+                return
+
+
+def random_changes(rng, count, first):
+    """Записи через db_operations: нові співробітники, правки, відпустки, видалення."""
+    ids = list(read_all_staff())
+    for i in range(first, first + count):
+        kind = i % 4
+        employee_id = rng.choice(ids)
+        if kind == 0:
+            ids.append(db_operations.add_employee(f"Новий {i}", f"{1900000000 + i}", 'Співробітник 0', 'Employee', 24))
+        elif kind == 1:
+            employee = db_operations.get_employee_by_id(employee_id)
+            db_operations.update_employee_data_and_vacation(employee_id, {
+                'fio': employee['fio'], 'ipn': employee['ipn'], 'role': employee['role'],
+                'manager_fio': employee['manager_fio'], 'vacation_days_per_year': employee['vacation_days_per_year'] + 1,
+            })
+        elif kind == 2:
+            db_operations.add_vacation(employee_id, '2030-06-01', '2030-06-03', 3)
+        else:
+            db_operations.delete_employee(employee_id)
+            ids.remove(employee_id)
+
+
+def log_size():
+    with db_operations.db_connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM change_log").fetchone()[0]
+
+
+def main():
+    failures = 0
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"🧪 Change log: {STAFF_COUNT} staff, {CHANGE_COUNT} changes")
+        print("-" * 50)
+        timings = {}
+        for name, with_log in (('without log', False), ('with log', True)):
+            db_operations.configure_database(os.path.join(tmp, f'{name}.db'))
+            db_operations._init_db()
+            if not with_log:
+                with db_operations.db_connection() as conn:
+                    for (trigger,) in conn.execute(
+                            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%change_log%'").fetchall():
+                        conn.execute(f"DROP TRIGGER {trigger}")
+                    conn.commit()
+            timings[name] = insert_staff(STAFF_COUNT)
+            print(f"{name:>12}: insert + update {STAFF_COUNT} staff {timings[name] * 1e3:>7.1f}ms")
+        print(f"{'':>12}  trigger overhead {(timings['with log'] / timings['without log'] - 1) * 100:>6.0f}%")
+
+        mirror = StaffMirror()
+        start_position = mirror.position
+        random_changes(rng, CHANGE_COUNT, 0)
+
+        start = time.perf_counter()
+        read_all_staff()
+        full_time = time.perf_counter() - start
+        start = time.perf_counter()
+        mirror.catch_up()
+        incremental_time = time.perf_counter() - start
+        print(f"full re-read {full_time * 1e3:>7.1f}ms, catch up {CHANGE_COUNT} changes {incremental_time * 1e3:>6.2f}ms")
+        if mirror.rows != read_all_staff():
+            print("❌ Mirror built from the change log differs from staff")
+            failures += 1
+        else:
+            print("✅ Mirror built from the change log matches staff")
+
+        # Споживач, що відстав на середину ущільненого діапазону
+        entries, _ = db_operations.changes_since(start_position, 10 ** 9)
+        lagging_position = entries[len(entries) // 2]['seq']
+        lagging = StaffMirror()
+        lagging.position = lagging_position
+        lagging.rows = {}
+        before = log_size()
+        with db_operations.db_connection() as conn:
+            removed = change_log.compact(conn, change_log.position(conn))
+            conn.commit()
+        print(f"compaction: {before} → {log_size()} entries ({removed} merged)")
+        if removed == 0 or log_size() != before - removed:
+            print("❌ Compaction did not merge entries")
+            failures += 1
+
+        random_changes(rng, CHANGE_COUNT, CHANGE_COUNT)
+        mirror.catch_up()
+        lagging_full = StaffMirror()
+        lagging_full.rows = {}
+        lagging_full.position = 0
+        lagging_full.catch_up()
+        actual = read_all_staff()
+        if mirror.rows != actual or lagging_full.rows != actual:
+            print("❌ Consumers diverged after compaction")
+            failures += 1
+        else:
+            print("✅ Consumers stay in sync after compaction (including a replay from 0)")
+        # Відсталий споживач бачить кожен рядок, змінений після його позиції
+        lagging.catch_up()
+        expected_ids = {entry['row_id'] for entry in entries if entry['seq'] > lagging_position
+                        and entry['table'] == 'staff' and entry['operation'] != change_log.OPERATION_DELETE}
+        missing = {row_id for row_id in expected_ids if row_id in actual and row_id not in lagging.rows}
+        if missing:
+            print(f"❌ Lagging consumer missed {len(missing)} changed rows")
+            failures += 1
+        else:
+            print("✅ Consumer reading from inside the compacted range sees every changed row")
+
+        with db_operations.db_connection() as conn:
+            change_log.prune(conn, change_log.position(conn) - 10)
+            conn.commit()
+        try:
+            db_operations.changes_since(start_position)
+            print("❌ Reading from a pruned position did not fail")
+            failures += 1
+        except change_log.ChangeLogTruncatedError:
+            print("✅ Reading from a pruned position raises ChangeLogTruncatedError")
+        db_operations._watcher.reset()
+        db_operations._pool.close_all()
+
+    print("-" * 50)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк: серверна пагінація, сортування та фільтр таблиці співробітників.
+
+Раніше таблиця all-employees-table отримувала всіх співробітників і сама
+ділила їх на сторінки в браузері. Тепер get_employees_page() повертає лише
+видиму сторінку. Для 30k співробітників порівнюються розмір відповіді та час
+повного списку й однієї сторінки, а також keyset- та OFFSET-пагінація для
+глибоких сторінок. Перевіряється, що обхід усіх сторінок з сортуванням і
+фільтром дає той самий результат, що й фільтрація та сортування в Python.
+"""
+
+import sys
+import os
+import json
+import tempfile
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data import db_operations
+from data.table_query import FilterQueryError
+
+STAFF_COUNT = 30000
+PAGE_SIZE = 10
+REPEATS = 5
+DEEP_PAGES = [100, 1000, 2900]
+
+# (filter_query, sort_by, фільтр Python, ключ сортування Python, у зворотному порядку);
+# NULL у SQLite менший за будь-який рядок
+CASES = [
+    ('', [], lambda e: True, lambda e: e['id'], False),
+    ('{fio} icontains "співробітник 12"', [{'column_id': 'fio', 'direction': 'asc'}],
+     lambda e: 'співробітник 12' in e['fio'].casefold(), lambda e: (e['fio'], e['id']), False),
+    ('{role} = Manager && {remaining_vacation_days} >= 20', [{'column_id': 'remaining_vacation_days', 'direction': 'desc'}],
+     lambda e: e['role'] == 'Manager' and e['remaining_vacation_days'] >= 20,
+     lambda e: (e['remaining_vacation_days'], e['id']), True),
+    ('{manager_fio} is blank', [{'column_id': 'manager_fio', 'direction': 'asc'}],
+     lambda e: not e['manager_fio'], lambda e: (e['manager_fio'] is not None, e['manager_fio'] or '', e['id']), False),
+    ('{manager_fio} scontains "Співробітник 10" && {ipn} > 1000010000', [{'column_id': 'manager_fio', 'direction': 'desc'}],
+     lambda e: 'Співробітник 10' in (e['manager_fio'] or '') and e['ipn'] > '1000010000',
+     lambda e: (e['manager_fio'] is not None, e['manager_fio'] or '', e['id']), True),
+]
+
+
+def build_org(size):
+    rows = [
+        (f"Співробітник {i}", f"{1000000000 + i}", 'Manager' if i % 10 == 0 else 'Employee',
+         f"Співробітник {i - i % 10}" if i % 10 else None, 24, 24 - i % 25)
+        for i in range(size)
+    ]
+    with db_operations.db_connection() as conn:
+        conn.executemany("""
+            INSERT INTO staff (fio, ipn, role, manager_fio, vacation_days_per_year, remaining_vacation_days)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, rows)
+        conn.commit()
+
+
+def best_time(call):
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = call()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def payload(data):
+    return len(json.dumps(data, ensure_ascii=False).encode('utf-8'))
+
+
+def all_pages(filter_query, sort_by):
+    # Сортування за стовпцем з NULL не дає курсора - тоді сторінки за offset (як у app.py)
+    rows, cursor, total = db_operations.get_employees_page(filter_query, sort_by, PAGE_SIZE)
+    while cursor or len(rows) < total:
+        page_rows, cursor, total = db_operations.get_employees_page(
+            filter_query, sort_by, PAGE_SIZE, after=cursor, offset=len(rows))
+        if not page_rows:
+            break
+        rows.extend(page_rows)
+    return rows, total
+
+
+def check_correctness():
+    employees = db_operations._load_all_employees()
+    failures = 0
+    for filter_query, sort_by, predicate, key, reverse in CASES:
+        expected = [e['id'] for e in sorted(filter(predicate, employees), key=key, reverse=reverse)]
+        rows, total = all_pages(filter_query, sort_by)
+        actual = [row['id'] for row in rows]
+        if actual != expected or total != len(expected):
+            print(f"❌ {filter_query or '(no filter)'}: {len(actual)} rows, total {total}, expected {len(expected)}")
+            failures += 1
+        else:
+            print(f"✅ {filter_query or '(no filter)'}: {total} rows in order")
+    for bad_filter in ('{fio} contains a || {fio} contains b', '{salary} > 5', '{remaining_vacation_days} > abc'):
+        try:
+            db_operations.get_employees_page(bad_filter)
+            print(f"❌ Accepted unsupported filter: {bad_filter}")
+            failures += 1
+        except FilterQueryError:
+            print(f"✅ Rejected unsupported filter: {bad_filter}")
+    return failures
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_operations.configure_database(os.path.join(tmp, 'bench.db'))
+        db_operations._init_db()
+        build_org(STAFF_COUNT)
+
+        print(f"🧪 Employees table: {STAFF_COUNT} staff, page size {PAGE_SIZE}")
+        print("-" * 50)
+        full_time, full = best_time(db_operations._load_all_employees)
+        page_time, (page, _, _) = best_time(lambda: db_operations.get_employees_page(None, [], PAGE_SIZE))
+        print(f"all rows:  {payload(full) / 1024:>8.0f}KB {full_time * 1e3:>7.1f}ms")
+        print(f"one page:  {payload(page) / 1024:>8.1f}KB {page_time * 1e3:>7.1f}ms")
+
+        sort_by = [{'column_id': 'fio', 'direction': 'asc'}]
+        print(f"{'page':>6} {'offset':>9} {'keyset':>9}")
+        for deep_page in DEEP_PAGES:
+            offset_time, (offset_rows, _, _) = best_time(lambda: db_operations.get_employees_page(
+                None, sort_by, PAGE_SIZE, offset=(deep_page - 1) * PAGE_SIZE))
+            cursor_before = db_operations.get_employees_page(
+                None, sort_by, PAGE_SIZE, offset=(deep_page - 2) * PAGE_SIZE)[1]
+            keyset_time, (keyset_rows, _, _) = best_time(lambda: db_operations.get_employees_page(
+                None, sort_by, PAGE_SIZE, after=cursor_before))
+            if keyset_rows != offset_rows:
+                print(f"❌ Keyset and offset pages differ at page {deep_page}")
+                sys.exit(1)
+            print(f"{deep_page:>6} {offset_time * 1e3:>7.2f}ms {keyset_time * 1e3:>7.2f}ms")
+        print("-" * 50)
+
+        failures = check_correctness()
+        db_operations._pool.close_all()
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
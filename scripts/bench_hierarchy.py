@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк: вибірка підлеглих рекурсивним CTE по manager_fio проти таблиці замикання.
+
+Для організацій з 1k, 10k та 50k співробітників з глибокими ланцюжками
+підпорядкування порівнюється стара версія get_subordinates_vacation_details
+(рекурсивний CTE, що з'єднує manager_fio з fio) з поточною (одне індексоване
+з'єднання staff_hierarchy). Перевіряється також, що обидві повертають однакові дані.
+"""
+
+import sys
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data import db_operations, migrations, vacation_summary
+
+ORG_SIZES = [1000, 10000, 50000]
+MAX_DEPTH = 40       # глибина найдовших ланцюжків підпорядкування
+CHAIN_PROBABILITY = 0.8  # імовірність продовжити поточний ланцюжок замість нової гілки
+VACATIONS_PER_PERSON = 2
+REPEATS = 5
+
+LEGACY_QUERY = """
+    WITH RECURSIVE SubordinateHierarchy AS (
+        SELECT id, fio, ipn, role, manager_fio, remaining_vacation_days, vacation_days_per_year
+        FROM staff
+        WHERE manager_fio = :manager_name
+        UNION ALL
+        SELECT s.id, s.fio, s.ipn, s.role, s.manager_fio, s.remaining_vacation_days, s.vacation_days_per_year
+        FROM staff s
+        INNER JOIN SubordinateHierarchy sh ON s.manager_fio = sh.fio
+    ),
+    LatestVacations AS (
+        SELECT
+            v.staff_id, v.start_date, v.end_date, v.total_days,
+            ROW_NUMBER() OVER(PARTITION BY v.staff_id ORDER BY ABS(julianday(v.start_date) - julianday('now'))) as rn
+        FROM vacations v
+        INNER JOIN SubordinateHierarchy sh ON v.staff_id = sh.id
+    )
+    SELECT
+        h.fio AS sub_fio, h.ipn AS sub_ipn, h.role AS sub_role,
+        lv.start_date as vac_start_date, lv.end_date as vac_end_date, lv.total_days as vac_total_days,
+        h.remaining_vacation_days AS sub_remaining_days
+    FROM SubordinateHierarchy h
+    LEFT JOIN LatestVacations lv ON h.id = lv.staff_id AND lv.rn = 1
+    ORDER BY h.fio;
+"""
+
+
+def build_org(size):
+    """Дерево з довгими ланцюжками (до MAX_DEPTH рівнів); нові гілки - від випадкових вузлів."""
+    rng = random.Random(size)
+    staff_rows = []
+    depths = []
+    for i in range(size):
+        if i == 0:
+            manager = None
+        elif depths[i - 1] < MAX_DEPTH and rng.random() < CHAIN_PROBABILITY:
+            manager = i - 1
+        else:
+            manager = rng.randrange(i)
+            while depths[manager] >= MAX_DEPTH:
+                manager = rng.randrange(i)
+        depths.append(depths[manager] + 1 if manager is not None else 0)
+        manager_fio = f"Співробітник {manager}" if manager is not None else None
+        staff_rows.append((f"Співробітник {i}", f"{1000000000 + i}", 'Manager', manager_fio, 24, 24))
+
+    today = date.today()
+    vacation_rows = []
+    for staff_id in range(1, size + 1):
+        for _ in range(VACATIONS_PER_PERSON):
+            start = today + timedelta(days=rng.randint(-400, 400))
+            vacation_rows.append((staff_id, start.isoformat(), (start + timedelta(days=6)).isoformat(), 7))
+
+    with db_operations.db_connection() as conn:
+        conn.executemany("""
+            INSERT INTO staff (fio, ipn, role, manager_fio, vacation_days_per_year, remaining_vacation_days)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, staff_rows)
+        conn.executemany(
+            "INSERT INTO vacations (staff_id, start_date, end_date, total_days) VALUES (?, ?, ?, ?)",
+            vacation_rows
+        )
+        start = time.perf_counter()
+        migrations._backfill_manager_ids(conn)
+        migrations._backfill_staff_hierarchy(conn)
+        vacation_summary.rebuild(conn)
+        conn.commit()
+        backfill = time.perf_counter() - start
+        depth = conn.execute("SELECT MAX(depth) FROM staff_hierarchy").fetchone()[0]
+    return backfill, depth
+
+
+def best_of(func):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def legacy_subordinates(manager_fio):
+    with db_operations.db_connection() as conn:
+        return [dict(row) for row in conn.execute(LEGACY_QUERY, {'manager_name': manager_fio}).fetchall()]
+
+
+def main():
+    print(f"{'staff':>7} {'depth':>6} {'manager':>16} {'subtree':>8} {'legacy CTE':>12} {'closure':>10} {'speedup':>8}")
+    for size in ORG_SIZES:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_operations.configure_database(os.path.join(tmp, f'hierarchy_{size}.db'))
+            db_operations._init_db()
+            backfill, depth = build_org(size)
+
+            # Корінь (все дерево) та вузол усередині першого ланцюжка
+            for manager_index in (0, 10):
+                manager_fio = f"Співробітник {manager_index}"
+                legacy_time, legacy_rows = best_of(lambda: legacy_subordinates(manager_fio))
+                closure_time, closure_rows = best_of(lambda: db_operations.get_subordinates_vacation_details(manager_fio))
+                key = lambda row: (row['sub_fio'], row['sub_ipn'], row['vac_start_date'])
+                if sorted(map(key, legacy_rows)) != sorted(map(key, closure_rows)):
+                    print(f"✗ Result mismatch for {manager_fio} in org of {size}")
+                    sys.exit(1)
+                print(f"{size:>7} {depth:>6} {manager_fio:>16} {len(closure_rows):>8} "
+                      f"{legacy_time * 1e3:>10.1f}ms {closure_time * 1e3:>8.1f}ms {legacy_time / closure_time:>7.1f}x")
+            print(f"{'':>7} closure backfill for {size} staff: {backfill * 1e3:.0f} ms")
+            db_operations._pool.close_all()
+
+
+if __name__ == "__main__":
+    main()
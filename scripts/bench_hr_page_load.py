@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк: серверна частина завантаження сторінки /hr.
+
+Раніше кожен віджет (таблиця співробітників, два списки співробітників, два
+списки керівників) мав власний серверний callback: п'ять запитів до сервера,
+п'ять запитів до бази та п'ять JSON-відповідей. Тепер сервер віддає один
+компактний знімок staff (id, ПІБ, роль), списки будуються з нього в браузері,
+а таблиця читає лише видиму сторінку (див. bench_employees_table.py). Для 1k, 10k
+та 30k співробітників порівнюються кількість SQL-запитів, сумарний розмір
+відповідей та серверний час (кеш читань скидається перед кожним
+завантаженням, як після запису).
+"""
+
+import sys
+import os
+import json
+import tempfile
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data import db_operations
+
+ORG_SIZES = [1000, 10000, 30000]
+REPEATS = 5
+
+
+def build_org(size):
+    rows = [
+        (f"Співробітник {i}", f"{1000000000 + i}", 'Manager' if i % 10 == 0 else 'Employee',
+         f"Співробітник {i - i % 10}" if i % 10 else None, 24, 24)
+        for i in range(size)
+    ]
+    with db_operations.db_connection() as conn:
+        conn.executemany("""
+            INSERT INTO staff (fio, ipn, role, manager_fio, vacation_days_per_year, remaining_vacation_days)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, rows)
+        conn.commit()
+
+
+def legacy_page_load():
+    """Відповіді п'яти колишніх серверних callback-ів."""
+    employees = db_operations._load_all_employees()
+    options = [{'label': emp['fio'], 'value': emp['id']} for emp in db_operations._load_all_employees()]
+    edit_options = [{'label': emp['fio'], 'value': emp['id']} for emp in db_operations._load_all_employees()]
+    return [employees, options, edit_options, db_operations._load_managers(), db_operations._load_managers()]
+
+
+def snapshot_page_load():
+    db_operations._invalidate_cache()
+    return [db_operations.get_staff_snapshot()]
+
+
+def measure(page_load):
+    statements = []
+    with db_operations.db_connection() as conn:
+        conn.set_trace_callback(statements.append)
+    best = float('inf')
+    for _ in range(REPEATS):
+        statements.clear()
+        start = time.perf_counter()
+        responses = page_load()
+        payload = sum(len(json.dumps(response, ensure_ascii=False).encode('utf-8')) for response in responses)
+        best = min(best, time.perf_counter() - start)
+    query_count = sum(1 for statement in statements if statement.lstrip().upper().startswith('SELECT'))
+    with db_operations.db_connection() as conn:
+        conn.set_trace_callback(None)
+    return len(responses), query_count, payload, best
+
+
+def main():
+    print(f"{'staff':>7} {'variant':>9} {'requests':>9} {'queries':>8} {'payload':>10} {'server':>9}")
+    for size in ORG_SIZES:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_operations.configure_database(os.path.join(tmp, 'bench.db'))
+            db_operations._init_db()
+            build_org(size)
+            for name, page_load in (('widgets', legacy_page_load), ('snapshot', snapshot_page_load)):
+                requests, queries, payload, elapsed = measure(page_load)
+                print(f"{size:>7} {name:>9} {requests:>9} {queries:>8} {payload / 1024:>8.0f}KB {elapsed * 1e3:>7.1f}ms")
+            db_operations._watcher.reset()
+            db_operations._pool.close_all()
+
+
+if __name__ == "__main__":
+    main()
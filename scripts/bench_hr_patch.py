@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк та перевірка часткових оновлень HR-сторінки (dash.Patch).
+
+Раніше кожна операція HR (додати співробітника чи відпустку, зберегти,
+видалити) змінювала hr-data-refresh-trigger, і браузер заново отримував знімок
+усіх співробітників, сторінки обох таблиць та форму редагування. Тепер операція
+публікує id змінених рядків (db_operations.data_changes), а колбеки віддають
+Patch лише з цими рядками. Для 30k співробітників порівнюється розмір
+відповідей після кожної операції; перевіряється, що знімок у браузері після
+застосування Patch збігається зі свіжим get_staff_snapshot().
+"""
+
+import sys
+import os
+import copy
+import json
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data import db_operations
+
+STAFF_COUNT = 30000
+PAGE_SIZE = 10
+
+
+def build_org(size):
+    rows = [
+        (f"Співробітник {i}", f"{1000000000 + i}", 'Manager' if i % 10 == 0 else 'Employee',
+         f"Співробітник {i - i % 10}" if i % 10 else None, 24, 24)
+        for i in range(size)
+    ]
+    with db_operations.db_connection() as conn:
+        conn.executemany("""
+            INSERT INTO staff (fio, ipn, role, manager_fio, vacation_days_per_year, remaining_vacation_days)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, rows)
+        # Зв'язок за id потрібен, щоб перейменування керівника дійшло до підлеглих
+        conn.execute("UPDATE staff SET manager_id = (SELECT m.id FROM staff m WHERE m.fio = staff.manager_fio)")
+        conn.commit()
+
+
+def payload(data):
+    if hasattr(data, 'to_plotly_json'):
+        data = data.to_plotly_json()
+    return len(json.dumps(data, ensure_ascii=False).encode('utf-8'))
+
+
+def apply_patch(data, patch):
+    """Застосовує операції Assign/Delete з Patch так само, як dash-renderer."""
+    for operation in patch.to_plotly_json()['operations']:
+        *path, last = operation['location']
+        target = data
+        for key in path:
+            target = target[key]
+        if operation['operation'] == 'Assign':
+            target[last] = operation['params']['value']
+        elif operation['operation'] == 'Delete':
+            del target[last]
+        else:
+            raise ValueError(f"Unexpected patch operation: {operation['operation']}")
+
+
+def full_refresh(year, employee_id):
+    """Відповіді колишнього оновлення через hr-data-refresh-trigger."""
+    db_operations._invalidate_cache()
+    return [
+        db_operations.get_staff_snapshot(),
+        db_operations.get_employees_page(None, [], PAGE_SIZE)[0],
+        db_operations.get_vacation_history_page(year, PAGE_SIZE)[0],
+        db_operations.get_employee_details_for_edit(employee_id),
+    ]
+
+
+def partial_refresh(app, change, year, edited_id):
+    """Відповіді колбеків на hr-data-change-store (як у app.py)."""
+    responses = [app._staff_snapshot_patch(change)]
+    employee_rows = db_operations.get_employees_page(None, [], PAGE_SIZE)[0]
+    if app._changed_ids(change, 'staff', 'inserted', 'deleted'):
+        responses.append(employee_rows)
+    else:
+        responses.append(app._replace_visible_rows(
+            employee_rows, app._changed_ids(change, 'staff', 'updated'), db_operations.get_employees_by_ids))
+    history_rows = db_operations.get_vacation_history_page(year, PAGE_SIZE)[0]
+    if app._changed_ids(change, 'vacations', 'inserted', 'deleted'):
+        responses.append(history_rows)
+    else:
+        staff_ids = app._changed_ids(change, 'staff', 'updated')
+        vacation_ids = app._changed_ids(change, 'vacations', 'updated') | {
+            row['id'] for row in history_rows if row['staff_id'] in staff_ids
+        }
+        responses.append(app._replace_visible_rows(history_rows, vacation_ids, db_operations.get_vacation_history_rows))
+    if edited_id in app._changed_ids(change, 'staff', 'updated', 'deleted'):
+        responses.append(db_operations.get_employee_details_for_edit(edited_id))
+    return [response for response in responses if response is not app.no_update]
+
+
+def main():
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        db_operations.configure_database(os.path.join(tmp, 'bench.db'))
+        db_operations._init_db()
+        build_org(STAFF_COUNT)
+        import app
+
+        year = 2030
+        for employee_id in range(1, PAGE_SIZE + 1):
+            db_operations.add_vacation(employee_id, f"{year}-01-{employee_id:02d}", f"{year}-01-{employee_id + 1:02d}", 2)
+        client_snapshot = copy.deepcopy(db_operations.get_staff_snapshot())
+
+        def add_employee():
+            employee_id = db_operations.add_employee('Новий Співробітник', '1999999999', 'Співробітник 0', 'Employee', 24)
+            return db_operations.data_changes(staff_inserted=[employee_id])
+
+        def add_vacation():
+            vacation_id = db_operations.add_vacation(4, f"{year}-03-02", f"{year}-03-03", 2)
+            return db_operations.data_changes(staff_updated=[4], vacations_inserted=[vacation_id])
+
+        def save_employee():
+            return db_operations.update_employee_data_and_vacation(1, {
+                'fio': 'Співробітник 0 (перейменований)', 'ipn': '1000000000', 'role': 'Manager',
+                'manager_fio': None, 'vacation_days_per_year': 26,
+            })[2]
+
+        def delete_employee():
+            return db_operations.delete_employee(STAFF_COUNT - 5)[2]
+
+        print(f"🧪 HR partial updates: {STAFF_COUNT} staff, page size {PAGE_SIZE}")
+        print("-" * 50)
+        print(f"{'operation':>16} {'refresh':>10} {'patch':>10}")
+        pages = {}
+        for name, mutate in (('add employee', add_employee), ('add vacation', add_vacation),
+                             ('save employee', save_employee), ('delete employee', delete_employee)):
+            before = db_operations.get_employees_page(None, [], PAGE_SIZE)[0]
+            change = mutate()
+            pages[name] = (before, change, db_operations.get_employees_page(None, [], PAGE_SIZE)[0])
+            old = sum(payload(response) for response in full_refresh(year, 1))
+            new = sum(payload(response) for response in partial_refresh(app, change, year, 1))
+            print(f"{name:>16} {old / 1024:>8.1f}KB {new / 1024:>8.1f}KB")
+
+            snapshot_patch = app._staff_snapshot_patch(change)
+            if snapshot_patch is not app.no_update:
+                apply_patch(client_snapshot, snapshot_patch)
+            db_operations._invalidate_cache()
+            if client_snapshot != db_operations.get_staff_snapshot():
+                print(f"❌ Patched snapshot differs from the database after '{name}'")
+                failures += 1
+        if not failures:
+            print("✅ Patched snapshot matches the database after every operation")
+
+        # Зміна ПІБ керівника оновлює видимі рядки підлеглих у таблиці співробітників
+        rows, change, expected = pages['save employee']
+        rows = copy.deepcopy(rows)
+        apply_patch(rows, app._replace_visible_rows(
+            rows, app._changed_ids(change, 'staff', 'updated'), db_operations.get_employees_by_ids))
+        if rows != expected:
+            print("❌ Patched employees page differs from the database after 'save employee'")
+            failures += 1
+        else:
+            print("✅ Renamed manager and visible subordinate rows replaced in place")
+        db_operations._watcher.reset()
+        db_operations._pool.close_all()
+
+    print("-" * 50)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
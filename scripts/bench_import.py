@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк: построковий batch_import_employees проти set-based рушія data/staff_import.py.
+
+Для 1k, 10k та 100k рядків (новий файл та повторний імпорт того ж файлу зі
+зміненими нормами днів і частиною керівників) порівнюється час старої
+реалізації (SELECT + UPDATE/INSERT на кожен рядок в одній транзакції) з
+поточною, а також найдовша транзакція запису (час, протягом якого інші
+воркери чекають на блокування). Перевіряється, що обидві реалізації залишають
+однакові staff та staff_hierarchy.
+"""
+
+import sys
+import os
+import random
+import tempfile
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data import db_operations, staff_import
+from utils.security import validate_ipn, sanitize_input
+
+ROW_COUNTS = [1000, 10000, 100000]
+MANAGER_SHARE = 0.1
+CHUNK_SIZE = 1000
+
+
+def legacy_batch_import(employees_data):
+    """Попередня реалізація batch_import_employees (рядок за рядком)."""
+    imported_count = 0
+    updated_count = 0
+    errors = []
+    hierarchy_updates = []
+
+    with db_operations.db_connection() as conn:
+        cursor = conn.cursor()
+        all_managers = {row['fio'] for row in conn.execute("SELECT fio FROM staff WHERE role = 'Manager'")}
+        for emp in employees_data:
+            if emp.get('role') == 'Manager':
+                all_managers.add(emp['fio'])
+
+        for emp in employees_data:
+            try:
+                emp['fio'] = sanitize_input(emp.get('fio', ''))
+                emp['ipn'] = sanitize_input(emp.get('ipn', ''))
+                if not emp['fio'] or not emp['ipn']:
+                    errors.append(f"Пропущені обов'язкові поля для запису: {emp}")
+                    continue
+                if not validate_ipn(emp['ipn']):
+                    errors.append(f"Некоректний ІПН: {emp['ipn']}")
+                    continue
+
+                cursor.execute("SELECT id, manager_id, vacation_days_per_year, remaining_vacation_days FROM staff WHERE ipn = ?", (emp['ipn'],))
+                existing_employee = cursor.fetchone()
+                manager_fio = emp.get('manager_fio')
+                if manager_fio and manager_fio not in all_managers:
+                    manager_fio = None
+                vacation_days = int(emp.get('vacation_days_per_year', 24))
+
+                if existing_employee:
+                    new_remaining_days = existing_employee['remaining_vacation_days'] + vacation_days - existing_employee['vacation_days_per_year']
+                    cursor.execute("""
+                        UPDATE staff
+                        SET fio = ?, role = ?, vacation_days_per_year = ?, remaining_vacation_days = ?, manager_fio = ?
+                        WHERE ipn = ?
+                    """, (emp['fio'], emp.get('role', 'Employee'), vacation_days, new_remaining_days, manager_fio, emp['ipn']))
+                    hierarchy_updates.append((existing_employee['id'], existing_employee['manager_id'], manager_fio))
+                    updated_count += 1
+                else:
+                    cursor.execute("""
+                        INSERT INTO staff (fio, ipn, role, manager_fio, vacation_days_per_year, remaining_vacation_days)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    """, (emp['fio'], emp['ipn'], emp.get('role', 'Employee'), manager_fio, vacation_days, vacation_days))
+                    db_operations._insert_hierarchy_node(conn, cursor.lastrowid, None)
+                    hierarchy_updates.append((cursor.lastrowid, None, manager_fio))
+                    imported_count += 1
+            except Exception as e:
+                errors.append(str(e))
+
+        for staff_id, old_manager_id, manager_fio in hierarchy_updates:
+            try:
+                new_manager_id = db_operations._resolve_manager_id(conn, manager_fio)
+                if new_manager_id == staff_id:
+                    raise db_operations.HierarchyCycleError("self")
+                if new_manager_id != old_manager_id:
+                    db_operations._move_hierarchy_subtree(conn, staff_id, new_manager_id)
+            except db_operations.HierarchyCycleError as e:
+                errors.append(str(e))
+                cursor.execute("UPDATE staff SET manager_fio = (SELECT fio FROM staff m WHERE m.id = staff.manager_id) WHERE id = ?", (staff_id,))
+        conn.commit()
+    return imported_count, updated_count, errors
+
+
+def build_rows(count, reassign_share=0.0, seed=0):
+    """
+    Файл імпорту: кожен співробітник підпорядкований одному з менеджерів, визначених
+    раніше у файлі. reassign_share - частка співробітників з іншим керівником.
+    """
+    base = random.Random(count)
+    changes = random.Random(seed)
+    rows = []
+    managers = []
+    for i in range(count):
+        is_manager = i == 0 or base.random() < MANAGER_SHARE
+        manager = base.choice(managers) if managers else None
+        if managers and changes.random() < reassign_share:
+            manager = changes.choice(managers)
+        rows.append({
+            'fio': f"Співробітник {i}",
+            'ipn': f"{1000000000 + i}",
+            'role': 'Manager' if is_manager else 'Employee',
+            'manager_fio': manager,
+            'vacation_days_per_year': changes.choice([24, 26, 28]),
+        })
+        if is_manager:
+            managers.append(f"Співробітник {i}")
+    return rows
+
+
+def track_write_transactions():
+    """Обгортає кроки рушія, що тримають блокування запису; повертає список їх тривалостей."""
+    durations = []
+
+    def timed(func):
+        def wrapper(*args):
+            start = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                durations.append(time.perf_counter() - start)
+        return wrapper
+
+    staff_import._apply_chunk = timed(staff_import._apply_chunk)
+    staff_import._relink_hierarchy = timed(staff_import._relink_hierarchy)
+    return durations
+
+
+def snapshot():
+    with db_operations.db_connection() as conn:
+        # id можуть відрізнятися (UPSERT витрачає значення AUTOINCREMENT), тож порівнюємо за ІПН
+        staff = conn.execute("""
+            SELECT s.ipn, s.fio, s.role, s.manager_fio, m.ipn, s.vacation_days_per_year, s.remaining_vacation_days
+            FROM staff s LEFT JOIN staff m ON m.id = s.manager_id
+            ORDER BY s.ipn
+        """).fetchall()
+        hierarchy = conn.execute("""
+            SELECT a.ipn, d.ipn, h.depth FROM staff_hierarchy h
+            JOIN staff a ON a.id = h.ancestor_id JOIN staff d ON d.id = h.descendant_id
+            ORDER BY 1, 2
+        """).fetchall()
+    return [tuple(row) for row in staff], [tuple(row) for row in hierarchy]
+
+
+def run(tmp, name, importer, files):
+    db_operations.configure_database(os.path.join(tmp, f'{name}.db'))
+    db_operations._init_db()
+    timings = []
+    for rows in files:
+        start = time.perf_counter()
+        importer([dict(row) for row in rows])
+        timings.append(time.perf_counter() - start)
+    result = snapshot()
+    db_operations._pool.close_all()
+    return timings, result
+
+
+def main():
+    write_transactions = track_write_transactions()
+    print(f"{'rows':>7} {'pass':>9} {'legacy':>10} {'set-based':>10} {'speedup':>8} {'longest lock':>13}")
+    for count in ROW_COUNTS:
+        # Другий прохід: нові норми днів, 30% співробітників отримують іншого керівника
+        files = [build_rows(count), build_rows(count, reassign_share=0.3, seed=1)]
+        with tempfile.TemporaryDirectory() as tmp:
+            legacy_times, legacy_state = run(tmp, 'legacy', legacy_batch_import, files)
+            longest_locks = []
+
+            def engine_import(rows):
+                write_transactions.clear()
+                db_operations.batch_import_employees(rows, chunk_size=CHUNK_SIZE)
+                longest_locks.append(max(write_transactions))
+
+            engine_times, engine_state = run(tmp, 'engine', engine_import, files)
+        if legacy_state != engine_state:
+            print(f"✗ Result mismatch for {count} rows")
+            sys.exit(1)
+        for label, legacy_time, engine_time, lock in zip(('new', 're-import'), legacy_times, engine_times, longest_locks):
+            print(f"{count:>7} {label:>9} {legacy_time * 1e3:>8.0f}ms {engine_time * 1e3:>8.0f}ms "
+                  f"{legacy_time / engine_time:>7.1f}x {lock * 1e3:>11.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк та перевірка зайнятості команди (data/occupancy.py).
+
+Для керівника з 2000 підлеглими (у середньому 8 відпусток на людину, частина
+перетинається) порівнюється прямий підрахунок - для кожної людини й кожного
+дня перевірити її відпустки, O(людей × днів) - з масивом різниць
+occupancy.compute, O(v log v + днів), на діапазоні року. Перевіряється, що
+кількості відсутніх за днями та тижнями однакові, і що повторний виклик
+get_team_occupancy береться з кешу, а після запису перераховується.
+"""
+
+import sys
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data import db_operations, migrations, occupancy
+
+TEAM_SIZE = 2000
+VACATIONS_PER_PERSON = 8
+RANGE_START = date(2030, 1, 1)
+RANGE_END = date(2030, 12, 31)
+REPEATS = 3
+
+
+def build_team(rng):
+    rows = [('Керівник', '1000000000', 'Manager', None, 24, 24)] + [
+        (f"Співробітник {i}", f"{1000000000 + i}", 'Employee', 'Керівник', 24, 24) for i in range(1, TEAM_SIZE + 1)
+    ]
+    with db_operations.db_connection() as conn:
+        conn.executemany("""
+            INSERT INTO staff (fio, ipn, role, manager_fio, vacation_days_per_year, remaining_vacation_days)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, rows)
+        migrations._backfill_manager_ids(conn)
+        migrations._backfill_staff_hierarchy(conn)
+        vacations = []
+        for staff_id in range(2, TEAM_SIZE + 2):
+            for _ in range(VACATIONS_PER_PERSON):
+                start = RANGE_START + timedelta(days=rng.randrange(-30, 365))
+                end = start + timedelta(days=rng.randrange(0, 21))
+                vacations.append((staff_id, start.isoformat(), end.isoformat(), (end - start).days + 1))
+        conn.executemany(
+            "INSERT INTO vacations (staff_id, start_date, end_date, total_days) VALUES (?, ?, ?, ?)", vacations
+        )
+        conn.commit()
+    return 1
+
+
+def naive_occupancy(manager_id, start_date, end_date):
+    """Прямий підрахунок: кожна людина × кожен день."""
+    with db_operations.db_connection() as conn:
+        team = [row[0] for row in conn.execute(
+            "SELECT descendant_id FROM staff_hierarchy WHERE ancestor_id = ? AND depth > 0", (manager_id,))]
+        by_person = {}
+        for staff_id, start, end in conn.execute("SELECT staff_id, start_date, end_date FROM vacations"):
+            by_person.setdefault(staff_id, []).append((date.fromisoformat(start), date.fromisoformat(end)))
+    days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+    daily = []
+    weekly = {}
+    for day in days:
+        absent = {staff_id for staff_id in team
+                  if any(start <= day <= end for start, end in by_person.get(staff_id, ()))}
+        daily.append(len(absent))
+        weekly.setdefault(day - timedelta(days=day.weekday()), set()).update(absent)
+    return daily, [len(people) for _, people in sorted(weekly.items())]
+
+
+def best_time(call):
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = call()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    failures = 0
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_operations.configure_database(os.path.join(tmp, 'bench.db'))
+        db_operations._init_db()
+        manager_id = build_team(rng)
+        days = (RANGE_END - RANGE_START).days + 1
+
+        print(f"🧪 Team occupancy: {TEAM_SIZE} people, {TEAM_SIZE * VACATIONS_PER_PERSON} vacations, {days} days")
+        print("-" * 50)
+        naive_time, (naive_daily, naive_weekly) = best_time(lambda: naive_occupancy(manager_id, RANGE_START, RANGE_END))
+        engine_time, result = best_time(lambda: db_operations._load_team_occupancy(manager_id, RANGE_START, RANGE_END))
+        print(f"people × days:    {naive_time * 1e3:>8.1f}ms")
+        print(f"difference array: {engine_time * 1e3:>8.1f}ms (incl. SQL)")
+
+        if result['daily'] != naive_daily or [week['absent'] for week in result['weeks']] != naive_weekly:
+            print("❌ Daily or weekly counts differ from the direct count")
+            failures += 1
+        else:
+            print(f"✅ Daily and weekly counts match (peak {max(result['daily'])} of {result['team_size']})")
+        if any(week['peak'] > week['absent'] for week in result['weeks']):
+            print("❌ Weekly peak exceeds people absent during the week")
+            failures += 1
+
+        db_operations.get_team_occupancy(manager_id, RANGE_START, RANGE_END)
+        cached_time, _ = best_time(lambda: db_operations.get_team_occupancy(manager_id, RANGE_START, RANGE_END))
+        print(f"cached:           {cached_time * 1e6:>8.1f}µs")
+        # Новий підлеглий з відпусткою: змінюються і команда, і кількості
+        newcomer = db_operations.add_employee('Новий Співробітник', '1999999999', 'Керівник', 'Employee', 24)
+        db_operations.add_vacation(newcomer, '2030-07-01', '2030-07-14', 14)
+        updated = db_operations.get_team_occupancy(manager_id, RANGE_START, RANGE_END)
+        expected = naive_occupancy(manager_id, RANGE_START, RANGE_END)[0]
+        if updated['daily'] != expected or updated['daily'] == result['daily']:
+            print("❌ Cached occupancy not refreshed after a new subordinate and vacation")
+            failures += 1
+        else:
+            print("✅ Cache refreshed after a new subordinate and vacation")
+
+        try:
+            occupancy.compute([], RANGE_START, RANGE_START + timedelta(days=occupancy.MAX_RANGE_DAYS))
+            print("❌ Oversized range accepted")
+            failures += 1
+        except ValueError:
+            print(f"✅ Ranges longer than {occupancy.MAX_RANGE_DAYS} days are rejected")
+        db_operations._watcher.reset()
+        db_operations._pool.close_all()
+
+    print("-" * 50)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк та перевірка обмежувача частоти спроб (utils/rate_limiter.py).
+
+Колишній rate_limit_check зберігав для кожного ключа список часових міток,
+перебудовував його при кожній перевірці й ніколи не видаляв ключі; у кожного
+воркера gunicorn був власний словник. Для 100k різних ключів порівнюються час
+перевірки та пам'ять колишньої реалізації, RateLimiter у пам'яті та зі
+сховищем SQLite; перевіряються видалення ключів після TTL, обмеження max_keys,
+точність ліміту для одного ключа, повернення жетона (refund) та спільний
+ліміт для кількох процесів.
+"""
+
+import sys
+import os
+import time
+import tempfile
+import tracemalloc
+import multiprocessing
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data import db_operations
+from utils.rate_limiter import RateLimiter, MemoryRateLimitStore, SQLiteRateLimitStore
+
+KEY_COUNT = 100000
+MAX_ATTEMPTS = 5
+WINDOW_SECONDS = 900
+WORKERS = 4
+WORKER_ATTEMPTS = 20
+
+
+def legacy_rate_limit_check(attempts, user_id, action, max_attempts=5, window_minutes=15):
+    """Колишня реалізація utils.security.rate_limit_check (словник передається явно)."""
+    key = f"{user_id}:{action}"
+    current_time = time.time()
+    window_start = current_time - (window_minutes * 60)
+    if key in attempts:
+        attempts[key] = [timestamp for timestamp in attempts[key] if timestamp > window_start]
+    else:
+        attempts[key] = []
+    if len(attempts[key]) >= max_attempts:
+        return False
+    attempts[key].append(current_time)
+    return True
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def measure(make_check, keys):
+    """Час перевірки (нові ключі, потім повтор кожного) та пам'ять стану, окремим прогоном."""
+    check = make_check()
+    start = time.perf_counter()
+    for key in keys:
+        check(key)
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    for key in keys:
+        check(key)
+    repeat = time.perf_counter() - start
+
+    tracemalloc.start()
+    check = make_check()
+    for key in keys:
+        check(key)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return first / len(keys) * 1e6, repeat / len(keys) * 1e6, memory, check
+
+
+def sqlite_worker(db_path, barrier, results):
+    db_operations.configure_database(db_path)
+    limiter = RateLimiter(MAX_ATTEMPTS, WINDOW_SECONDS, store=SQLiteRateLimitStore(db_operations.db_connection))
+    barrier.wait()
+    results.put(sum(limiter.hit('login-ipn:shared')[0] for _ in range(WORKER_ATTEMPTS)))
+
+
+def memory_worker(barrier, results):
+    limiter = RateLimiter(MAX_ATTEMPTS, WINDOW_SECONDS)
+    barrier.wait()
+    results.put(sum(limiter.hit('login-ipn:shared')[0] for _ in range(WORKER_ATTEMPTS)))
+
+
+def allowed_across_workers(target, *args):
+    ctx = multiprocessing.get_context('spawn')
+    barrier = ctx.Barrier(WORKERS)
+    results = ctx.Queue()
+    processes = [ctx.Process(target=target, args=(*args, barrier, results)) for _ in range(WORKERS)]
+    for process in processes:
+        process.start()
+    allowed = sum(results.get(timeout=60) for _ in processes)
+    for process in processes:
+        process.join()
+    return allowed
+
+
+def main():
+    failures = 0
+    keys = [f"10{i:08d}:login" for i in range(KEY_COUNT)]
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'rate_limits.db')
+        db_operations.configure_database(db_path)
+        db_operations._init_db()
+
+        print(f"🧪 Rate limiter: {KEY_COUNT} distinct keys")
+        print("-" * 50)
+        clock = FakeClock()
+        legacy_attempts = {}
+
+        def legacy():
+            legacy_attempts.clear()
+            return lambda key: legacy_rate_limit_check(legacy_attempts, key, 'login')
+
+        def memory():
+            return RateLimiter(MAX_ATTEMPTS, WINDOW_SECONDS, clock=clock).hit
+
+        def sqlite():
+            with db_operations.db_connection() as conn:
+                conn.execute("DELETE FROM rate_limits")
+                conn.commit()
+            return RateLimiter(MAX_ATTEMPTS, WINDOW_SECONDS, store=SQLiteRateLimitStore(db_operations.db_connection)).hit
+
+        print(f"{'':>7} {'new key':>10} {'repeat':>10} {'state':>9}")
+        for name, make_check in (('legacy', legacy), ('memory', memory), ('sqlite', sqlite)):
+            first, repeat, traced, check = measure(make_check, keys)
+            if name == 'memory':
+                memory_limiter = check.__self__
+            print(f"{name:>7} {first:>7.2f} µs {repeat:>7.2f} µs {traced / 1024 / 1024:>6.1f} MB")
+
+        # Після вікна всі відра повні: наступна перевірка видаляє прострочені ключі
+        clock.now += WINDOW_SECONDS + 1
+        memory_limiter.hit('after-ttl')
+        size = memory_limiter.store.stats()['size']
+        if size != 1:
+            print(f"❌ Memory store kept {size} keys after TTL")
+            failures += 1
+        else:
+            print(f"✅ Memory store evicted expired keys (legacy dict still holds {len(legacy_attempts)})")
+
+        capped = RateLimiter(MAX_ATTEMPTS, WINDOW_SECONDS, store=MemoryRateLimitStore(max_keys=10000))
+        for key in keys:
+            capped.hit(key)
+        if capped.store.stats()['size'] != 10000:
+            print(f"❌ max_keys not enforced: {capped.store.stats()}")
+            failures += 1
+        else:
+            print("✅ Memory store capped at max_keys=10000")
+
+        sqlite_store = SQLiteRateLimitStore(db_operations.db_connection, purge_every=1)
+        RateLimiter(MAX_ATTEMPTS, WINDOW_SECONDS, store=sqlite_store, clock=lambda: time.time() + WINDOW_SECONDS + 1).hit('after-ttl')
+        if sqlite_store.stats()['size'] != 1:
+            print(f"❌ SQLite store kept {sqlite_store.stats()['size']} rows after TTL")
+            failures += 1
+        else:
+            print("✅ SQLite store purged expired rows")
+
+        # Один ключ: рівно MAX_ATTEMPTS спроб, далі одна спроба на window/MAX_ATTEMPTS секунд
+        for store in (None, SQLiteRateLimitStore(db_operations.db_connection)):
+            clock = FakeClock()
+            limiter = RateLimiter(MAX_ATTEMPTS, WINDOW_SECONDS, store=store, clock=clock)
+            burst = [limiter.hit('burst')[0] for _ in range(MAX_ATTEMPTS + 3)]
+            _, retry_after = limiter.hit('burst')
+            clock.now += retry_after
+            refilled = [limiter.hit('burst')[0] for _ in range(2)]
+            label = type(limiter.store).__name__
+            if burst != [True] * MAX_ATTEMPTS + [False] * 3 or refilled != [True, False]:
+                print(f"❌ {label}: burst {burst}, after retry_after {refilled}")
+                failures += 1
+            else:
+                print(f"✅ {label}: {MAX_ATTEMPTS} attempts allowed, next after {retry_after:.0f}s")
+
+        # Повернений жетон дозволяє рівно одну спробу, а повне відро не переповнюється
+        for store in (None, SQLiteRateLimitStore(db_operations.db_connection)):
+            clock = FakeClock()
+            limiter = RateLimiter(MAX_ATTEMPTS, WINDOW_SECONDS, store=store, clock=clock)
+            for _ in range(MAX_ATTEMPTS):
+                limiter.hit('refund')
+            limiter.refund('refund')
+            refunded = [limiter.hit('refund')[0] for _ in range(2)]
+            limiter.refund('full')
+            full = sum(limiter.hit('full')[0] for _ in range(MAX_ATTEMPTS + 2))
+            label = type(limiter.store).__name__
+            if refunded != [True, False] or full != MAX_ATTEMPTS:
+                print(f"❌ {label}: after refund {refunded}, refund on a full bucket allowed {full}")
+                failures += 1
+            else:
+                print(f"✅ {label}: a refund returns exactly one attempt")
+
+        sqlite_allowed = allowed_across_workers(sqlite_worker, db_path)
+        memory_allowed = allowed_across_workers(memory_worker)
+        if sqlite_allowed != MAX_ATTEMPTS:
+            print(f"❌ {WORKERS} workers with SQLite store allowed {sqlite_allowed} attempts")
+            failures += 1
+        else:
+            print(f"✅ {WORKERS} workers share the limit: {sqlite_allowed} allowed "
+                  f"(per-process memory limiters: {memory_allowed})")
+        db_operations._watcher.reset()
+        db_operations._pool.close_all()
+
+    print("-" * 50)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк: кеш читань db_operations на типовому навантаженні сторінки /hr.
+
+Завантаження /hr викликає get_all_employees() тричі, get_managers() двічі та
+get_employee_by_id() для вибраного співробітника. Для 1k та 10k співробітників
+імітується серія завантажень сторінки, де кожне WRITE_EVERY-те завантаження
+супроводжується записом (add_vacation), і порівнюється час без кешу (кеш
+скидається перед кожним викликом) та з кешем. Перевіряється, що після запису
+кеш повертає свіжі дані, і виводиться статистика влучань.
+"""
+
+import sys
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data import db_operations, migrations, vacation_summary
+
+ORG_SIZES = [1000, 10000]
+PAGE_LOADS = 200
+WRITE_EVERY = 10
+
+
+def build_org(size):
+    rows = [
+        (f"Співробітник {i}", f"{1000000000 + i}", 'Manager' if i % 10 == 0 else 'Employee',
+         f"Співробітник {i - i % 10}" if i % 10 else None, 24, 24)
+        for i in range(size)
+    ]
+    with db_operations.db_connection() as conn:
+        conn.executemany("""
+            INSERT INTO staff (fio, ipn, role, manager_fio, vacation_days_per_year, remaining_vacation_days)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, rows)
+        migrations._backfill_manager_ids(conn)
+        migrations._backfill_staff_hierarchy(conn)
+        vacation_summary.rebuild(conn)
+        conn.commit()
+
+
+def hr_page_load(employee_id):
+    db_operations.get_all_employees()
+    db_operations.get_all_employees()
+    db_operations.get_all_employees()
+    db_operations.get_managers()
+    db_operations.get_managers()
+    db_operations.get_employee_by_id(employee_id)
+
+
+def run(cached):
+    # Прогони бронюють різні дні: перетини відхиляються
+    today = (date.today() + timedelta(days=int(cached))).isoformat()
+    start = time.perf_counter()
+    for load in range(PAGE_LOADS):
+        if load % WRITE_EVERY == 0:
+            db_operations.add_vacation(load + 1, today, today, 1)
+        if not cached:
+            db_operations._invalidate_cache()
+        hr_page_load(load + 1)
+    return time.perf_counter() - start
+
+
+def check_fresh_after_write():
+    before = db_operations.get_employee_by_id(1)['remaining_vacation_days']
+    db_operations.get_all_employees()
+    day = (date.today() + timedelta(days=2)).isoformat()
+    db_operations.add_vacation(1, day, day, 1)
+    after = db_operations.get_employee_by_id(1)['remaining_vacation_days']
+    listed = next(e for e in db_operations.get_all_employees() if e['id'] == 1)['remaining_vacation_days']
+    return after == before - 1 and listed == after
+
+
+def main():
+    print(f"{'staff':>7} {'uncached':>10} {'cached':>10} {'speedup':>8} {'hit ratio':>10}")
+    for size in ORG_SIZES:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_operations.configure_database(os.path.join(tmp, 'bench.db'))
+            db_operations._init_db()
+            build_org(size)
+
+            uncached = run(cached=False)
+            db_operations._invalidate_cache()
+            stats_before = db_operations.get_cache_stats()
+            cached = run(cached=True)
+            stats = db_operations.get_cache_stats()
+            fresh = check_fresh_after_write()
+            db_operations._pool.close_all()
+
+        if not fresh:
+            print(f"✗ Stale data served after a write ({size} staff)")
+            sys.exit(1)
+        hits = stats['hits'] - stats_before['hits']
+        misses = stats['misses'] - stats_before['misses']
+        print(f"{size:>7} {uncached * 1e3:>8.0f}ms {cached * 1e3:>8.0f}ms "
+              f"{uncached / cached:>7.1f}x {hits / (hits + misses):>9.0%}")
+
+
+if __name__ == "__main__":
+    main()
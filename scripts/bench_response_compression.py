@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк та перевірка стиснення відповідей Dash (auth/auth_middleware.py).
+
+Відповіді callback-ів (знімок staff, таблиця підлеглих, сторінки таблиць) та
+layout - повторюваний JSON, який раніше віддавався без стиснення. Запити
+проходять через Flask test client повним шляхом WSGI: для кожної відповіді
+порівнюються розмір без стиснення, з gzip та brotli (якщо встановлений) і
+час обробки. Перевіряється узгодження кодування за Accept-Encoding, що
+розпакована відповідь збігається з нестиснутою, що малі відповіді та інші
+шляхи не стискаються, і що метрики записані за ключем callback-а.
+"""
+
+import sys
+import os
+import gzip
+import tempfile
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data import db_operations, migrations
+from auth import auth_middleware
+
+STAFF_COUNT = 30000
+SUBORDINATE_COUNT = 2000
+REPEATS = 5
+
+
+def build_org(size):
+    # Перші SUBORDINATE_COUNT співробітників підпорядковані 'Співробітник 0'
+    rows = [
+        (f"Співробітник {i}", f"{1000000000 + i}", 'Manager' if i % 10 == 0 else 'Employee',
+         None if i == 0 else ('Співробітник 0' if i < SUBORDINATE_COUNT else f"Співробітник {i - i % 10}"), 24, 24 - i % 25)
+        for i in range(size)
+    ]
+    with db_operations.db_connection() as conn:
+        conn.executemany("""
+            INSERT INTO staff (fio, ipn, role, manager_fio, vacation_days_per_year, remaining_vacation_days)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, rows)
+        migrations._backfill_manager_ids(conn)
+        migrations._backfill_staff_hierarchy(conn)
+        conn.commit()
+
+
+def dash_request(outputs, inputs, state=()):
+    """Тіло запиту /_dash-update-component, як його надсилає dash-renderer."""
+    outputs = [{'id': component, 'property': prop} for component, prop in outputs]
+    output = outputs[0] if len(outputs) == 1 else outputs
+    return {
+        'output': (f"{outputs[0]['id']}.{outputs[0]['property']}" if len(outputs) == 1
+                   else '..' + '...'.join(f"{o['id']}.{o['property']}" for o in outputs) + '..'),
+        'outputs': output,
+        'inputs': [{'id': component, 'property': prop, 'value': value} for component, prop, value in inputs],
+        'state': [{'id': component, 'property': prop, 'value': value} for component, prop, value in state],
+        'changedPropIds': [f"{inputs[0][0]}.{inputs[0][1]}"],
+    }
+
+
+REQUESTS = {
+    'layout': None,
+    'staff snapshot': dash_request(
+        [('hr-staff-snapshot-store', 'data')],
+        [('url', 'pathname', '/hr'), ('hr-data-refresh-trigger', 'data', None)]),
+    'subordinates': dash_request(
+        [('subordinates-table', 'columns'), ('subordinates-table', 'data')],
+        [('url', 'pathname', '/manager')]),
+    'employees page': dash_request(
+        [('all-employees-table', 'data'), ('all-employees-table', 'page_count'),
+         ('all-employees-table', 'page_current'), ('hr-employees-cursors-store', 'data')],
+        [('url', 'pathname', '/hr'), ('hr-data-refresh-trigger', 'data', None),
+         ('all-employees-table', 'page_current', 0), ('all-employees-table', 'page_size', 100),
+         ('all-employees-table', 'sort_by', []), ('all-employees-table', 'filter_query', ''),
+         ('hr-data-change-store', 'data', None)],
+        [('hr-employees-cursors-store', 'data', None), ('all-employees-table', 'data', None)]),
+}
+
+
+def send(client, name, encoding):
+    headers = {'Accept-Encoding': encoding} if encoding else {}
+    if REQUESTS[name] is None:
+        return client.get('/_dash-layout', headers=headers)
+    return client.post('/_dash-update-component', json=REQUESTS[name], headers=headers)
+
+
+def decode(response):
+    encoding = response.headers.get('Content-Encoding')
+    if encoding == 'gzip':
+        return gzip.decompress(response.data)
+    if encoding == 'br':
+        return auth_middleware.brotli.decompress(response.data)
+    return response.data
+
+
+def best_time(call):
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = call()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        db_operations.configure_database(os.path.join(tmp, 'bench.db'))
+        db_operations._init_db()
+        build_org(STAFF_COUNT)
+        import app
+
+        client = app.server.test_client()
+        manager = db_operations.get_employee_by_ipn('1000000000')
+        with client.session_transaction() as session:
+            identity = db_operations.get_session_identity(manager['id'])
+            session.update({'identity': identity, 'user_ipn': identity['ipn'],
+                            'user_role': identity['role'], 'user_fio': identity['fio']})
+
+        encodings = [('identity', None), ('gzip', 'gzip')]
+        if auth_middleware.brotli is not None:
+            encodings.append(('br', 'br, gzip'))
+        print(f"🧪 Response compression: {STAFF_COUNT} staff, {SUBORDINATE_COUNT} subordinates")
+        print("-" * 50)
+        print(f"{'response':>15} " + ' '.join(f"{name:>17}" for name, _ in encodings))
+        for name in REQUESTS:
+            cells = []
+            plain = None
+            for label, header in encodings:
+                elapsed, response = best_time(lambda: send(client, name, header))
+                if response.status_code != 200:
+                    print(f"❌ {name}: HTTP {response.status_code}")
+                    failures += 1
+                    break
+                if plain is None:
+                    plain = response.data
+                    # Відповіді, менші за поріг, не стискаються
+                    compressed = len(plain) >= app.server.config['COMPRESS_MIN_SIZE']
+                elif decode(response) != plain or response.headers.get('Content-Encoding') != (label if compressed else None):
+                    print(f"❌ {name}: {label} response does not match the uncompressed one")
+                    failures += 1
+                cells.append(f"{len(response.data) / 1024:>7.1f}KB {elapsed * 1e3:>6.1f}ms")
+            print(f"{name:>15} " + ' '.join(f"{cell:>17}" for cell in cells))
+        if auth_middleware.brotli is None:
+            print("(brotli не встановлений - br не перевірявся)")
+
+        # Мала відповідь і шляхи поза COMPRESSIBLE_PATHS не стискаються
+        small = client.post('/_dash-update-component', headers={'Accept-Encoding': 'gzip'}, json=dash_request(
+            [('hr-add-vacation-balance-store', 'data')],
+            [('hr-add-vacation-employee-dropdown', 'value', None), ('hr-data-refresh-trigger', 'data', None),
+             ('hr-data-change-store', 'data', None)]))
+        other = client.get('/_dash-dependencies', headers={'Accept-Encoding': 'gzip'})
+        if 'Content-Encoding' in small.headers or 'Content-Encoding' in other.headers:
+            print("❌ Small response or non-Dash-data path was compressed")
+            failures += 1
+        else:
+            print(f"✅ Small response ({len(small.data)} B) and other paths are sent as is")
+
+        cases = [('gzip, deflate, br', True, 'br'), ('gzip, deflate, br', False, 'gzip'), ('br;q=0.5, gzip', True, 'gzip'),
+                 ('gzip;q=0', False, None), ('*', False, 'gzip'), ('identity', True, None), ('', True, None)]
+        wrong = [(header, brotli_available, auth_middleware.choose_encoding(header, brotli_available))
+                 for header, brotli_available, expected in cases
+                 if auth_middleware.choose_encoding(header, brotli_available) != expected]
+        if wrong:
+            print(f"❌ Accept-Encoding negotiation: {wrong}")
+            failures += 1
+        else:
+            print("✅ Accept-Encoding negotiation")
+
+        stats = app.response_metrics.stats()
+        expected_keys = {request['output'] for request in REQUESTS.values() if request} | {'_dash-layout'}
+        if not expected_keys <= stats.keys():
+            print(f"❌ Metrics missing: {expected_keys - stats.keys()}")
+            failures += 1
+        else:
+            print("✅ Per-callback metrics:")
+            for key, entry in stats.items():
+                print(f"   {key[:60]:<60} {entry['responses']:>3} resp, avg {entry['avg_raw_bytes'] / 1024:>7.1f}KB, "
+                      f"ratio {entry['compression_ratio']:>5.1f}x")
+        db_operations._watcher.reset()
+        db_operations._pool.close_all()
+
+    print("-" * 50)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк: вартість DDL-перевірки схеми на кожному запиті проти одноразових міграцій.
+
+Порівнює читання get_all_employees() у двох режимах:
+  * legacy     - перед кожним читанням CREATE TABLE IF NOT EXISTS + COMMIT
+                 (як робив старий _ensure_tables_exist на гарячих шляхах);
+  * migrations - схема доводиться до актуальної версії один раз при старті.
+"""
+
+import sys
+import os
+import tempfile
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data import db_operations, migrations
+
+REQUESTS = 2000
+EMPLOYEES = 200
+
+
+def _legacy_ensure(conn):
+    """Відтворює стару поведінку: DDL та коміт перед кожним запитом."""
+    for step in migrations.MIGRATIONS[0][2]:
+        conn.execute(step)
+    conn.commit()
+
+
+def _seed():
+    rows = [
+        {'fio': f"Співробітник {i}", 'ipn': f"{1000000000 + i}", 'role': 'Employee', 'vacation_days_per_year': 24}
+        for i in range(EMPLOYEES)
+    ]
+    db_operations.batch_import_employees(rows)
+
+
+def bench_legacy():
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        with db_operations.db_connection() as conn:
+            _legacy_ensure(conn)
+        db_operations.get_all_employees()
+    return time.perf_counter() - start
+
+
+def bench_migrations():
+    start = time.perf_counter()
+    db_operations._init_db()
+    startup = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        db_operations.get_all_employees()
+    return startup, time.perf_counter() - start
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_operations.configure_database(os.path.join(tmp, 'bench.db'))
+        db_operations._init_db()
+        _seed()
+
+        legacy_total = bench_legacy()
+        startup, migrated_total = bench_migrations()
+        db_operations._pool.close_all()
+
+    legacy_per_request = legacy_total / REQUESTS * 1e6
+    migrated_per_request = migrated_total / REQUESTS * 1e6
+    print(f"Requests: {REQUESTS}, employees: {EMPLOYEES}")
+    print(f"legacy (DDL on every read):  {legacy_per_request:8.1f} us/request")
+    print(f"migrations (once at start):  {migrated_per_request:8.1f} us/request (startup {startup * 1e3:.2f} ms)")
+    print(f"saving per request:          {legacy_per_request - migrated_per_request:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
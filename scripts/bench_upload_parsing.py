@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк: пікова пам'ять розбору завантаженого файлу.
+
+Порівнює попередній parse_contents (повне розкодування base64, рядок,
+DataFrame та to_dict('records') для всього файлу) з потоковим
+utils/excel_handler.read_upload для CSV та XLSX різного розміру. Пам'ять
+рахується через tracemalloc без урахування самого рядка data URL, який
+Dash передає в callback.
+"""
+
+import sys
+import os
+import io
+import base64
+import time
+import tracemalloc
+import pandas as pd
+from openpyxl import Workbook
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import excel_handler
+
+ROW_COUNTS = [10000, 100000]
+HEADER = ['ПІБ', 'ІПН', 'Роль', 'Днів відпустки на рік', 'Керівник']
+
+
+def build_rows(count):
+    return [
+        [f"Співробітник {i}", f"{1000000000 + i}", 'Employee', 24, f"Керівник {i % 100}"]
+        for i in range(count)
+    ]
+
+
+def csv_upload(rows):
+    lines = [','.join(HEADER)] + [','.join(str(value) for value in row) for row in rows]
+    return "data:text/csv;base64," + base64.b64encode('\n'.join(lines).encode('utf-8')).decode('ascii')
+
+
+def xlsx_upload(rows):
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(HEADER)
+    for row in rows:
+        sheet.append(row)
+    output = io.BytesIO()
+    workbook.save(output)
+    return "data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64," + \
+        base64.b64encode(output.getvalue()).decode('ascii')
+
+
+def legacy_parse(contents, filename):
+    """Попередня реалізація parse_contents."""
+    content_type, content_string = contents.split(',')
+    decoded = base64.b64decode(content_string)
+    if 'csv' in filename:
+        df = pd.read_csv(io.StringIO(decoded.decode('utf-8')))
+    else:
+        df = pd.read_excel(io.BytesIO(decoded))
+    df.rename(columns=excel_handler.COLUMN_MAPPING, inplace=True)
+    return len(df.to_dict('records'))
+
+
+def streaming_parse(contents, filename):
+    return sum(len(batch) for batch in excel_handler.read_upload(contents, filename))
+
+
+def measure(func, contents, filename):
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = func(contents, filename)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return count, elapsed, peak
+
+
+def main():
+    print(f"{'format':>6} {'rows':>7} {'upload':>9} {'legacy peak':>12} {'stream peak':>12} {'legacy':>8} {'stream':>8}")
+    for count in ROW_COUNTS:
+        rows = build_rows(count)
+        for filename, contents in (('staff.csv', csv_upload(rows)), ('staff.xlsx', xlsx_upload(rows))):
+            legacy_count, legacy_time, legacy_peak = measure(legacy_parse, contents, filename)
+            stream_count, stream_time, stream_peak = measure(streaming_parse, contents, filename)
+            if legacy_count != stream_count:
+                print(f"✗ Row count mismatch for {filename}: {legacy_count} != {stream_count}")
+                sys.exit(1)
+            print(f"{filename.split('.')[1]:>6} {count:>7} {len(contents) / 2**20:>7.1f}MB "
+                  f"{legacy_peak / 2**20:>10.1f}MB {stream_peak / 2**20:>10.1f}MB "
+                  f"{legacy_time:>7.2f}s {stream_time:>7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
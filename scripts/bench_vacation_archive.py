@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк та перевірка архіву відпусток (data/vacation_archive.py).
+
+База з 10 роками історії (5000 співробітників, по 6 відпусток на рік):
+запити дашбордів - сторінка та кількість історії поточного року, зайнятість
+команди, підлеглі керівника, перевірка перетину, нічне оновлення зведення -
+вимірюються до та після перенесення закритих років в архів. Перевіряється,
+що результати однакові, що історія архівного року читається через
+vacations_all так само, як до архівування, що журнал балансу не змінився,
+що перетин з архівною відпусткою виявляється, що change_log записує
+перенесення як 'archive', а не видалення, і що повторний запуск нічого не переносить.
+"""
+
+import sys
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data import db_operations, migrations, vacation_summary, change_log
+
+STAFF_COUNT = 5000
+TEAM_SIZE = 100
+YEARS = 10
+VACATIONS_PER_YEAR = 6
+REPEATS = 20
+TODAY = date.today()
+
+
+def build_company(rng):
+    staff = []
+    for i in range(STAFF_COUNT):
+        lead = i % TEAM_SIZE == 0
+        manager = None if lead else f"Співробітник {i - i % TEAM_SIZE}"
+        staff.append((f"Співробітник {i}", f"{1000000000 + i}", 'Manager' if lead else 'Employee', manager, 24, 24))
+    vacations = []
+    for staff_id in range(1, STAFF_COUNT + 1):
+        for year in range(TODAY.year - YEARS + 1, TODAY.year + 2):
+            # Відпустки в межах року: кожна у своєму двомісячному проміжку
+            for slot in range(VACATIONS_PER_YEAR):
+                start = date(year, 1, 1) + timedelta(days=slot * 60 + rng.randrange(45))
+                length = rng.randint(1, 14)
+                vacations.append((staff_id, start.isoformat(), (start + timedelta(days=length - 1)).isoformat(), length))
+    with db_operations.db_connection() as conn:
+        conn.executemany("""
+            INSERT INTO staff (fio, ipn, role, manager_fio, vacation_days_per_year, remaining_vacation_days)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, staff)
+        conn.executemany(
+            "INSERT INTO vacations (staff_id, start_date, end_date, total_days) VALUES (?, ?, ?, ?)", vacations
+        )
+        migrations._backfill_manager_ids(conn)
+        migrations._backfill_staff_hierarchy(conn)
+        vacation_summary.rebuild(conn)
+        conn.commit()
+    return len(vacations)
+
+
+def rebuild_summary():
+    with db_operations.db_connection() as conn:
+        vacation_summary.rebuild(conn)
+        conn.rollback()
+
+
+DASHBOARD_QUERIES = {
+    'history page': lambda: db_operations.get_vacation_history_page(TODAY.year, page_size=10),
+    'history page 50': lambda: db_operations.get_vacation_history_page(TODAY.year, page_size=10, offset=500),
+    'history count': lambda: db_operations.count_vacation_history(TODAY.year),
+    'team occupancy': lambda: db_operations._load_team_occupancy(
+        1, TODAY - timedelta(days=TODAY.weekday()), TODAY - timedelta(days=TODAY.weekday()) + timedelta(weeks=12, days=-1)),
+    'subordinates': lambda: db_operations.get_subordinates_vacation_details(manager_id=1),
+    'overlap check': lambda: db_operations.find_overlapping_vacation(2, TODAY.isoformat(), TODAY.isoformat()),
+    'summary rebuild': rebuild_summary,
+}
+
+
+def best_time(call, repeats=REPEATS):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = call()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def measure():
+    return {name: best_time(call, 3 if name == 'summary rebuild' else REPEATS) for name, call in DASHBOARD_QUERIES.items()}
+
+
+def check(condition, ok, failure):
+    print(f"✅ {ok}" if condition else f"❌ {failure}")
+    return 0 if condition else 1
+
+
+def main():
+    failures = 0
+    rng = random.Random(9)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_operations.configure_database(os.path.join(tmp, 'bench.db'))
+        db_operations._init_db()
+        total = build_company(rng)
+        old_year = TODAY.year - 5
+
+        print(f"🧪 Vacation archive: {STAFF_COUNT} staff, {total} vacations over {YEARS + 1} years")
+        print("-" * 50)
+        before = measure()
+        old_page_before = db_operations.get_vacation_history_page(old_year, page_size=50, offset=100)
+        old_count_before = db_operations.count_vacation_history(old_year)
+        with db_operations.db_connection() as conn:
+            ledger_before = conn.execute("SELECT COUNT(*), SUM(days) FROM vacation_ledger").fetchone()[:]
+            log_position = change_log.position(conn)
+
+        archive_time, result = best_time(lambda: db_operations.archive_closed_vacations(), repeats=1)
+        with db_operations.db_connection() as conn:
+            hot = conn.execute("SELECT COUNT(*) FROM vacations").fetchone()[0]
+            archived = conn.execute("SELECT COUNT(*) FROM vacations_archive").fetchone()[0]
+            ledger_after = conn.execute("SELECT COUNT(*), SUM(days) FROM vacation_ledger").fetchone()[:]
+            logged = dict(conn.execute(
+                "SELECT operation, COUNT(*) FROM change_log WHERE seq > ? GROUP BY operation", (log_position,)
+            ).fetchall())
+            dangling = conn.execute("""
+                SELECT COUNT(*) FROM vacation_summary vs
+                WHERE (vs.last_vacation_id IS NOT NULL
+                       AND NOT EXISTS (SELECT 1 FROM vacations v WHERE v.id = vs.last_vacation_id))
+                   OR (vs.closest_vacation_id IS NOT NULL
+                       AND NOT EXISTS (SELECT 1 FROM vacations v WHERE v.id = vs.closest_vacation_id))
+            """).fetchone()[0]
+        print(f"archived {result['archived']} vacations before {result['archived_before']} in {archive_time:.1f}s; "
+              f"hot {hot}, archive {archived}")
+        after = measure()
+
+        print(f"{'query':>16} {'10 years hot':>13} {'archived':>10}")
+        for name in DASHBOARD_QUERIES:
+            print(f"{name:>16} {before[name][0] * 1e3:>11.2f}ms {after[name][0] * 1e3:>8.2f}ms")
+        changed = [name for name in DASHBOARD_QUERIES if name != 'summary rebuild' and before[name][1] != after[name][1]]
+        failures += check(not changed, "Dashboard results are unchanged", f"Results changed: {changed}")
+        failures += check(db_operations.get_vacation_history_page(old_year, page_size=50, offset=100) == old_page_before
+                          and db_operations.count_vacation_history(old_year) == old_count_before,
+                          f"History of {old_year} is read through vacations_all unchanged",
+                          f"History of {old_year} differs after archiving")
+        failures += check(ledger_before == ledger_after and not dangling,
+                          "Ledger untouched and summary references stay in the hot table",
+                          f"Ledger {ledger_before} -> {ledger_after}, {dangling} dangling summary references")
+        failures += check(logged == {change_log.OPERATION_ARCHIVE: result['archived']},
+                          f"change_log records {result['archived']} archive entries and no deletes",
+                          f"change_log after archiving: {logged}")
+        overlap = db_operations.find_overlapping_vacation(2, f"{old_year}-01-01", f"{old_year}-12-31")
+        failures += check(overlap is not None, f"Overlap with an archived vacation detected ({overlap and overlap['start_date']})",
+                          "Overlap with an archived vacation was not detected")
+        failures += check(db_operations.archive_closed_vacations()['archived'] == 0, "Second run moves nothing",
+                          "Second run archived more rows")
+        db_operations.delete_employee(3)
+        with db_operations.db_connection() as conn:
+            left = conn.execute("SELECT COUNT(*) FROM vacations_archive WHERE staff_id = 3").fetchone()[0]
+        failures += check(left == 0, "Deleting an employee removes their archived vacations",
+                          f"{left} archived vacations left after deleting the employee")
+        db_operations._watcher.reset()
+        db_operations._pool.close_all()
+
+    print("-" * 50)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
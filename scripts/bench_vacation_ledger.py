@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк та перевірка журналу балансу відпусток (data/vacation_ledger.py).
+
+Для 50 000 співробітників з 10 відпустками кожен порівнюються звірка по
+одному співробітнику (запит суми журналу на кожного) з одним запитом
+reconcile, та щорічне нарахування по одному співробітнику (читання балансу,
+запис у журнал, оновлення лічильника) з annual_rollover. Перевіряється, що
+звірка знаходить саме внесені розбіжності й виправляє їх, що шляхи запису
+(додавання, зміна, видалення відпусток, зміна річної норми, імпорт,
+коригування) не створюють розбіжностей, і що міграція записує початкові залишки.
+"""
+
+import sys
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data import db_operations, migrations, vacation_ledger
+from data.db_pool import ConnectionPool
+
+STAFF_COUNT = 50000
+VACATIONS_PER_PERSON = 10
+DRIFTED = 500
+CARRY_OVER = 10
+
+
+def build_company(rng):
+    """Співробітники та відпустки; лічильники узгоджені з журналом."""
+    staff = [(f"Співробітник {i}", f"{1000000000 + i}", 'Employee', None, 24 + i % 8, 24 + i % 8)
+             for i in range(STAFF_COUNT)]
+    vacations = []
+    for staff_id in range(1, STAFF_COUNT + 1):
+        day = date(2026, 1, 1) + timedelta(days=rng.randrange(10))
+        for _ in range(VACATIONS_PER_PERSON):
+            length = rng.randint(1, 3)
+            vacations.append((staff_id, day.isoformat(), (day + timedelta(days=length - 1)).isoformat(), length))
+            day += timedelta(days=length + rng.randrange(1, 30))
+    with db_operations.db_connection() as conn:
+        conn.executemany("""
+            INSERT INTO staff (fio, ipn, role, manager_fio, vacation_days_per_year, remaining_vacation_days)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, staff)
+        conn.executemany(
+            "INSERT INTO vacations (staff_id, start_date, end_date, total_days) VALUES (?, ?, ?, ?)", vacations
+        )
+        conn.execute("""
+            UPDATE staff SET remaining_vacation_days = vacation_days_per_year
+                - (SELECT COALESCE(SUM(total_days), 0) FROM vacations WHERE staff_id = staff.id)
+        """)
+        conn.commit()
+
+
+def reconcile_one_by_one(conn):
+    drifted = []
+    for staff_id, remaining in conn.execute("SELECT id, remaining_vacation_days FROM staff").fetchall():
+        balance = conn.execute("SELECT COALESCE(SUM(days), 0) FROM vacation_ledger WHERE staff_id = ?",
+                               (staff_id,)).fetchone()[0]
+        if balance != remaining:
+            drifted.append(staff_id)
+    return drifted
+
+
+def rollover_one_by_one(conn, year):
+    reference = f"loop:{year}"
+    for staff_id, per_year in conn.execute("SELECT id, vacation_days_per_year FROM staff").fetchall():
+        balance = conn.execute("SELECT SUM(days) FROM vacation_ledger WHERE staff_id = ?", (staff_id,)).fetchone()[0]
+        change = per_year - max(balance - CARRY_OVER, 0)
+        conn.execute("INSERT INTO vacation_ledger (staff_id, entry_type, days, reference) VALUES (?, 'accrual', ?, ?)",
+                     (staff_id, change, reference))
+        conn.execute("UPDATE staff SET remaining_vacation_days = remaining_vacation_days + ? WHERE id = ?",
+                     (change, staff_id))
+
+
+def timed(call):
+    start = time.perf_counter()
+    result = call()
+    return time.perf_counter() - start, result
+
+
+def check(condition, ok, failure):
+    print(f"✅ {ok}" if condition else f"❌ {failure}")
+    return 0 if condition else 1
+
+
+def check_write_paths():
+    """Шляхи запису змінюють лічильник і журнал узгоджено."""
+    employee_id = db_operations.add_employee('Новий Співробітник', '1999999999', None, 'Employee', 24, 20)
+    vacation_id = db_operations.add_vacation(employee_id, '2031-03-02', '2031-03-06', 5)
+    second_id = db_operations.add_vacation(employee_id, '2031-04-01', '2031-04-03', 3)
+    db_operations.update_employee_data_and_vacation(employee_id, {
+        'fio': 'Новий Співробітник', 'ipn': '1999999999', 'role': 'Employee', 'manager_fio': None,
+        'vacation_days_per_year': 28, 'target_vacation_id': vacation_id,
+        'vacation_start_date': '2031-03-02', 'vacation_end_date': '2031-03-09',
+    })
+    db_operations.delete_vacation(second_id)
+    db_operations.batch_import_employees([
+        {'fio': 'Новий Співробітник', 'ipn': '1999999999', 'role': 'Employee', 'vacation_days_per_year': 30},
+        {'fio': 'Імпортований Співробітник', 'ipn': '1999999998', 'role': 'Employee', 'vacation_days_per_year': 24},
+    ])
+    db_operations.adjust_vacation_balance(employee_id, -2, 'перевірка')
+    employee = db_operations.get_employee_by_id(employee_id)
+    # 20 + (30 - 24) - 8 - 2
+    result = db_operations.reconcile_vacation_balances()
+    failures = check(not result['drifted'] and employee['remaining_vacation_days'] == 16,
+                     f"Write paths keep the counter and ledger in step (balance {employee['remaining_vacation_days']})",
+                     f"Write paths drift: {result['drifted']}, balance {employee['remaining_vacation_days']}")
+    kinds = [entry['entry_type'] for entry in db_operations.get_vacation_ledger(employee_id)]
+    failures += check(kinds[0] == vacation_ledger.ENTRY_ADJUSTMENT and kinds[-1] == vacation_ledger.ENTRY_OPENING,
+                      f"Ledger entries: {', '.join(reversed(kinds))}", f"Unexpected ledger entries: {kinds}")
+    return failures
+
+
+def check_migration():
+    """Міграція записує поточні залишки як початкові; розбіжностей після неї немає."""
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = ConnectionPool(os.path.join(tmp, 'legacy.db')).open_dedicated()
+        all_migrations = migrations.MIGRATIONS
+        migrations.MIGRATIONS = [m for m in all_migrations if m[0] < 11]
+        try:
+            migrations.apply_migrations(conn)
+        finally:
+            migrations.MIGRATIONS = all_migrations
+        conn.executemany("""
+            INSERT INTO staff (fio, ipn, role, vacation_days_per_year, remaining_vacation_days) VALUES (?, ?, 'Employee', 24, ?)
+        """, [(f"Співробітник {i}", f"{1000000000 + i}", 24 - i) for i in range(10)])
+        conn.commit()
+        migrations.apply_migrations(conn)
+        result = vacation_ledger.reconcile(conn)
+        openings = conn.execute("SELECT COUNT(*) FROM vacation_ledger WHERE entry_type = 'opening'").fetchone()[0]
+        conn.close()
+    return check(openings == 10 and not result['drifted'], "Migration records opening balances",
+                 f"Migration: {openings} opening entries, {len(result['drifted'])} drifted")
+
+
+def main():
+    failures = 0
+    rng = random.Random(3)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_operations.configure_database(os.path.join(tmp, 'bench.db'))
+        db_operations._init_db()
+        build_company(rng)
+
+        print(f"🧪 Vacation ledger: {STAFF_COUNT} staff, {STAFF_COUNT * VACATIONS_PER_PERSON} vacations")
+        print("-" * 50)
+        drifted = sorted(rng.sample(range(1, STAFF_COUNT + 1), DRIFTED))
+        with db_operations.db_connection() as conn:
+            conn.executemany("UPDATE staff SET remaining_vacation_days = remaining_vacation_days + ? WHERE id = ?",
+                             [(rng.choice((-3, -1, 1, 2)), staff_id) for staff_id in drifted])
+            conn.commit()
+            loop_time, loop_result = timed(lambda: reconcile_one_by_one(conn))
+        report_time, report = timed(lambda: db_operations.reconcile_vacation_balances())
+        print(f"reconcile, per employee:  {loop_time * 1e3:>8.1f}ms")
+        print(f"reconcile, one query:     {report_time * 1e3:>8.1f}ms")
+        found = [row['staff_id'] for row in report['drifted']]
+        failures += check(found == drifted == loop_result, f"Reconciliation finds exactly the {DRIFTED} drifted balances",
+                          f"Reconciliation found {len(found)} drifted balances, expected {DRIFTED}")
+        repair_time, repaired = timed(lambda: db_operations.reconcile_vacation_balances(repair=True))
+        after = db_operations.reconcile_vacation_balances()
+        print(f"repair:                   {repair_time * 1e3:>8.1f}ms")
+        failures += check(repaired['repaired'] == DRIFTED and not after['drifted'], "Repair sets counters to the ledger balance",
+                          f"Repair: {repaired['repaired']} repaired, {len(after['drifted'])} still drifted")
+
+        with db_operations.db_connection() as conn:
+            before = dict(conn.execute("SELECT id, remaining_vacation_days FROM staff").fetchall())
+            per_year = dict(conn.execute("SELECT id, vacation_days_per_year FROM staff").fetchall())
+            loop_time, _ = timed(lambda: rollover_one_by_one(conn, 2027))
+            conn.rollback()
+        rollover_time, rollover = timed(lambda: db_operations.run_annual_rollover(2027, carry_over_limit=CARRY_OVER))
+        print(f"rollover, per employee:   {loop_time * 1e3:>8.1f}ms")
+        print(f"rollover, set-based:      {rollover_time * 1e3:>8.1f}ms")
+        with db_operations.db_connection() as conn:
+            balances = dict(conn.execute("SELECT id, remaining_vacation_days FROM staff").fetchall())
+        expected = {staff_id: min(remaining, CARRY_OVER) + per_year[staff_id] for staff_id, remaining in before.items()}
+        failures += check(balances == expected and not db_operations.reconcile_vacation_balances()['drifted'],
+                          f"Rollover: {rollover['accrued']} accrued, {rollover['expired']} capped at {CARRY_OVER} days",
+                          "Rollover balances are wrong or drift from the ledger")
+        try:
+            db_operations.run_annual_rollover(2027)
+            failures += check(False, "", "Second rollover for the same year was accepted")
+        except ValueError:
+            print("✅ Second rollover for the same year is rejected")
+
+        failures += check_write_paths()
+        db_operations._watcher.reset()
+        db_operations._pool.close_all()
+    failures += check_migration()
+
+    print("-" * 50)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк та перевірка перетину відпусток (data/vacation_overlaps.py).
+
+Для 500 співробітників з 200 відпустками кожен порівнюється пряма перевірка
+- EXISTS з умовою start <= end AND end >= start, що переглядає в індексі
+всі ранніші відпустки співробітника - з одним пошуком (find_overlap).
+Перевіряється, що відповіді однакові, що пакетна перевірка find_overlaps
+збігається з попарним порівнянням, що add_vacation та
+update_employee_data_and_vacation відхиляють перетини (зокрема паралельні
+додавання одного періоду), і що міграція позначає співробітників з наявними
+перетинами, для яких перевірка знаходить і відпустки, що містять новий період.
+"""
+
+import sys
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data import db_operations, migrations, vacation_overlaps
+from data.db_pool import ConnectionPool
+
+STAFF_COUNT = 500
+VACATIONS_PER_PERSON = 200
+PROBES = 5000
+BATCH_SIZE = 5000
+FIRST_DAY = date(2000, 1, 1)
+CONCURRENT_WRITERS = 8
+
+
+def build_staff(rng):
+    """Співробітники з відпустками, що не перетинаються (проміжки 1-30 днів)."""
+    rows = [(f"Співробітник {i}", f"{1000000000 + i}", 'Employee', None, 24, 24) for i in range(STAFF_COUNT)]
+    with db_operations.db_connection() as conn:
+        conn.executemany("""
+            INSERT INTO staff (fio, ipn, role, manager_fio, vacation_days_per_year, remaining_vacation_days)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, rows)
+        vacations = []
+        for staff_id in range(1, STAFF_COUNT + 1):
+            day = FIRST_DAY + timedelta(days=rng.randrange(30))
+            for _ in range(VACATIONS_PER_PERSON):
+                end = day + timedelta(days=rng.randrange(14))
+                vacations.append((staff_id, day.isoformat(), end.isoformat(), (end - day).days + 1))
+                day = end + timedelta(days=rng.randrange(1, 31))
+        conn.executemany(
+            "INSERT INTO vacations (staff_id, start_date, end_date, total_days) VALUES (?, ?, ?, ?)", vacations
+        )
+        conn.commit()
+
+
+def random_period(rng):
+    start = FIRST_DAY + timedelta(days=rng.randrange(VACATIONS_PER_PERSON * 25))
+    return start.isoformat(), (start + timedelta(days=rng.randrange(14))).isoformat()
+
+
+def naive_overlap(conn, staff_id, start_date, end_date):
+    return conn.execute("""
+        SELECT EXISTS (
+            SELECT 1 FROM vacations
+            WHERE staff_id = ? AND start_date <= ? AND end_date >= ?
+        )
+    """, (staff_id, end_date, start_date)).fetchone()[0]
+
+
+def brute_force_conflicts(conn, batch):
+    """Індекси рядків пакета, що перетинаються з наявною відпусткою або іншим рядком."""
+    existing = {}
+    for staff_id, start_date, end_date in conn.execute("SELECT staff_id, start_date, end_date FROM vacations"):
+        existing.setdefault(staff_id, []).append((start_date, end_date))
+    conflicting = set()
+    for i, (staff_id, start_date, end_date) in enumerate(batch):
+        if any(start <= end_date and end >= start_date for start, end in existing.get(staff_id, ())):
+            conflicting.add(i)
+        for j, (other_staff, other_start, other_end) in enumerate(batch):
+            if j != i and other_staff == staff_id and other_start <= end_date and other_end >= start_date:
+                conflicting.add(i)
+    return conflicting
+
+
+def timed(call):
+    start = time.perf_counter()
+    result = call()
+    return time.perf_counter() - start, result
+
+
+def check_write_paths():
+    failures = 0
+    employee_id = db_operations.add_employee('Новий Співробітник', '1999999999', None, 'Employee', 24)
+    first = db_operations.add_vacation(employee_id, '2031-03-02', '2031-03-06', 5)
+    second = db_operations.add_vacation(employee_id, '2031-03-16', '2031-03-20', 5)
+    rejected = [
+        db_operations.add_vacation(employee_id, '2031-03-06', '2031-03-08', 3),
+        db_operations.add_vacation(employee_id, '2031-02-27', '2031-03-03', 5),
+    ]
+    if not first or not second or any(rejected):
+        print("❌ add_vacation accepted an overlapping vacation")
+        failures += 1
+    else:
+        print("✅ add_vacation rejects overlapping vacations")
+
+    def edit(start_date, end_date):
+        return db_operations.update_employee_data_and_vacation(employee_id, {
+            'fio': 'Новий Співробітник', 'ipn': '1999999999', 'role': 'Employee', 'manager_fio': None,
+            'vacation_days_per_year': 24, 'target_vacation_id': second, 'vacation_start_date': start_date, 'vacation_end_date': end_date,
+        })
+
+    overlapping = edit('2031-03-05', '2031-03-09')
+    own_period = edit('2031-03-17', '2031-03-21')
+    if overlapping[0] or not own_period[0]:
+        print(f"❌ Vacation edit: overlap {overlapping[:2]}, own period {own_period[:2]}")
+        failures += 1
+    else:
+        print(f"✅ Vacation edit rejects overlaps ({overlapping[1]}) and allows moving within its own period")
+    return failures
+
+
+def check_migration_report():
+    """Міграція з наявними перетинами не зупиняється, а повідомляє про них."""
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = ConnectionPool(os.path.join(tmp, 'legacy.db')).open_dedicated()
+        # База на версії до перевірки перетинів
+        all_migrations = migrations.MIGRATIONS
+        migrations.MIGRATIONS = [m for m in all_migrations if m[0] < 10]
+        try:
+            migrations.apply_migrations(conn)
+        finally:
+            migrations.MIGRATIONS = all_migrations
+        conn.execute("INSERT INTO staff (fio, ipn, role, vacation_days_per_year, remaining_vacation_days) VALUES ('A', '1', 'Employee', 24, 24)")
+        conn.execute("INSERT INTO staff (fio, ipn, role, vacation_days_per_year, remaining_vacation_days) VALUES ('B', '2', 'Employee', 24, 24)")
+        conn.executemany("INSERT INTO vacations (staff_id, start_date, end_date, total_days) VALUES (1, ?, ?, 5)",
+                         [('2031-01-01', '2031-01-05'), ('2031-01-04', '2031-01-08'), ('2031-02-01', '2031-02-05'),
+                          ('2031-03-01', '2031-03-31'), ('2031-03-10', '2031-03-12')])
+        conn.execute("INSERT INTO vacations (staff_id, start_date, end_date, total_days) VALUES (2, '2031-03-01', '2031-03-31', 31)")
+        conn.commit()
+        migrations.apply_migrations(conn)
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        count = vacation_overlaps.count_existing_overlaps(conn)
+        flagged = [row[0] for row in conn.execute("SELECT staff_id FROM legacy_overlap_staff")]
+        # Відпустка 03-10..03-12 лежить усередині 03-01..03-31: пошук за найпізнішим початком її не бачить
+        contained = vacation_overlaps.find_overlap(conn, 1, '2031-03-20', '2031-03-21')
+        conn.close()
+    if count != 2 or 'idx_vacations_staff_start_end' not in indexes or 'idx_vacations_staff_start' in indexes:
+        print(f"❌ Migration: {count} overlaps reported, indexes {sorted(i for i in indexes if 'vacations' in i)}")
+        return 1
+    if flagged != [1] or not contained or contained['start_date'] != '2031-03-01':
+        print(f"❌ Legacy overlaps: flagged {flagged}, containing vacation {contained}")
+        return 1
+    print("✅ Migration replaces idx_vacations_staff_start, flags legacy overlaps, and the range check finds them")
+    return 0
+
+
+def check_concurrent_adds():
+    """Паралельні add_vacation з однаковим періодом: записується рівно одна відпустка."""
+    employee_id = db_operations.add_employee('Паралельний Співробітник', '1999999990', None, 'Employee', 24, 24)
+    barrier = threading.Barrier(CONCURRENT_WRITERS)
+    results = []
+
+    def writer():
+        barrier.wait()
+        results.append(db_operations.add_vacation(employee_id, '2032-05-04', '2032-05-08', 5))
+
+    threads = [threading.Thread(target=writer) for _ in range(CONCURRENT_WRITERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    accepted = [result for result in results if result]
+    remaining = db_operations.get_employee_by_id(employee_id)['remaining_vacation_days']
+    if len(accepted) != 1 or remaining != 19:
+        print(f"❌ Concurrent adds: {len(accepted)} of {CONCURRENT_WRITERS} accepted, remaining {remaining}")
+        return 1
+    print(f"✅ {CONCURRENT_WRITERS} concurrent adds of one period: 1 accepted, balance charged once")
+    return 0
+
+
+def main():
+    failures = 0
+    rng = random.Random(11)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_operations.configure_database(os.path.join(tmp, 'bench.db'))
+        db_operations._init_db()
+        build_staff(rng)
+        probes = [(rng.randrange(1, STAFF_COUNT + 1), *random_period(rng)) for _ in range(PROBES)]
+
+        print(f"🧪 Vacation overlaps: {STAFF_COUNT} staff × {VACATIONS_PER_PERSON} vacations, {PROBES} probes")
+        print("-" * 50)
+        with db_operations.db_connection() as conn:
+            naive_time, naive = timed(lambda: [naive_overlap(conn, *probe) for probe in probes])
+            probe_time, found = timed(lambda: [vacation_overlaps.find_overlap(conn, *probe) for probe in probes])
+            print(f"range scan:   {naive_time / PROBES * 1e6:>8.1f}µs per check")
+            print(f"index probe:  {probe_time / PROBES * 1e6:>8.1f}µs per check")
+            if [bool(result) for result in naive] != [result is not None for result in found]:
+                print("❌ Index probe disagrees with the range scan")
+                failures += 1
+            else:
+                print(f"✅ Index probe matches the range scan ({sum(naive)} overlaps)")
+
+            batch = [(rng.randrange(1, 51), *random_period(rng)) for _ in range(BATCH_SIZE)]
+            batch_time, conflicts = timed(lambda: vacation_overlaps.find_overlaps(conn, batch))
+            expected = brute_force_conflicts(conn, batch)
+            print(f"batch check:  {batch_time * 1e3:>8.1f}ms for {BATCH_SIZE} rows")
+            if {conflict['index'] for conflict in conflicts} != expected:
+                print("❌ Batch validator disagrees with pairwise comparison")
+                failures += 1
+            else:
+                print(f"✅ Batch validator matches pairwise comparison ({len(conflicts)} conflicts)")
+
+        failures += check_write_paths()
+        failures += check_concurrent_adds()
+        db_operations._watcher.reset()
+        db_operations._pool.close_all()
+    failures += check_migration_report()
+
+    print("-" * 50)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
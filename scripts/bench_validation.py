@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк: построкова валідація рядків імпорту проти векторної
+data/staff_import.validate_batch.
+
+Для 100k рядків (частка значень з HTML-розміткою, некоректні ІПН та норми
+днів) порівнюється час попереднього циклу sanitize_input/validate_ipn/int по
+кожному запису з масками по стовпцях пакета DataFrame, а також перевіряється,
+що обидва способи приймають ті самі рядки з тими самими очищеними значеннями.
+"""
+
+import sys
+import os
+import random
+import time
+import pandas as pd
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data import staff_import
+from utils.security import validate_ipn, sanitize_input
+
+ROW_COUNT = 100000
+BATCH_SIZE = 1000
+MARKUP_SHARE = 0.01
+INVALID_SHARE = 0.01
+
+
+def build_rows(count, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        fio = f"Співробітник {i}"
+        ipn = f"{1000000000 + i}"
+        days = str(rng.choice([24, 26, 28]))
+        if rng.random() < MARKUP_SHARE:
+            fio = f"<b>{fio}</b> & Co"
+        if rng.random() < INVALID_SHARE:
+            ipn = rng.choice(['', '12345', f"{ipn}9"])
+        if rng.random() < INVALID_SHARE:
+            days = rng.choice(['', 'двадцять', '-1', '24.5', '400'])
+        rows.append({'fio': fio, 'ipn': ipn, 'role': 'Employee',
+                     'manager_fio': f"Співробітник {i % 100}", 'vacation_days_per_year': days or None})
+    return rows
+
+
+def legacy_validate(rows):
+    """Попередня построкова валідація; діапазон днів перевіряється так само, як у validate_batch."""
+    staged = []
+    for row_no, emp in enumerate(rows, start=1):
+        fio = sanitize_input(emp.get('fio') or '')
+        ipn = sanitize_input(emp.get('ipn') or '')
+        if not fio or not ipn or not validate_ipn(ipn):
+            continue
+        try:
+            days = int(emp['vacation_days_per_year'])
+        except (TypeError, ValueError):
+            continue
+        if not 0 <= days <= staff_import.MAX_VACATION_DAYS_PER_YEAR:
+            continue
+        staged.append((row_no, fio, ipn, emp['role'], sanitize_input(emp['manager_fio']) or None, days))
+    return staged
+
+
+def vectorized_validate(frames):
+    staged = []
+    first_row_no = 1
+    for frame in frames:
+        rows, _ = staff_import.validate_batch(frame, first_row_no)
+        staged.extend(rows)
+        first_row_no += len(frame)
+    return staged
+
+
+def main():
+    rows = build_rows(ROW_COUNT)
+    frames = [pd.DataFrame(rows[i:i + BATCH_SIZE], dtype=str) for i in range(0, ROW_COUNT, BATCH_SIZE)]
+
+    start = time.perf_counter()
+    legacy = legacy_validate(rows)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectorized = vectorized_validate(frames)
+    vectorized_time = time.perf_counter() - start
+
+    # int("24.5") у старому коді теж відхиляється, тож набори мають збігатися
+    if legacy != vectorized:
+        print(f"✗ Staged rows differ: {len(legacy)} != {len(vectorized)}")
+        sys.exit(1)
+    print(f"rows: {ROW_COUNT}, accepted: {len(vectorized)}")
+    print(f"per-row:    {legacy_time * 1e3:8.0f}ms")
+    print(f"vectorized: {vectorized_time * 1e3:8.0f}ms ({legacy_time / vectorized_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
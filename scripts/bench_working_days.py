@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк та перевірка розрахунку днів (utils/date_utils.py).
+
+Для 100 000 відпусток порівнюються: старий calculate_days (два strptime на
+виклик) з новим скалярним шляхом і пакетним calculate_days_batch, та
+поденний підрахунок робочих днів у циклі з working_days_batch
+(numpy.busday_count з кешованим календарем свят). Перевіряються результати,
+дати Великодня та свят України за роками, маска вихідних і помилки формату.
+"""
+
+import sys
+import os
+import random
+import time
+from datetime import date, datetime, timedelta
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import date_utils
+
+VACATIONS = 100000
+REPEATS = 3
+
+
+def legacy_calculate_days(start_date, end_date):
+    d1 = datetime.strptime(start_date, '%Y-%m-%d')
+    d2 = datetime.strptime(end_date, '%Y-%m-%d')
+    return (d2 - d1).days + 1
+
+
+def naive_working_days(start_date, end_date, holidays, weekdays):
+    day, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    count = 0
+    while day <= end:
+        if day.weekday() in weekdays and day not in holidays:
+            count += 1
+        day += timedelta(days=1)
+    return count
+
+
+def best_time(call):
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = call()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def check(condition, ok, failure):
+    print(f"✅ {ok}" if condition else f"❌ {failure}")
+    return 0 if condition else 1
+
+
+def main():
+    failures = 0
+    rng = random.Random(5)
+    periods = []
+    for _ in range(VACATIONS):
+        start = date(2015, 1, 1) + timedelta(days=rng.randrange(365 * 15))
+        periods.append((start.isoformat(), (start + timedelta(days=rng.randrange(28))).isoformat()))
+    starts, ends = [p[0] for p in periods], [p[1] for p in periods]
+
+    print(f"🧪 Day calculations: {VACATIONS} vacations")
+    print("-" * 50)
+    legacy_time, legacy = best_time(lambda: [legacy_calculate_days(s, e) for s, e in periods])
+    scalar_time, scalar = best_time(lambda: [date_utils.calculate_days(s, e) for s, e in periods])
+    batch_time, batch = best_time(lambda: date_utils.calculate_days_batch(starts, ends))
+    print(f"calendar days, strptime:     {legacy_time * 1e3:>8.1f}ms")
+    print(f"calendar days, scalar:       {scalar_time * 1e3:>8.1f}ms")
+    print(f"calendar days, batch:        {batch_time * 1e3:>8.1f}ms")
+    failures += check(legacy == scalar == batch.tolist(), "Calendar day counts match the strptime version",
+                      "Calendar day counts differ from the strptime version")
+
+    holidays = {day.astype(date) for day in date_utils.get_holidays()}
+    naive_time, naive = best_time(lambda: [naive_working_days(s, e, holidays, range(5)) for s, e in periods])
+    date_utils.get_business_calendar.cache_clear()
+    working_time, working = best_time(lambda: date_utils.working_days_batch(starts, ends))
+    print(f"working days, day by day:    {naive_time * 1e3:>8.1f}ms")
+    print(f"working days, busday_count:  {working_time * 1e3:>8.1f}ms")
+    failures += check(naive == working.tolist(), "Working day counts match the day-by-day count",
+                      "Working day counts differ from the day-by-day count")
+    failures += check(all(date_utils.working_days(s, e) == w for (s, e), w in zip(periods[:1000], naive)),
+                      "Scalar working_days matches the batch", "Scalar working_days differs from the batch")
+
+    six_day = date_utils.working_days_batch(starts[:1000], ends[:1000], calendar='none', weekmask='1111110')
+    failures += check(six_day.tolist() == [naive_working_days(s, e, set(), range(6)) for s, e in periods[:1000]],
+                      "Custom weekend mask without holidays", "Custom weekend mask counts are wrong")
+
+    easter = {2021: date(2021, 5, 2), 2023: date(2023, 4, 16), 2024: date(2024, 5, 5), 2025: date(2025, 4, 20)}
+    failures += check(all(date_utils._orthodox_easter(year) == day for year, day in easter.items()),
+                      "Orthodox Easter dates", "Orthodox Easter dates are wrong")
+    expected_2024 = ['01-01', '03-08', '05-01', '05-05', '05-08', '06-23', '06-28', '07-15', '08-24', '10-01', '12-25']
+    actual_2024 = sorted(day.strftime('%m-%d') for day in date_utils._ukrainian_holidays(2024))
+    failures += check(actual_2024 == expected_2024, "Ukrainian holidays for 2024", f"Holidays for 2024: {actual_2024}")
+    # 2024-01-01 - 2024-01-10: понеділок 1 січня - свято, 6-7 січня - вихідні
+    failures += check(date_utils.working_days('2024-01-01', '2024-01-10') == 7 and date_utils.calculate_days('2024-01-01', '2024-01-10') == 10,
+                      "Working and calendar days for 2024-01-01 - 2024-01-10", "Wrong counts for 2024-01-01 - 2024-01-10")
+
+    rejected = 0
+    for bad in ('2024-13-01', '20240101', '2024-W01-1', '2024-01'):
+        for call in (lambda: date_utils.calculate_days(bad, '2024-01-10'),
+                     lambda: date_utils.working_days(bad, '2024-01-10'),
+                     lambda: date_utils.working_days_batch([bad], ['2024-01-10'])):
+            try:
+                call()
+            except ValueError:
+                rejected += 1
+    failures += check(rejected == 12, "Malformed dates raise ValueError", f"Only {rejected} of 12 malformed inputs rejected")
+
+    print("-" * 50)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Перевірка планів запитів db_operations на синтетичній базі (100k відпусток).
+
+Кожна функція db_operations викликається на згенерованих даних, усі SQL-запити,
+які вона виконує, перехоплюються через trace callback, і для кожного
+виконується EXPLAIN QUERY PLAN. Скрипт завершується з кодом 1, якщо запит
+повністю сканує таблицю (SCAN) або SQLite будує AUTOMATIC INDEX замість
+керованого індексу з data/migrations.INDEXES.
+"""
+
+import sys
+import os
+import re
+import random
+import tempfile
+from datetime import date, timedelta
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data import db_operations, migrations, vacation_summary, staff_import, vacation_archive
+from utils.rate_limiter import RateLimiter, SQLiteRateLimitStore
+
+STAFF_COUNT = 10000
+VACATION_COUNT = 100000
+CHAIN_DEPTH = 12
+YEARS = 10
+
+# Функції, для яких повне сканування є очікуваним: {ім'я функції: причина}
+ALLOWED_SCANS = {
+    'get_all_employees': "повертає всіх співробітників за призначенням",
+    'get_staff_snapshot': "знімок усіх співробітників для HR-сторінки",
+    'get_employees_page': "COUNT(*) для кількості сторінок та фільтр contains переглядають staff",
+    'reconcile_vacation_balances': "звіряє залишки всіх співробітників з журналом",
+    'run_annual_rollover': "нараховує дні всім співробітникам",
+    'SQLiteRateLimitStore.consume': "обмеження max_keys раз на purge_every викликів проходить індекс expires_at",
+}
+
+SQL_STATEMENT_RE = re.compile(r'^\s*(SELECT|WITH|UPDATE|DELETE|INSERT)\b', re.IGNORECASE)
+CTE_NAME_RE = re.compile(r'(\w+)\s+AS\s*(?:NOT\s+)?(?:MATERIALIZED\s*)?\(', re.IGNORECASE)
+PLAN_OBJECT_RE = re.compile(r'^(SCAN|SEARCH) (\w+)')
+
+
+def build_synthetic_database():
+    """Наповнює базу: ланцюжки підпорядкування глибиною CHAIN_DEPTH та VACATION_COUNT відпусток."""
+    rng = random.Random(42)
+    staff_rows = []
+    for i in range(STAFF_COUNT):
+        level = i % CHAIN_DEPTH
+        manager_fio = f"Співробітник {i - 1}" if level else None
+        role = 'Manager' if level < CHAIN_DEPTH - 1 else 'Employee'
+        staff_rows.append((f"Співробітник {i}", f"{1000000000 + i}", role, manager_fio, 24, 24))
+
+    first_day = date.today().replace(month=1, day=1) - timedelta(days=365 * (YEARS - 1))
+    vacation_rows = []
+    for _ in range(VACATION_COUNT):
+        start = first_day + timedelta(days=rng.randrange(365 * YEARS))
+        length = rng.randint(1, 14)
+        end = start + timedelta(days=length - 1)
+        vacation_rows.append((rng.randint(1, STAFF_COUNT), start.isoformat(), end.isoformat(), length))
+
+    with db_operations.db_connection() as conn:
+        conn.executemany("""
+            INSERT INTO staff (fio, ipn, role, manager_fio, vacation_days_per_year, remaining_vacation_days)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, staff_rows)
+        conn.executemany(
+            "INSERT INTO vacations (staff_id, start_date, end_date, total_days) VALUES (?, ?, ?, ?)",
+            vacation_rows
+        )
+        migrations._backfill_manager_ids(conn)
+        migrations._backfill_staff_hierarchy(conn)
+        vacation_summary.rebuild(conn)
+        conn.commit()
+
+
+def exercised_calls():
+    """(ім'я функції, виклик) для кожної функції db_operations, що звертається до бази."""
+    today = date.today()
+    # Сама задача виконується в іншому потоці (поза trace); перевіряються записи jobs
+    started_jobs = []
+    rate_limiter = RateLimiter(5, 900, store=SQLiteRateLimitStore(db_operations.db_connection, purge_every=1))
+    return [
+        ('get_all_employees', lambda: db_operations.get_all_employees()),
+        ('get_staff_snapshot', lambda: db_operations.get_staff_snapshot()),
+        ('get_employees_page', lambda: db_operations.get_employees_page(
+            '{fio} icontains співробітник && {remaining_vacation_days} >= 1', [{'column_id': 'fio', 'direction': 'asc'}],
+            page_size=10, after=db_operations.get_employees_page(None, [{'column_id': 'fio', 'direction': 'asc'}])[1])),
+        ('SQLiteRateLimitStore.consume', lambda: [rate_limiter.hit('login-ipn:test') for _ in range(6)]),
+        ('get_employees_by_ids', lambda: db_operations.get_employees_by_ids([5, 7, 11])),
+        ('get_employee_by_id', lambda: db_operations.get_employee_by_id(5)),
+        ('get_employee_by_ipn', lambda: db_operations.get_employee_by_ipn('1000000005')),
+        ('get_managers', lambda: db_operations.get_managers()),
+        ('get_vacation_history', lambda: db_operations.get_vacation_history(today.year)),
+        ('get_vacation_history_page', lambda: db_operations.get_vacation_history_page(
+            today.year, page_size=10, after=db_operations.get_vacation_history_page(today.year, page_size=10)[1])),
+        ('get_vacation_history_rows', lambda: db_operations.get_vacation_history_rows([3, 5, 8])),
+        ('count_vacation_history', lambda: db_operations.count_vacation_history(today.year)),
+        ('get_vacation_history_for_employee', lambda: db_operations.get_vacation_history_for_employee(5)),
+        ('get_session_identity', lambda: db_operations.get_session_identity(5)),
+        ('get_employee_vacation_summary_by_id', lambda: db_operations.get_employee_vacation_summary_by_id(5)),
+        ('get_employee_vacation_summary_by_ipn', lambda: db_operations.get_employee_vacation_summary_by_ipn('1000000005')),
+        ('get_employee_details_for_edit', lambda: db_operations.get_employee_details_for_edit(5)),
+        ('get_subordinates_vacation_details', lambda: db_operations.get_subordinates_vacation_details('Співробітник 0')),
+        ('get_team_occupancy', lambda: db_operations.get_team_occupancy(1, today, today + timedelta(days=90))),
+        ('find_overlapping_vacation', lambda: db_operations.find_overlapping_vacation(7, today.isoformat(), today.isoformat(), 3)),
+        ('validate_vacation_batch', lambda: db_operations.validate_vacation_batch([(7, today.isoformat(), today.isoformat())])),
+        ('add_employee', lambda: db_operations.add_employee('Новий Співробітник', '1999999999', 'Співробітник 0', 'Employee', 24)),
+        ('add_vacation', lambda: db_operations.add_vacation(7, today.isoformat(), today.isoformat(), 1)),
+        ('delete_vacation', lambda: db_operations.delete_vacation(3)),
+        ('update_employee_data_and_vacation', lambda: db_operations.update_employee_data_and_vacation(7, {
+            'fio': 'Співробітник 7', 'ipn': '1000000007', 'role': 'Manager', 'manager_fio': 'Співробітник 6',
+            'vacation_days_per_year': 26, 'target_vacation_id': 1,
+            'vacation_start_date': today.isoformat(), 'vacation_end_date': today.isoformat(),
+        })),
+        ('batch_import_employees', lambda: db_operations.batch_import_employees([
+            {'fio': 'Співробітник 8', 'ipn': '1000000008', 'role': 'Manager', 'vacation_days_per_year': 25},
+            {'fio': 'Імпортований', 'ipn': '1888888888', 'role': 'Employee', 'manager_fio': 'Співробітник 8'},
+        ])),
+        ('start_import_job', lambda: started_jobs.append(db_operations.start_import_job([
+            {'fio': 'Фоновий', 'ipn': '1777777777', 'role': 'Employee'},
+        ], owner='check'))),
+        ('get_import_job', lambda: db_operations.get_import_job(started_jobs[0], owner='check')),
+        ('roll_forward_vacation_summaries', lambda: db_operations.roll_forward_vacation_summaries(today + timedelta(days=30))),
+        ('delete_employee', lambda: db_operations.delete_employee(9)),
+        ('get_change_log_position', lambda: db_operations.get_change_log_position()),
+        ('changes_since', lambda: db_operations.changes_since(1, limit=100)),
+        ('compact_change_log', lambda: db_operations.compact_change_log(compact_after_days=-1, retention_days=10000)),
+        ('adjust_vacation_balance', lambda: db_operations.adjust_vacation_balance(8, 2, 'check')),
+        ('get_vacation_ledger', lambda: db_operations.get_vacation_ledger(8)),
+        ('reconcile_vacation_balances', lambda: db_operations.reconcile_vacation_balances(repair=True)),
+        ('run_annual_rollover', lambda: db_operations.run_annual_rollover(today.year + 1, carry_over_limit=10)),
+        ('archive_closed_vacations', lambda: db_operations.archive_closed_vacations(today=today)),
+        # Роки до межі архіву читаються через vacations_all
+        ('get_vacation_history_page (archive)', lambda: db_operations.get_vacation_history_page(
+            today.year - 5, page_size=10, after=db_operations.get_vacation_history_page(today.year - 5, page_size=10)[1])),
+        ('count_vacation_history (archive)', lambda: db_operations.count_vacation_history(today.year - 5)),
+        ('get_team_occupancy (archive)', lambda: db_operations.get_team_occupancy(
+            1, date(today.year - 5, 1, 1), date(today.year - 5, 3, 31))),
+    ]
+
+
+def capture_statements():
+    """Виконує всі виклики та повертає {ім'я функції: [SQL]}."""
+    captured = {}
+    current = {'name': None}
+
+    # Тригери звітують про кожен рядок, тож однакові оператори зберігаються один раз
+    seen = set()
+
+    def trace(statement):
+        if current['name'] and SQL_STATEMENT_RE.match(statement) and (current['name'], statement) not in seen:
+            seen.add((current['name'], statement))
+            captured.setdefault(current['name'], []).append(statement)
+
+    # Пул видає потоку одне й те саме з'єднання, тож trace діє на всі виклики нижче
+    with db_operations.db_connection() as conn:
+        conn.set_trace_callback(trace)
+    for name, call in exercised_calls():
+        current['name'] = name
+        call()
+    current['name'] = None
+    with db_operations.db_connection() as conn:
+        conn.set_trace_callback(None)
+    return captured
+
+
+def _names_and_aliases(statement, names):
+    aliases = set()
+    for name in names:
+        alias_re = re.compile(rf'\b{name}\s+(?:AS\s+)?(\w+)', re.IGNORECASE)
+        aliases.update(alias.lower() for alias in alias_re.findall(statement))
+    return names | aliases
+
+
+def scan_offenders(conn, statement):
+    """
+    Повертає рядки плану, що означають повне сканування базової таблиці
+    або автоматичний індекс на ній. Проміжні результати CTE та тимчасові
+    робочі таблиці (temp) не враховуються.
+    """
+    names = {name.lower() for name in CTE_NAME_RE.findall(statement)}
+    # Представлення (vacations_all) - гілки UNION ALL перевіряються окремими рядками плану
+    names |= {row[0].lower() for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'view'")}
+    names |= {row[0].lower() for row in conn.execute("SELECT name FROM temp.sqlite_master WHERE type = 'table'")}
+    skipped = _names_and_aliases(statement, names)
+    offenders = []
+    for row in conn.execute('EXPLAIN QUERY PLAN ' + statement):
+        detail = row[3]
+        match = PLAN_OBJECT_RE.match(detail)
+        if not match or match.group(2).lower() in skipped:
+            continue
+        if match.group(1) == 'SCAN' or 'AUTOMATIC' in detail:
+            offenders.append(detail)
+    return offenders
+
+
+def main():
+    print(f"🧪 Query plan check: {STAFF_COUNT} staff, {VACATION_COUNT} vacations")
+    print("-" * 50)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_operations.configure_database(os.path.join(tmp, 'plans.db'))
+        db_operations._init_db()
+        build_synthetic_database()
+
+        captured = capture_statements()
+        failures = 0
+        with db_operations.db_connection() as conn:
+            # Робочі таблиці імпорту видаляються після нього - відтворюємо порожніми для EXPLAIN
+            for statement in staff_import._STAGING_TABLES:
+                conn.execute(statement)
+            conn.execute(vacation_archive.BATCH_TABLE)
+            missing = migrations.missing_indexes(conn)
+            if missing:
+                print(f"❌ Missing managed indexes: {', '.join(missing)}")
+                failures += 1
+
+            for name, _ in exercised_calls():
+                statements = captured.get(name, [])
+                if not statements:
+                    print(f"❌ {name}: no SQL captured")
+                    failures += 1
+                    continue
+                offenders = [detail for sql in statements for detail in scan_offenders(conn, sql)]
+                if offenders and name in ALLOWED_SCANS:
+                    print(f"⚠ {name}: {'; '.join(offenders)} (allowed: {ALLOWED_SCANS[name]})")
+                elif offenders:
+                    print(f"❌ {name}: {'; '.join(offenders)}")
+                    failures += 1
+                else:
+                    print(f"✅ {name}: {len(statements)} statement(s) use indexes")
+        db_operations._pool.close_all()
+
+    print("-" * 50)
+    if failures:
+        print(f"❌ {failures} query plan check(s) failed")
+        sys.exit(1)
+    print("✅ All query plans use indexes")
+
+
+if __name__ == "__main__":
+    main()
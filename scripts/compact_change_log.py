@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+Нічна задача: ущільнює журнал змін (change_log) до одного запису на рядок
+і видаляє записи, старші за термін зберігання (див. data/change_log.py).
+Використання (cron): cd /opt/vacation-dashboard && venv/bin/python scripts/compact_change_log.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data import db_operations
+
+
+def main():
+    db_operations._init_db()
+    result = db_operations.compact_change_log()
+    print(f"Change log entries merged: {result['compacted']}, pruned: {result['pruned']}")
+
+
+if __name__ == "__main__":
+    main()
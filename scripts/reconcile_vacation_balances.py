@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Звірка залишків відпусток з журналом балансу (data/vacation_ledger.py) та
+щорічне нарахування.
+Використання:
+  venv/bin/python scripts/reconcile_vacation_balances.py            # лише звіт
+  venv/bin/python scripts/reconcile_vacation_balances.py --repair   # звіт та виправлення
+  venv/bin/python scripts/reconcile_vacation_balances.py --rollover 2027 [--carry-over 10]
+"""
+
+import sys
+import os
+import argparse
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data import db_operations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vacation balance reconciliation")
+    parser.add_argument('--repair', action='store_true', help="set drifted balances to the ledger balance")
+    parser.add_argument('--rollover', type=int, metavar='YEAR', help="accrue the annual vacation days for YEAR")
+    parser.add_argument('--carry-over', type=int, metavar='DAYS', help="days kept from the previous year on rollover")
+    args = parser.parse_args()
+
+    db_operations._init_db()
+    if args.rollover:
+        try:
+            result = db_operations.run_annual_rollover(args.rollover, args.carry_over)
+        except ValueError as e:
+            print(e)
+            sys.exit(1)
+        print(f"Rollover {result['year']}: {result['accrued']} accrued, {result['expired']} expired")
+        return
+
+    result = db_operations.reconcile_vacation_balances(repair=args.repair)
+    for row in result['drifted']:
+        print(f"{row['staff_id']:>8} {row['fio']:<40} counter {row['remaining']:>5} "
+              f"ledger {row['ledger_balance']:>5} drift {row['drift']:>+5}")
+    print(f"Checked: {result['checked']}, drifted: {len(result['drifted'])}, repaired: {result['repaired']}")
+
+
+if __name__ == "__main__":
+    main()
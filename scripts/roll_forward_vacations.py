@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+Нічна задача: оновлює матеріалізоване зведення відпусток (vacation_summary)
+для співробітників, у яких відпустка закінчилась або почалась.
+Використання (cron): cd /opt/vacation-dashboard && venv/bin/python scripts/roll_forward_vacations.py
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data import db_operations
+
+
+def main():
+    db_operations._init_db()
+    refreshed = db_operations.roll_forward_vacation_summaries()
+    print(f"Vacation summaries refreshed: {refreshed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -61,6 +61,142 @@ def test_date_utils():
         print(f"❌ Date utils error: {e}")
         return False
 
+def test_import_job():
+    """Тестування фонового імпорту (на тимчасовій базі)"""
+    try:
+        print("Testing background import job...")
+        import time
+        import tempfile
+        import data.db_operations as db_ops
+
+        tmp = tempfile.mkdtemp()
+        db_ops.configure_database(os.path.join(tmp, 'jobs.db'))
+        db_ops._init_db()
+
+        rows = [
+            {'fio': 'Керівник', 'ipn': '1000000001', 'role': 'Manager'},
+            {'fio': 'Працівник', 'ipn': '1000000002', 'role': 'Employee', 'manager_fio': 'Керівник'},
+            {'fio': 'Без ІПН', 'ipn': ''},
+        ]
+        job_id = db_ops.start_import_job(rows, owner='tester', description='test.csv', chunk_size=1)
+        deadline = time.monotonic() + 30
+        job = db_ops.get_import_job(job_id, owner='tester')
+        while job['status'] in ('queued', 'running') and time.monotonic() < deadline:
+            time.sleep(0.1)
+            job = db_ops.get_import_job(job_id, owner='tester')
+
+        if db_ops.get_import_job(job_id, owner='someone-else') is not None:
+            print("❌ Job is visible to another user")
+            return False
+        if job['status'] != 'succeeded' or (job['imported'], job['updated'], job['error_count']) != (2, 0, 1):
+            print(f"❌ Unexpected job state: {job}")
+            return False
+        print(f"✅ Import job finished: {job['imported']} imported, {job['error_count']} error(s)")
+
+        # Давня задача в черзі не перервана, давня running - перервана і повторно не запускається
+        from data import jobs
+        with db_ops.db_connection() as conn:
+            queued_id = jobs.create_job(conn, 'employee_import', 'tester')
+            running_id = jobs.create_job(conn, 'employee_import', 'tester')
+            jobs.mark_running(conn, running_id)
+            conn.execute("UPDATE jobs SET updated_at = datetime('now', '-1 day') WHERE id IN (?, ?)",
+                         (queued_id, running_id))
+            conn.commit()
+            jobs.fail_stale_jobs(conn)
+            conn.commit()
+            statuses = (jobs.get_job(conn, queued_id)['status'], jobs.get_job(conn, running_id)['status'])
+            restarted = jobs.mark_running(conn, running_id)
+        if statuses != (jobs.STATUS_QUEUED, jobs.STATUS_FAILED) or restarted:
+            print(f"❌ Stale job handling: statuses {statuses}, restarted {restarted}")
+            return False
+        print("✅ Only stale running jobs are failed, and failed jobs are not started")
+        return True
+    except Exception as e:
+        print(f"❌ Import job error: {e}")
+        return False
+
+def test_session_identity():
+    """Тестування запису ідентичності в сесії (на тимчасовій базі)"""
+    try:
+        print("Testing session identity...")
+        import tempfile
+        import app
+        import data.db_operations as db_ops
+
+        tmp = tempfile.mkdtemp()
+        db_ops.configure_database(os.path.join(tmp, 'identity.db'))
+        db_ops._init_db()
+        db_ops.add_employee('Керівник', '1000000011', None, 'Manager', 24)
+        employee_id = db_ops.add_employee('Працівник', '1000000012', 'Керівник', 'Employee', 24)
+
+        with app.server.test_request_context():
+            app.process_login(1, None, '1000000012')
+            identity = app.session.get('identity')
+            if not identity or identity['staff_id'] != employee_id or identity['manager_scope'] is not None:
+                print(f"❌ Unexpected identity after login: {identity}")
+                return False
+
+            # Додавання відпустки не змінює ідентичність, зміна ролі HR - змінює
+            db_ops.add_vacation(employee_id, '2030-01-01', '2030-01-02', 2)
+            if app._current_identity()['data_version'] != identity['data_version']:
+                print("❌ Identity invalidated by an unrelated write")
+                return False
+            db_ops.update_employee_data_and_vacation(employee_id, {
+                'fio': 'Працівник', 'ipn': '1000000012', 'role': 'Manager', 'manager_fio': 'Керівник',
+                'vacation_days_per_year': 24,
+            })
+            identity = app._current_identity()
+            if identity['role'] != 'Manager' or app.session['user_role'] != 'Manager' or identity['manager_scope'] != employee_id:
+                print(f"❌ Identity not refreshed after HR edit: {identity}")
+                return False
+
+            db_ops.delete_employee(employee_id)
+            if app._current_identity() is not None or 'user_ipn' in app.session:
+                print("❌ Session kept for a deleted employee")
+                return False
+        print("✅ Session identity refreshed after HR edit and cleared after deletion")
+        return True
+    except Exception as e:
+        print(f"❌ Session identity error: {e}")
+        return False
+
+def test_login_rate_limit():
+    """Тестування ліміту спроб входу: рахуються лише невдалі спроби (на тимчасовій базі)"""
+    try:
+        print("Testing login rate limit...")
+        import tempfile
+        import app
+        import data.db_operations as db_ops
+
+        tmp = tempfile.mkdtemp()
+        db_ops.configure_database(os.path.join(tmp, 'login.db'))
+        db_ops._init_db()
+        db_ops.add_employee('Працівник', '1000000021', None, 'Employee', 24)
+        attempts = app.login_ipn_rate_limiter.max_attempts
+
+        # Повторні успішні входи (вхід - вихід) не вичерпують ліміт
+        for _ in range(attempts * 3):
+            with app.server.test_request_context():
+                pathname, _alert = app.process_login(1, None, '1000000021')
+            if pathname != '/employee':
+                print(f"❌ Successful login rejected after repeated logins: {pathname}")
+                return False
+
+        # Невдалі спроби для одного ІПН блокуються після ліміту
+        for _ in range(attempts):
+            with app.server.test_request_context():
+                app.process_login(1, None, '1000000029')
+        with app.server.test_request_context():
+            _pathname, alert = app.process_login(1, None, '1000000029')
+        if 'Забагато спроб' not in str(alert.children):
+            print(f"❌ Failed attempts are not limited: {alert.children}")
+            return False
+        print(f"✅ {attempts * 3} successful logins allowed, failed attempts limited after {attempts}")
+        return True
+    except Exception as e:
+        print(f"❌ Login rate limit error: {e}")
+        return False
+
 def main():
     """Основна функція тестування"""
     print("🧪 Starting application tests...")
@@ -69,7 +205,10 @@ def main():
     tests = [
         ("Imports", test_imports),
         ("Database", test_database),
-        ("Date Utils", test_date_utils)
+        ("Date Utils", test_date_utils),
+        ("Import Job", test_import_job),
+        ("Session Identity", test_session_identity),
+        ("Login Rate Limit", test_login_rate_limit)
     ]
     
     passed = 0
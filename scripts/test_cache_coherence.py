@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Багатопроцесна перевірка узгодженості кешу читань між воркерами.
+
+Як у gunicorn з кількома воркерами, окремі процеси працюють з одним файлом
+бази: процес-записувач додає відпустки (кожна зменшує залишок днів на 1) і
+після кожного коміту збільшує спільний лічильник, а процеси-читачі в циклі
+читають співробітника через кешований get_employee_by_id(). Читання, що
+почалося після коміту k, мусить бачити щонайменше k відпусток - тобто
+застарілість обмежена нулем комітів. Контрольний прогін з вимкненим
+TableVersionWatcher має показати застарілі читання (інакше тест нічого не
+перевіряє). Виводиться також частка влучань кешу та вартість перевірки.
+"""
+
+import sys
+import os
+import time
+import tempfile
+import multiprocessing
+from datetime import date, timedelta
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data import db_operations
+
+READERS = 3
+WRITES = 200
+WRITE_INTERVAL = 0.005
+ANNUAL_DAYS = 100000
+
+
+def writer(db_path, employee_id, commits, ready):
+    db_operations.configure_database(db_path)
+    ready.wait()
+    # Кожна відпустка - окремий день: перетини відхиляються
+    for i in range(WRITES):
+        day = (date.today() + timedelta(days=i)).isoformat()
+        if not db_operations.add_vacation(employee_id, day, day, 1):
+            raise RuntimeError("add_vacation failed")
+        commits.value = i + 1
+        time.sleep(WRITE_INTERVAL)
+
+
+def reader(db_path, employee_id, commits, ready, done, coherent, results):
+    db_operations.configure_database(db_path)
+    if not coherent:
+        db_operations._watcher.changed_tables = lambda: set()
+    db_operations.get_employee_by_id(employee_id)
+    ready.wait()
+    reads = stale = max_lag = 0
+    while not done.is_set():
+        committed = commits.value
+        employee = db_operations.get_employee_by_id(employee_id)
+        seen = ANNUAL_DAYS - employee['remaining_vacation_days']
+        reads += 1
+        if seen < committed:
+            stale += 1
+            max_lag = max(max_lag, committed - seen)
+    stats = db_operations.get_cache_stats()
+    results.put((reads, stale, max_lag, stats['hit_ratio']))
+
+
+def run(db_path, employee_id, coherent):
+    ctx = multiprocessing.get_context('spawn')
+    commits = ctx.Value('i', 0)
+    ready = ctx.Barrier(READERS + 1)
+    done = ctx.Event()
+    results = ctx.Queue()
+    readers = [ctx.Process(target=reader, args=(db_path, employee_id, commits, ready, done, coherent, results))
+               for _ in range(READERS)]
+    for process in readers:
+        process.start()
+    writer_process = ctx.Process(target=writer, args=(db_path, employee_id, commits, ready))
+    writer_process.start()
+    writer_process.join()
+    done.set()
+    collected = [results.get(timeout=60) for _ in readers]
+    for process in readers:
+        process.join()
+    if writer_process.exitcode != 0:
+        raise RuntimeError("writer process failed")
+    return collected
+
+
+def check_cost():
+    """Середня вартість перевірки без змін (PRAGMA data_version), мкс."""
+    db_operations._watcher.changed_tables()
+    count = 100000
+    start = time.perf_counter()
+    for _ in range(count):
+        db_operations._watcher.changed_tables()
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def main():
+    print("🧪 Cross-worker cache coherence test")
+    print("-" * 50)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'coherence.db')
+        db_operations.configure_database(db_path)
+        db_operations._init_db()
+        failures = 0
+        for coherent in (True, False):
+            employee_id = db_operations.add_employee(
+                f"Читач {int(coherent)}", f"100000000{int(coherent)}", None, 'Employee', ANNUAL_DAYS
+            )
+            collected = run(db_path, employee_id, coherent)
+            reads = sum(r[0] for r in collected)
+            stale = sum(r[1] for r in collected)
+            max_lag = max(r[2] for r in collected)
+            hit_ratio = sum(r[3] for r in collected) / len(collected)
+            label = "with watcher" if coherent else "watcher disabled"
+            summary = f"{reads} reads, {stale} stale, max lag {max_lag} commit(s), hit ratio {hit_ratio:.0%}"
+            if coherent and stale:
+                print(f"❌ {label}: {summary}")
+                failures += 1
+            elif not coherent and not stale:
+                print(f"❌ {label}: no stale reads observed, the test cannot detect staleness")
+                failures += 1
+            else:
+                print(f"✅ {label}: {summary}")
+        print(f"✅ Unchanged-database check: {check_cost():.1f} µs")
+        db_operations._watcher.reset()
+        db_operations._pool.close_all()
+    print("-" * 50)
+    if failures:
+        sys.exit(1)
+    print("✅ Cache staleness is bounded by the last commit")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,122 @@
-from datetime import datetime
+from datetime import date, timedelta
+from functools import lru_cache
+
+import numpy as np
+
+# Робочі дні рахуються numpy.busday_count за календарем (np.busdaycalendar):
+# маска вихідних та відсортований масив святкових днів будуються один раз на
+# пару (календар, маска) і кешуються. Для імпорту та звітів є пакетні функції,
+# що приймають масиви дат початку й кінця і рахують без циклу Python.
+
+# Маска робочих днів тижня, з понеділка ('1' - робочий день)
+DEFAULT_WEEKMASK = '1111100'
+DEFAULT_CALENDAR = 'UA'
+# Роки, для яких будуються календарі свят
+CALENDAR_YEARS = range(2000, 2101)
+
+
+def _orthodox_easter(year):
+    """Великдень за юліанським календарем (алгоритм Меєуса), переведений у григоріанський."""
+    a, b, c = year % 4, year % 7, year % 19
+    d = (19 * c + 15) % 30
+    e = (2 * a + 4 * b - d + 34) % 7
+    month, day = divmod(d + e + 114, 31)
+    return date(year, month, day + 1) + timedelta(days=year // 100 - year // 400 - 2)
+
+
+def _ukrainian_holidays(year):
+    """
+    Святкові дні (ст. 73 КЗпП) з урахуванням змін за роками. Перенесення
+    вихідних та обмеження воєнного стану не враховуються.
+    """
+    easter = _orthodox_easter(year)
+    holidays = [date(year, 1, 1), date(year, 3, 8), easter, easter + timedelta(days=49),
+                date(year, 5, 1), date(year, 6, 28), date(year, 8, 24)]
+    if year <= 2023:
+        holidays += [date(year, 1, 7), date(year, 5, 9)]
+    else:
+        holidays += [date(year, 5, 8), date(year, 7, 15)]
+    if year <= 2017:
+        holidays.append(date(year, 5, 2))
+    if year >= 2017:
+        holidays.append(date(year, 12, 25))
+    if 2015 <= year <= 2022:
+        holidays.append(date(year, 10, 14))
+    elif year >= 2023:
+        holidays.append(date(year, 10, 1))
+    if year in (2022, 2023):
+        holidays.append(date(year, 7, 28))
+    return holidays
+
+
+HOLIDAY_CALENDARS = {
+    'UA': _ukrainian_holidays,
+    'none': lambda year: [],
+}
+
+
+@lru_cache(maxsize=None)
+def get_business_calendar(calendar=DEFAULT_CALENDAR, weekmask=DEFAULT_WEEKMASK):
+    """np.busdaycalendar для календаря свят HOLIDAY_CALENDARS та маски вихідних."""
+    if calendar not in HOLIDAY_CALENDARS:
+        raise ValueError(f"Unknown holiday calendar: {calendar}")
+    holidays = [day for year in CALENDAR_YEARS for day in HOLIDAY_CALENDARS[calendar](year)]
+    return np.busdaycalendar(weekmask=weekmask, holidays=np.array(holidays, dtype='datetime64[D]'))
+
+
+def get_holidays(calendar=DEFAULT_CALENDAR):
+    """Відсортований масив святкових днів календаря (datetime64[D])."""
+    return get_business_calendar(calendar).holidays
+
+
+def _parse_date(value):
+    # date.fromisoformat приймає й інші форми ISO 8601 (20240101, 2024-W01-1), тож формат перевіряється явно
+    if len(value) != 10 or value[4] != '-' or value[7] != '-':
+        raise ValueError(f"time data '{value}' does not match format '%Y-%m-%d'")
+    return date.fromisoformat(value)
+
+
+def _parse_dates(values):
+    """Масив дат 'YYYY-MM-DD' (або date) як datetime64[D]."""
+    values = values.tolist() if isinstance(values, np.ndarray) else list(values)
+    # numpy приймає й неповні дати ('2024-01' - перше січня), тож довжина рядків перевіряється окремо
+    malformed = next((value for value in values if isinstance(value, str) and len(value) != 10), None)
+    if malformed is not None:
+        raise ValueError(f"Invalid date format: {malformed!r}")
+    try:
+        dates = np.array(values, dtype='datetime64[D]')
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid date format: {e}")
+    if np.isnat(dates).any():
+        raise ValueError("Invalid date format: empty date")
+    return dates
+
 
 def calculate_days(start_date, end_date):
+    """Календарні дні відпустки включно з обома датами ('YYYY-MM-DD')."""
     try:
-        d1 = datetime.strptime(start_date, '%Y-%m-%d')
-        d2 = datetime.strptime(end_date, '%Y-%m-%d')
-        return (d2 - d1).days + 1
+        return (_parse_date(end_date) - _parse_date(start_date)).days + 1
     except ValueError as e:
         raise ValueError(f"Invalid date format: {e}")
     except Exception as e:
         raise Exception(f"Error calculating days: {e}")
+
+
+def working_days(start_date, end_date, calendar=DEFAULT_CALENDAR, weekmask=DEFAULT_WEEKMASK):
+    """Робочі дні між датами включно (без вихідних за маскою та свят календаря)."""
+    try:
+        start, end = _parse_date(start_date), _parse_date(end_date)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid date format: {e}")
+    return int(np.busday_count(start, end + timedelta(days=1), busdaycal=get_business_calendar(calendar, weekmask)))
+
+
+def calculate_days_batch(start_dates, end_dates):
+    """Календарні дні для масивів дат початку й кінця (np.ndarray int64)."""
+    return (_parse_dates(end_dates) - _parse_dates(start_dates)).astype(np.int64) + 1
+
+
+def working_days_batch(start_dates, end_dates, calendar=DEFAULT_CALENDAR, weekmask=DEFAULT_WEEKMASK):
+    """Робочі дні для масивів дат початку й кінця включно (np.ndarray int64)."""
+    starts, ends = _parse_dates(start_dates), _parse_dates(end_dates)
+    return np.busday_count(starts, ends + 1, busdaycal=get_business_calendar(calendar, weekmask)).astype(np.int64)
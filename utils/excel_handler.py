@@ -0,0 +1,130 @@
+import base64
+import os
+import tempfile
+import pandas as pd
+from openpyxl import load_workbook
+
+# Кількість записів в одному пакеті, що передається до імпорту
+DEFAULT_BATCH_SIZE = 1000
+
+# Розкодований файл тримається в пам'яті до цього розміру, далі - на диску
+SPOOL_MAX_SIZE = 1024 * 1024
+
+# Base64 розкодовується шматками цього розміру (кратний 4 символам)
+_DECODE_SLICE = 1024 * 1024
+
+# Перейменування стовпців файлу для уніфікації
+COLUMN_MAPPING = {
+    'ПІБ': 'fio',
+    'ІПН': 'ipn',
+    'Роль': 'role',
+    'Днів відпустки на рік': 'vacation_days_per_year',
+    'Керівник': 'manager_fio'
+}
+
+REQUIRED_COLUMNS = ['fio', 'ipn']
+
+
+class UploadFormatError(ValueError):
+    """Файл не може бути імпортований (формат або відсутні обов'язкові стовпці)."""
+
+
+def _decode_upload(contents):
+    """Розкодовує data URL від dcc.Upload шматками у тимчасовий файл, не створюючи повної копії рядка."""
+    start = contents.index(',') + 1
+    buffer = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    for offset in range(start, len(contents), _DECODE_SLICE):
+        buffer.write(base64.b64decode(contents[offset:offset + _DECODE_SLICE]))
+    buffer.seek(0)
+    return buffer
+
+
+def _csv_frames(buffer, batch_size):
+    # Усі значення читаються як текст: тип кожного блоку інакше визначався б окремо,
+    # а ІПН втрачав би провідні нулі
+    with buffer, pd.read_csv(buffer, encoding='utf-8-sig', dtype=str, chunksize=batch_size) as reader:
+        yield from reader
+
+
+def _cell_text(value):
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def _xlsx_frames(buffer, batch_size):
+    with buffer:
+        workbook = load_workbook(buffer, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            columns = [_cell_text(value) or '' for value in header]
+            width = len(columns)
+            batch = []
+            yielded = False
+            for row in rows:
+                if all(value is None for value in row):
+                    continue
+                row = tuple(row[:width]) + (None,) * (width - len(row))
+                batch.append([_cell_text(value) for value in row])
+                if len(batch) >= batch_size:
+                    yield pd.DataFrame(batch, columns=columns)
+                    yielded = True
+                    batch = []
+            if batch or not yielded:
+                yield pd.DataFrame(batch, columns=columns)
+        finally:
+            workbook.close()
+
+
+def _xls_frames(buffer, batch_size):
+    # Старий формат BIFF (.xls) openpyxl не читає: файл розбирається цілком через xlrd
+    with buffer:
+        try:
+            frame = pd.read_excel(buffer, dtype=str, engine='xlrd')
+        except ImportError:
+            raise UploadFormatError("Формат .xls не поддерживается на сервере. Сохраните файл как .xlsx или CSV.")
+    for offset in range(0, max(len(frame), 1), batch_size):
+        yield frame.iloc[offset:offset + batch_size]
+
+
+def _renamed_frames(first_frame, frames):
+    try:
+        yield first_frame.rename(columns=COLUMN_MAPPING)
+        for frame in frames:
+            yield frame.rename(columns=COLUMN_MAPPING)
+    finally:
+        frames.close()
+
+
+def read_upload(contents, filename, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Потоково читає завантажений CSV/XLSX (або старий .xls) файл і повертає генератор пакетів
+    DataFrame (стовпці перейменовані за COLUMN_MAPPING, значення - текст) по
+    batch_size рядків.
+    Формат і заголовок перевіряються одразу; викидає UploadFormatError.
+    """
+    readers = {'.csv': _csv_frames, '.xlsx': _xlsx_frames, '.xlsm': _xlsx_frames, '.xls': _xls_frames}
+    reader = readers.get(os.path.splitext(filename or '')[1].lower())
+    if reader is None:
+        raise UploadFormatError("Неподдерживаемый формат файла. Используйте CSV или Excel.")
+    buffer = _decode_upload(contents)
+    frames = reader(buffer, batch_size)
+
+    try:
+        first_frame = next(frames, None)
+    except Exception:
+        frames.close()
+        raise
+    columns = set(first_frame.rename(columns=COLUMN_MAPPING).columns) if first_frame is not None else set()
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        frames.close()
+        raise UploadFormatError(
+            f"В файле отсутствуют обязательные столбцы: {', '.join(missing)} или их эквиваленты."
+        )
+    return _renamed_frames(first_frame, frames)
@@ -0,0 +1,188 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Обмеження частоти за алгоритмом token bucket: у кожного ключа є відро на
+# max_attempts жетонів, яке рівномірно наповнюється за window_seconds. Спроба
+# забирає один жетон. Стан ключа - два числа (жетони, час оновлення), тож
+# перевірка має сталу вартість незалежно від кількості спроб. Відро, що вже
+# наповнилося повністю, рівнозначне відсутньому, тому такі ключі видаляються.
+
+DEFAULT_MAX_KEYS = 100000
+
+
+class MemoryRateLimitStore:
+    """
+    Стан відер у пам'яті процесу. Ключі впорядковані за часом останнього
+    звернення: прострочені (idle довше ttl) видаляються з початку черги, а при
+    перевищенні max_keys витісняються найдавніше використані. Одне сховище
+    обслуговує один RateLimiter (ttl однаковий для всіх ключів).
+    """
+
+    def __init__(self, max_keys=DEFAULT_MAX_KEYS):
+        if max_keys < 1:
+            raise ValueError("max_keys must be positive")
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'expired': 0, 'evicted': 0}
+
+    def consume(self, key, capacity, rate, now, ttl):
+        """Забирає жетон; повертає (дозволено, жетонів після спроби)."""
+        buckets = self._buckets
+        cutoff = now - ttl
+        with self._lock:
+            while buckets:
+                oldest_key = next(iter(buckets))
+                if buckets[oldest_key][1] > cutoff:
+                    break
+                del buckets[oldest_key]
+                self._stats['expired'] += 1
+
+            bucket = buckets.pop(key, None)
+            if bucket is None:
+                tokens = capacity
+            else:
+                tokens = min(capacity, bucket[0] + max(now - bucket[1], 0) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            buckets[key] = (tokens, now)
+            if len(buckets) > self.max_keys:
+                buckets.popitem(last=False)
+                self._stats['evicted'] += 1
+        return allowed, tokens
+
+    def refund(self, key, capacity, rate, now, ttl):
+        """Повертає жетон, забраний consume (не більше capacity)."""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                return
+            tokens = min(capacity, bucket[0] + max(now - bucket[1], 0) * rate + 1)
+            self._buckets[key] = (tokens, now)
+
+    def reset(self, key):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, size=len(self._buckets))
+
+
+class SQLiteRateLimitStore:
+    """
+    Стан відер у таблиці rate_limits (міграція 8), спільний для всіх воркерів.
+    Спроба - один атомарний UPSERT: відро наповнюється і втрачає жетон лише
+    якщо жетон є. expires_at - момент, коли відро знову повне; рядки після нього
+    видаляються раз на purge_every викликів, а max_keys обмежує розмір таблиці.
+    ``connection_factory`` - контекстний менеджер з'єднання (db_operations.db_connection).
+    """
+
+    def __init__(self, connection_factory, max_keys=DEFAULT_MAX_KEYS, purge_every=1000):
+        self._connection_factory = connection_factory
+        self.max_keys = max_keys
+        self.purge_every = purge_every
+        self._calls = 0
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, rate, now, ttl):
+        params = {'key': key, 'capacity': capacity, 'rate': rate, 'now': now}
+        with self._connection_factory() as conn:
+            row = conn.execute("""
+                INSERT INTO rate_limits (key, tokens, updated_at, expires_at)
+                VALUES (:key, :capacity - 1, :now, :now + 1.0 / :rate)
+                ON CONFLICT (key) DO UPDATE SET
+                    tokens = MIN(:capacity, tokens + MAX(:now - updated_at, 0) * :rate) - 1,
+                    updated_at = :now,
+                    expires_at = :now + (:capacity - MIN(:capacity, tokens + MAX(:now - updated_at, 0) * :rate) + 1) / :rate
+                WHERE MIN(:capacity, tokens + MAX(:now - updated_at, 0) * :rate) >= 1
+                RETURNING tokens
+            """, params).fetchone()
+            if row is None:
+                # Жетонів немає: стан не змінюється, повертається поточна кількість
+                current = conn.execute("""
+                    SELECT MIN(:capacity, tokens + MAX(:now - updated_at, 0) * :rate)
+                    FROM rate_limits WHERE key = :key
+                """, params).fetchone()
+                result = (False, current[0])
+            else:
+                result = (True, row[0])
+            if self._should_purge():
+                self._purge(conn, now)
+            conn.commit()
+        return result
+
+    def refund(self, key, capacity, rate, now, ttl):
+        with self._connection_factory() as conn:
+            conn.execute("""
+                UPDATE rate_limits SET
+                    tokens = MIN(:capacity, tokens + MAX(:now - updated_at, 0) * :rate + 1),
+                    updated_at = :now,
+                    expires_at = :now + (:capacity - MIN(:capacity, tokens + MAX(:now - updated_at, 0) * :rate + 1)) / :rate
+                WHERE key = :key
+            """, {'key': key, 'capacity': capacity, 'rate': rate, 'now': now})
+            conn.commit()
+
+    def _should_purge(self):
+        with self._lock:
+            self._calls += 1
+            return self._calls % self.purge_every == 0
+
+    def _purge(self, conn, now):
+        conn.execute("DELETE FROM rate_limits WHERE expires_at <= ?", (now,))
+        if self.max_keys:
+            conn.execute("""
+                DELETE FROM rate_limits WHERE expires_at <= (
+                    SELECT expires_at FROM rate_limits ORDER BY expires_at DESC LIMIT 1 OFFSET ?
+                )
+            """, (self.max_keys,))
+
+    def reset(self, key):
+        with self._connection_factory() as conn:
+            conn.execute("DELETE FROM rate_limits WHERE key = ?", (key,))
+            conn.commit()
+
+    def stats(self):
+        with self._connection_factory() as conn:
+            size = conn.execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+        return {'size': size}
+
+
+class RateLimiter:
+    """
+    Не більше max_attempts спроб на ключ за window_seconds (з рівномірним
+    відновленням). Без store використовується MemoryRateLimitStore - ліміт у
+    межах одного процесу; SQLiteRateLimitStore робить його спільним для воркерів.
+    """
+
+    def __init__(self, max_attempts, window_seconds, store=None, clock=time.time):
+        if max_attempts < 1 or window_seconds <= 0:
+            raise ValueError("max_attempts and window_seconds must be positive")
+        self.max_attempts = max_attempts
+        self.window_seconds = window_seconds
+        self.store = store if store is not None else MemoryRateLimitStore()
+        self._rate = max_attempts / window_seconds
+        self._clock = clock
+
+    def hit(self, key):
+        """
+        Реєструє спробу. Повертає (дозволено, секунд до наступної дозволеної
+        спроби - 0, якщо дозволено).
+        """
+        allowed, tokens = self.store.consume(key, self.max_attempts, self._rate, self._clock(), self.window_seconds)
+        retry_after = 0 if allowed else (1 - tokens) / self._rate
+        return allowed, retry_after
+
+    def refund(self, key):
+        """
+        Повертає жетон, забраний hit. Спроба, яку не потрібно рахувати (наприклад,
+        успішний вхід), спершу атомарно списується через hit, а потім повертається:
+        так паралельні спроби з різних воркерів не проходять повз вичерпаний ліміт.
+        """
+        self.store.refund(key, self.max_attempts, self._rate, self._clock(), self.window_seconds)
+
+    def reset(self, key):
+        """Забуває спроби ключа (наприклад, після дії адміністратора)."""
+        self.store.reset(key)
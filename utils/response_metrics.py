@@ -0,0 +1,39 @@
+import threading
+
+
+class ResponseMetrics:
+    """
+    Розміри відповідей Dash у межах процесу: для кожного ключа (вихід
+    callback-а або '_dash-layout') - кількість відповідей, байти до та після
+    стиснення і кодування. Заповнюється compression_middleware.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def record(self, key, raw_bytes, sent_bytes, encoding):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = {
+                    'responses': 0, 'raw_bytes': 0, 'sent_bytes': 0, 'max_raw_bytes': 0, 'encodings': {},
+                }
+            entry['responses'] += 1
+            entry['raw_bytes'] += raw_bytes
+            entry['sent_bytes'] += sent_bytes
+            entry['max_raw_bytes'] = max(entry['max_raw_bytes'], raw_bytes)
+            entry['encodings'][encoding] = entry['encodings'].get(encoding, 0) + 1
+
+    def stats(self):
+        """{ключ: лічильники + середній розмір і ступінь стиснення}, від найбільшого обсягу до меншого."""
+        with self._lock:
+            entries = {key: dict(entry, encodings=dict(entry['encodings'])) for key, entry in self._entries.items()}
+        for entry in entries.values():
+            entry['avg_raw_bytes'] = entry['raw_bytes'] // entry['responses']
+            entry['compression_ratio'] = entry['raw_bytes'] / entry['sent_bytes'] if entry['sent_bytes'] else 1.0
+        return dict(sorted(entries.items(), key=lambda item: item[1]['sent_bytes'], reverse=True))
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
@@ -4,6 +4,7 @@ import secrets
 from functools import wraps
 from flask import session, request, abort
 import bleach
+from utils.rate_limiter import RateLimiter
 
 def validate_ipn(ipn):
     """Валідація ІПН"""
@@ -42,6 +43,34 @@ def sanitize_input(text):
     
     return cleaned
 
+# Лише рядки з цими символами змінюються bleach (окрім обрізання пробілів):
+# розмітка, сутності та керуючі символи
+_NEEDS_SANITIZING = r'[&<>\x00-\x08\x0b-\x1f]'
+
+def sanitize_series(values):
+    """
+    Векторний sanitize_input для стовпця pandas: bleach викликається лише для
+    рядків з розміткою або керуючими символами, решта лише обрізається.
+    Порожні та відсутні значення стають None.
+    """
+    result = values.astype(object)
+    present = result.notna()
+    result = result.where(present, None)
+    text = result[present].astype(str)
+    needs_sanitizing = text.str.contains(_NEEDS_SANITIZING, regex=True)
+    cleaned = text.str.strip()
+    cleaned[needs_sanitizing] = text[needs_sanitizing].map(sanitize_input)
+    result[present] = cleaned
+    return result.where(result != '', None)
+
+def ipn_mask(values):
+    """Векторний validate_ipn для стовпця pandas: True там, де рівно 10 цифр."""
+    text = values.astype(object)
+    valid = text.map(lambda value: isinstance(value, str))
+    digits = text[valid].str.replace(r'\D', '', regex=True)
+    valid[valid] = digits.str.len() == 10
+    return valid.astype(bool)
+
 def validate_date_format(date_string):
     """Валідація формату дати"""
     if not date_string:
@@ -93,32 +122,11 @@ def validate_file_upload(filename):
     
     return file_extension in allowed_extensions
 
+_rate_limiters = {}
+
 def rate_limit_check(user_id, action, max_attempts=5, window_minutes=15):
-    """Базова перевірка обмеження швидкості (потребує Redis для продакшн)"""
-    # Для продакшн рекомендується використовувати Redis
-    # Тут базова реалізація в пам'яті (не підходить для кластера)
-    import time
-    
-    if not hasattr(rate_limit_check, 'attempts'):
-        rate_limit_check.attempts = {}
-    
-    key = f"{user_id}:{action}"
-    current_time = time.time()
-    window_start = current_time - (window_minutes * 60)
-    
-    # Очищення старих записів
-    if key in rate_limit_check.attempts:
-        rate_limit_check.attempts[key] = [
-            timestamp for timestamp in rate_limit_check.attempts[key]
-            if timestamp > window_start
-        ]
-    else:
-        rate_limit_check.attempts[key] = []
-    
-    # Перевірка ліміту
-    if len(rate_limit_check.attempts[key]) >= max_attempts:
-        return False
-    
-    # Додавання поточної спроби
-    rate_limit_check.attempts[key].append(current_time)
-    return True
\ No newline at end of file
+    """Перевірка обмеження швидкості в межах процесу (спільний ліміт - utils.rate_limiter)"""
+    limits = (max_attempts, window_minutes)
+    limiter = _rate_limiters.get(limits) or _rate_limiters.setdefault(limits, RateLimiter(max_attempts, window_minutes * 60))
+    allowed, _ = limiter.hit(f"{user_id}:{action}")
+    return allowed
\ No newline at end of file